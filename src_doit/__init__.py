@@ -1,5 +1,7 @@
 from pathlib import Path
+import importlib.util
 import subprocess
+import sys
 
 from hat.doit import common
 from hat.doit.docs import build_sphinx
@@ -15,6 +17,8 @@ __all__ = ['task_clean_all',
            'task_build',
            'task_check',
            'task_test',
+           'task_test_sys',
+           'task_perf',
            'task_create_ui_dir',
            'task_docs',
            'task_ts',
@@ -27,12 +31,16 @@ src_py_dir = Path('src_py')
 src_js_dir = Path('src_js')
 src_static_dir = Path('src_static')
 pytest_dir = Path('test_pytest')
+sys_dir = Path('test_sys')
+perf_dir = Path('test_perf')
 docs_dir = Path('docs')
 schemas_json_dir = Path('schemas_json')
 node_modules_dir = Path('node_modules')
 
 build_py_dir = build_dir / 'py'
 build_docs_dir = build_dir / 'docs'
+build_sys_dir = build_dir / 'sys'
+build_perf_dir = build_dir / 'perf'
 
 ui_dir = src_py_dir / 'hat/orchestrator/ui'
 json_schema_repo_path = src_py_dir / 'hat/orchestrator/json_schema_repo.json'
@@ -63,6 +71,8 @@ def task_check():
     """Check with flake8"""
     return {'actions': [(run_flake8, [src_py_dir]),
                         (run_flake8, [pytest_dir]),
+                        (run_flake8, [sys_dir]),
+                        (run_flake8, [perf_dir]),
                         (run_eslint, [src_js_dir, ESLintConf.TS])],
             'task_dep': ['node_modules']}
 
@@ -73,6 +83,51 @@ def task_test():
                                          'create_ui_dir'])
 
 
+def task_test_sys():
+    """Run system tests"""
+
+    def run(args):
+        args = args or []
+        subprocess.run([sys.executable, '-m', 'pytest',
+                        '-p', 'no:cacheprovider',
+                        '--junitxml', str(build_sys_dir / 'results.xml'),
+                        str(sys_dir), *args],
+                       check=True)
+
+    return {'actions': [run],
+            'pos_arg': 'args',
+            'task_dep': ['json_schema_repo',
+                         'create_ui_dir']}
+
+
+def task_perf():
+    """Run benchmarks
+
+    Benchmarks are run with each available event loop implementation.
+
+    """
+
+    def run(args):
+        args = args or []
+        event_loops = ['asyncio']
+        if importlib.util.find_spec('uvloop'):
+            event_loops.append('uvloop')
+
+        for event_loop in event_loops:
+            output_path = build_perf_dir / f'results_{event_loop}.json'
+            subprocess.run([sys.executable, '-m', 'pytest',
+                            '-s', '-p', 'no:cacheprovider',
+                            '--perf-output', str(output_path),
+                            '--event-loop', event_loop,
+                            str(perf_dir), *args],
+                           check=True)
+
+    return {'actions': [run],
+            'pos_arg': 'args',
+            'task_dep': ['json_schema_repo',
+                         'create_ui_dir']}
+
+
 def task_create_ui_dir():
     """Create empty ui directory"""
     return {'actions': [(common.mkdir_p, [ui_dir])]}
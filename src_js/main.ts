@@ -8,14 +8,45 @@ type Status = 'STOPPED' | 'DELAYED' | 'STARTING' | 'RUNNING' | 'STOPPING';
 type Component = {
     id: number,
     name: string,
+    group: string | null,
+    tags: string[],
     delay: number,
     revive: boolean,
-    status: Status
+    status: Status,
+    pids: number[],
+    latencies: Record<string, {count: number, sum: number}>,
+    last_lifecycle: Record<string, number>
+};
+
+
+type Group = {
+    name: string,
+    instances: number,
+    running: number,
+    status: Status | null
+};
+
+
+type LoopMonitor = {
+    lag: {p50: number, p90: number, p99: number, max: number} | null,
+    slow_callback_count: number,
+    slow_callbacks: {timestamp: number, name: string, duration: number}[]
+};
+
+
+type Selector = {
+    ids?: number[],
+    names?: string[],
+    tags?: string[],
+    groups?: string[]
 };
 
 
 const defaultState = {
-    remote: null
+    remote: null,
+    selected: [],
+    maxUnavailable: 1,
+    rollout: null
 };
 
 
@@ -35,19 +66,62 @@ function vt(): u.VNode {
         return ['div.orchestrator'];
 
     const components = r.get('remote', 'components') as Component[];
+    const groups = r.get('remote', 'groups') as Group[];
+    const selected = r.get('selected') as number[];
+    const allSelected = (components.length > 0 &&
+        components.every(component => u.contains(component.id, selected)));
     return ['div.orchestrator',
+        groupsVt(components, groups),
+        ['div.toolbar',
+            ['span', `Selected: ${selected.length}`],
+            bulkButtons({ids: selected}, selected.length < 1),
+            rolloutVt()
+        ],
         ['table',
             ['thead',
                 ['tr',
+                    ['th.col-select',
+                        ['input', {
+                            props: {
+                                type: 'checkbox',
+                                checked: allSelected
+                            },
+                            on: {
+                                change: (evt: any) => r.set(
+                                    'selected',
+                                    (evt.target.checked ?
+                                        components.map(i => i.id) :
+                                        []))
+                            }}
+                        ]
+                    ],
                     ['th.col-component', 'Component'],
                     ['th.col-delay', 'Delay'],
                     ['th.col-revive', 'Revive'],
                     ['th.col-status', 'Status'],
+                    ['th.col-pid', 'PID'],
+                    ['th.col-timing', 'Timing'],
                     ['th.col-action', 'Action']
                 ]
             ],
             ['tbody', components.map(component =>
                 ['tr',
+                    ['td.col-select',
+                        ['input', {
+                            props: {
+                                type: 'checkbox',
+                                checked: u.contains(component.id, selected)
+                            },
+                            on: {
+                                change: (evt: any) => r.change(
+                                    'selected',
+                                    (x: any) => (evt.target.checked ?
+                                        [...x, component.id] :
+                                        x.filter((i: number) =>
+                                            i != component.id)))
+                            }}
+                        ]
+                    ],
                     ['td.col-component', component.name],
                     ['td.col-delay', String(component.delay)],
                     ['td.col-revive',
@@ -69,6 +143,8 @@ function vt(): u.VNode {
                         ]
                     ],
                     ['td.col-status', component.status],
+                    ['td.col-pid', component.pids.join(', ')],
+                    timingVt(component),
                     ['td.col-action',
                         ['button', {
                             props: {
@@ -108,11 +184,196 @@ function vt(): u.VNode {
                     ]
                 ]
             )]
+        ],
+        loopMonitorVt(r.get('remote', 'loop_monitor') as LoopMonitor | null)
+    ];
+}
+
+
+function loopMonitorVt(monitor: LoopMonitor | null): u.VNode[] {
+    if (!monitor)
+        return [];
+
+    const lag = monitor.lag;
+    return ['div.loop-monitor',
+        ['span', 'Event loop lag: ' + (lag ?
+            `p50 ${formatSeconds(lag.p50)}, p90 ${formatSeconds(lag.p90)}, ` +
+            `p99 ${formatSeconds(lag.p99)}, max ${formatSeconds(lag.max)}` :
+            '-')],
+        ['span', {
+            props: {
+                title: monitor.slow_callbacks.map(i =>
+                    `${new Date(i.timestamp * 1000).toLocaleTimeString()} ` +
+                    `${i.name}: ${formatSeconds(i.duration)}`
+                ).join('\n')
+            }},
+            `Slow callbacks: ${monitor.slow_callback_count}`
+        ]
+    ];
+}
+
+
+function timingVt(component: Component): u.VNode {
+    const lifecycle = component.last_lifecycle;
+    const text = ('ready' in lifecycle ?
+        `${formatSeconds(lifecycle.ready)} / ${formatSeconds(
+            ('exited' in lifecycle && 'stop_requested' in lifecycle) ?
+                lifecycle.exited - lifecycle.stop_requested : null)}` :
+        '');
+
+    const title = [
+        'Last lifecycle:',
+        ...Object.entries(lifecycle).map(
+            ([phase, t]) => `  ${phase}: ${formatSeconds(t)}`),
+        'Mean latencies:',
+        ...Object.entries(component.latencies).map(
+            ([name, {count, sum}]) =>
+                `  ${name}: ${formatSeconds(count ? sum / count : null)} ` +
+                `(${count})`)
+    ].join('\n');
+
+    return ['td.col-timing', {props: {title: title}}, text];
+}
+
+
+function formatSeconds(value: number | null): string {
+    if (value == null)
+        return '-';
+    return `${value.toFixed(3)} s`;
+}
+
+
+function groupsVt(components: Component[], groups: Group[]): u.VNode {
+    const tags = Array.from(new Set(components.flatMap(i => i.tags))).sort();
+    return ['div.groups',
+        ['div.group',
+            ['span.group-name', 'All'],
+            bulkButtons({names: ['*']}, components.length < 1)
+        ],
+        tags.map(tag => ['div.group',
+            ['span.group-name', tag],
+            bulkButtons({tags: [tag]}, false)
+        ]),
+        groups.map(group => ['div.group',
+            ['span.group-name', group.name],
+            ['span.group-status',
+                `${group.status ?? 'MIXED'} ` +
+                `(${group.running}/${group.instances} running)`
+            ],
+            scaleButtons(group),
+            bulkButtons({groups: [group.name]}, group.instances < 1)
+        ])
+    ];
+}
+
+
+function scaleButtons(group: Group): u.VNode[] {
+    return ([['-', -1], ['+', 1]] as [string, number][]).map(
+        ([label, delta]) => ['button', {
+            props: {
+                title: `scale group ${group.name}`,
+                disabled: group.instances + delta < 1
+            },
+            on: {
+                click: () => {
+                    if (!app)
+                        return;
+                    app.send('scale', {
+                        group: group.name,
+                        instances: group.instances + delta
+                    });
+                }
+            }},
+            label
+        ]
+    );
+}
+
+
+function rolloutVt(): u.VNode[] {
+    const rollout = r.get('rollout') as string | null;
+    return [
+        ['label', 'Max unavailable: ',
+            ['input.max-unavailable', {
+                props: {
+                    type: 'number',
+                    min: 1,
+                    value: r.get('maxUnavailable')
+                },
+                on: {
+                    change: (evt: any) => r.set(
+                        'maxUnavailable',
+                        Math.max(1, Math.floor(Number(evt.target.value)) || 1))
+                }}
+            ]
+        ],
+        (rollout == null ? [] : ['span.rollout', rollout])
+    ];
+}
+
+
+async function rollingRestart(selector: Selector) {
+    if (!app)
+        return;
+
+    const title = selectorTitle(selector);
+    r.set('rollout', `rolling restart (${title}) in progress`);
+    try {
+        await app.send('rolling_restart', {
+            ...selector,
+            max_unavailable: r.get('maxUnavailable')
+        });
+        r.set('rollout', `rolling restart (${title}) done`);
+    } catch (e) {
+        r.set('rollout', `rolling restart (${title}) failed: ${e}`);
+    }
+}
+
+
+function bulkButtons(selector: Selector, disabled: boolean): u.VNode[] {
+    const title = selectorTitle(selector);
+    return [
+        ...['start', 'stop', 'restart'].map(action =>
+            ['button', {
+                props: {
+                    title: `${action} (${title})`,
+                    disabled: disabled
+                },
+                on: {
+                    click: () => {
+                        if (!app)
+                            return;
+                        app.send(action, selector);
+                    }
+                }},
+                action
+            ]
+        ),
+        ['button', {
+            props: {
+                title: `rolling restart (${title})`,
+                disabled: disabled
+            },
+            on: {
+                click: () => rollingRestart(selector)
+            }},
+            'rolling restart'
         ]
     ];
 }
 
 
+function selectorTitle(selector: Selector): string {
+    if (selector.tags)
+        return `tag ${selector.tags.join(', ')}`;
+    if (selector.names)
+        return `name ${selector.names.join(', ')}`;
+    if (selector.groups)
+        return `group ${selector.groups.join(', ')}`;
+    return `${(selector.ids || []).length} selected`;
+}
+
+
 function icon(name: string): u.VNode {
     return ['img.icon', {
         props: {
@@ -0,0 +1,202 @@
+"""Adoption of component processes across orchestrator restarts
+
+If adoption is enabled, component processes are created as detached
+processes (see `hat.orchestrator.process.create_process`) with output
+written to per-component named pipes. State file contains process ID,
+process start time and hash of component configuration of each running
+process. State file is written (atomically) each time process is created
+or exits.
+
+During startup, orchestrator adopts running processes listed in state file
+instead of creating new processes. Process is adopted only if its start
+time didn't change (process ID wasn't reused) and component configuration
+didn't change. Other running processes listed in state file are stopped.
+Adoption is supported only on Linux.
+
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+import functools
+import hashlib
+import logging
+import os
+import urllib.parse
+
+from hat import aio
+from hat import json
+
+import hat.orchestrator.process
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+
+def get_conf_hash(conf: json.Data) -> str:
+    """Get component configuration hash"""
+    data = json.encode(conf, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_process_start_time(pid: int) -> int | None:
+    """Get process start time (in clock ticks after system boot)
+
+    If process doesn't exist, ``None`` is returned.
+
+    """
+    try:
+        stat = Path(f'/proc/{pid}/stat').read_text()
+
+    except OSError:
+        return None
+
+    # process name (second field) can contain spaces and parentheses
+    return int(stat[stat.rindex(')') + 2:].split()[19])
+
+
+class Adoption(aio.Resource):
+    """Adoption
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/adoption``
+
+    """
+
+    def __init__(self, conf: json.Data):
+        self._state_path = Path(conf['state_path'])
+        self._fifo_dir = Path(conf['fifo_dir'])
+        self._entries = _read_state(self._state_path)
+        self._async_group = aio.Group()
+
+        self._fifo_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    async def adopt(self,
+                    confs: Iterable[json.Data]
+                    ) -> dict[str, hat.orchestrator.process.Process]:
+        """Adopt processes listed in state file
+
+        Component configurations are configurations of all components
+        (replicated components have to be expanded). Result contains
+        adopted processes identified by component names. Running processes
+        of removed or changed components are stopped.
+
+        """
+        confs = {conf['name']: conf for conf in confs}
+        processes = {}
+
+        for name, entry in list(self._entries.items()):
+            conf = confs.get(name)
+            matching = (conf is not None and
+                        entry['conf_hash'] == get_conf_hash(conf))
+
+            process = await self._adopt_process(name, entry,
+                                                conf if matching else None)
+            if not process:
+                del self._entries[name]
+                continue
+
+            if not matching:
+                mlog.info("stopping process %s of changed or removed "
+                          "component %s", process.pid, name)
+                await process.async_close()
+                del self._entries[name]
+                continue
+
+            mlog.info("process %s of component %s adopted", process.pid, name)
+            processes[name] = process
+            self._watch_process(name, process)
+
+        self._write_state()
+        return processes
+
+    def get_create_process(self,
+                           conf: json.Data
+                           ) -> hat.orchestrator.process.CreateProcessCb:
+        """Get create process callback for component"""
+        return functools.partial(self._create_process, conf)
+
+    async def _adopt_process(self, name, entry, conf):
+        pid = entry['pid']
+        if get_process_start_time(pid) != entry['start_time']:
+            return
+
+        capture_output = conf.get('capture_output', True) if conf else False
+
+        try:
+            return await hat.orchestrator.process.adopt_process(
+                pid=pid,
+                output_fifo=(self._get_fifo_path(name) if capture_output
+                             else None),
+                sigint_timeout=conf.get('sigint_timeout', 5) if conf else 5,
+                sigkill_timeout=conf.get('sigkill_timeout', 5) if conf else 5)
+
+        except ProcessLookupError:
+            return
+
+        except Exception as e:
+            mlog.warning("error adopting process %s of component %s: %s",
+                         pid, name, e, exc_info=e)
+
+    async def _create_process(self, conf, **kwargs):
+        name = conf['name']
+        process = await hat.orchestrator.process.create_process(
+            **kwargs,
+            detached=True,
+            output_fifo=self._get_fifo_path(name))
+
+        self._entries[name] = {
+            'pid': process.pid,
+            'start_time': get_process_start_time(process.pid),
+            'conf_hash': get_conf_hash(conf)}
+        self._write_state()
+        self._watch_process(name, process)
+
+        return process
+
+    def _watch_process(self, name, process):
+        self._async_group.spawn(aio.call_on_done, process.wait_closed(),
+                                self._on_process_closed, name, process)
+
+    def _on_process_closed(self, name, process):
+        # detached process is still running
+        if process.exit_time is None:
+            return
+
+        entry = self._entries.get(name)
+        if not entry or entry['pid'] != process.pid:
+            return
+
+        del self._entries[name]
+        self._write_state()
+
+    def _get_fifo_path(self, name):
+        return self._fifo_dir / f"{urllib.parse.quote(name, safe='')}.fifo"
+
+    def _write_state(self):
+        try:
+            tmp_path = self._state_path.with_name(
+                f'{self._state_path.name}.tmp')
+            json.encode_file(self._entries, tmp_path, json.Format.JSON)
+            os.replace(tmp_path, self._state_path)
+
+        except Exception as e:
+            mlog.error("error writing adoption state: %s", e, exc_info=e)
+
+
+def _read_state(path):
+    if not path.exists():
+        return {}
+
+    try:
+        return json.decode_file(path, json.Format.JSON)
+
+    except Exception as e:
+        mlog.warning("error reading adoption state: %s", e, exc_info=e)
+        return {}
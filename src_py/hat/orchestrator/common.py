@@ -0,0 +1,225 @@
+"""Common functionality shared between orchestrator interfaces"""
+
+from collections.abc import Callable, Iterable
+import fnmatch
+
+from hat import json
+
+import hat.orchestrator.component
+import hat.orchestrator.event_log
+import hat.orchestrator.registry
+import hat.orchestrator.rollout
+
+
+control_actions: set[str] = {'start', 'stop', 'restart', 'revive'}
+"""Names of component control actions"""
+
+registry_actions: set[str] = {'add', 'remove', 'scale'}
+"""Names of registry actions"""
+
+
+def get_component_info(component_id: int,
+                       component: hat.orchestrator.component.Component
+                       ) -> json.Data:
+    """Get component information
+
+    Resulting data represents single item of ``components`` array defined by
+    ``hat-orchestrator://juggler.yaml#/$defs/state``.
+
+    """
+    return {'id': component_id,
+            'name': component.name,
+            'group': component.group,
+            'tags': component.tags,
+            'delay': component.delay,
+            'revive': component.revive,
+            'status': component.status.name,
+            'pids': component.pids,
+            'ready': component.ready,
+            'status_text': component.status_text,
+            'latencies': {name: {'count': histogram.count,
+                                 'sum': histogram.sum}
+                          for name, histogram in component.latencies.items()},
+            'last_lifecycle': component.last_lifecycle}
+
+
+def get_groups_info(components: Iterable[hat.orchestrator.component.Component]
+                    ) -> json.Data:
+    """Get replicated component groups information
+
+    Resulting data represents ``groups`` array defined by
+    ``hat-orchestrator://juggler.yaml#/$defs/state``.
+
+    """
+    groups = {}
+    for component in components:
+        if component.group is not None:
+            groups.setdefault(component.group, []).append(component.status)
+
+    return [{'name': name,
+             'instances': len(statuses),
+             'running': statuses.count(
+                 hat.orchestrator.component.Status.RUNNING),
+             'status': (statuses[0].name
+                        if all(status == statuses[0] for status in statuses)
+                        else None)}
+            for name, statuses in groups.items()]
+
+
+def control_components(
+        components: dict[int, hat.orchestrator.component.Component],
+        action: str,
+        data: json.Data):
+    """Apply control action to selected components
+
+    Action is one of `control_actions` and `data` is action's request data
+    which includes components selector (see `select_components`).
+
+    Raises:
+        Exception: invalid action or component id
+
+    """
+    if action not in control_actions:
+        raise Exception(f'invalid action {action}')
+
+    selected = select_components(components, data)
+
+    if action == 'start':
+        for component in selected:
+            component.start()
+
+    elif action == 'stop':
+        for component in selected:
+            component.stop()
+
+    elif action == 'restart':
+        for component in selected:
+            component.restart()
+
+    elif action == 'revive':
+        revive = bool(data['value'])
+        for component in selected:
+            component.set_revive(revive)
+
+
+async def rolling_restart(
+        components: dict[int, hat.orchestrator.component.Component],
+        data: json.Data,
+        progress_cb: Callable[[int, int], None] | None = None):
+    """Rolling restart of selected components
+
+    Request data is defined by
+    ``hat-orchestrator://juggler.yaml#/$defs/request/rolling_restart``
+    (see `hat.orchestrator.rollout.rolling_restart`).
+
+    Raises:
+        Exception: invalid component id or rolling restart aborted
+
+    """
+    await hat.orchestrator.rollout.rolling_restart(
+        select_components(components, data),
+        max_unavailable=data.get('max_unavailable', 1),
+        min_ready=data.get('min_ready', 0),
+        ready_timeout=data.get('ready_timeout', 30),
+        progress_cb=progress_cb)
+
+
+async def control_registry(registry: hat.orchestrator.registry.Registry | None,
+                           action: str,
+                           data: json.Data
+                           ) -> json.Data:
+    """Apply registry action
+
+    Action is one of `registry_actions`. Data of ``add`` action is component
+    configuration and result is id of added component. Data of ``remove``
+    action is components selector (see `select_components`). Data of
+    ``scale`` action contains group name and new number of instances.
+
+    Raises:
+        Exception: registry not available, invalid action or data
+
+    """
+    if registry is None:
+        raise Exception('registry not available')
+
+    if action == 'add':
+        return await registry.add(data)
+
+    if action == 'remove':
+        selected = set(select_components(registry.components, data))
+        await registry.remove(
+            component_id
+            for component_id, component in registry.components.items()
+            if component in selected)
+        return
+
+    if action == 'scale':
+        await registry.scale(data['group'], data['instances'])
+        return
+
+    raise Exception(f'invalid action {action}')
+
+
+def get_events(event_log: hat.orchestrator.event_log.EventLog | None,
+               data: json.Data
+               ) -> json.Data:
+    """Get events based on events request data
+
+    Request data is defined by
+    ``hat-orchestrator://juggler.yaml#/$defs/request/events`` and result is
+    defined by ``hat-orchestrator://juggler.yaml#/$defs/events``.
+
+    Raises:
+        Exception: event log not available
+
+    """
+    if event_log is None:
+        raise Exception('event log not available')
+
+    since = data.get('since', 0) if data else 0
+    return event_log.get_data(since)
+
+
+def select_components(
+        components: dict[int, hat.orchestrator.component.Component],
+        selector: json.Data
+        ) -> list[hat.orchestrator.component.Component]:
+    """Select components
+
+    Selector is defined by
+    ``hat-orchestrator://juggler.yaml#/$defs/selector``. Single component is
+    selected by ``id``. Multiple components are selected by union of
+    components matching any of ``ids``, ``names`` (glob patterns),
+    ``tags`` or ``groups``. Resulting components are ordered as in
+    `components`.
+
+    Raises:
+        Exception: invalid component id
+
+    """
+    if 'id' in selector:
+        return [_get_component(components, selector['id'])]
+
+    ids = set(selector.get('ids', []))
+    names = selector.get('names', [])
+    tags = set(selector.get('tags', []))
+    groups = set(selector.get('groups', []))
+
+    for component_id in ids:
+        _get_component(components, component_id)
+
+    return [component
+            for component_id, component in components.items()
+            if (component_id in ids or
+                any(fnmatch.fnmatchcase(component.name, name)
+                    for name in names) or
+                not tags.isdisjoint(component.tags) or
+                component.group in groups)]
+
+
+def _get_component(components, component_id):
+    component = components.get(component_id)
+    if component is None:
+        raise Exception(f'invalid component id {component_id}')
+
+    return component
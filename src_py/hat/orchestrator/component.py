@@ -6,18 +6,27 @@ import contextlib
 import datetime
 import enum
 import logging
+import select
+import time
 
 from hat import aio
 from hat import json
 from hat import util
 
+import hat.orchestrator.histogram
 import hat.orchestrator.process
+import hat.orchestrator.sockets
 
 
 mlog: logging.Logger = logging.getLogger(__name__)
 """Module logger"""
 
 
+_connection_poll_delay: float = 0.1
+"""Delay in seconds between checks for new incoming connections of running
+on demand component on platforms without epoll (with epoll, each new
+connection is reported by edge triggered notification)"""
+
 Status = enum.Enum('Status', [
     'STOPPED',
     'DELAYED',
@@ -26,41 +35,422 @@ Status = enum.Enum('Status', [
     'STOPPING'])
 
 
-class Component(aio.Resource):
+class ProcessMixin:
+    """Process supervision shared by component implementations
+
+    Provides process related properties, notification handling, process
+    creation and accounting of stopped processes for
+    `Component` and `hat.orchestrator.engine.CompactComponent`.
+
+    Implementations should call ``_init_process`` during
+    initialization and provide ``_conf``, ``_win32_job``,
+    ``_create_process``, ``_status``, ``_detached``, ``_lifecycle``,
+    ``_change_cbs`` and ``_output_cbs`` attributes (callback registries can
+    be ``None``) together with `name` property and `restart` method.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def returncode(self) -> int | None:
+        """Return code of last stopped process"""
+        return self._returncode
+
+    @property
+    def pid(self) -> int | None:
+        """Process ID of currently running process"""
+        return self._process.pid if self._process else None
+
+    @property
+    def uptime(self) -> float | None:
+        """Duration in seconds of currently running process execution"""
+        if self._process_start_time is None:
+            return None
+        return time.monotonic() - self._process_start_time
+
+    @property
+    def start_count(self) -> int:
+        """Number of successfully started processes"""
+        return self._start_count
+
+    @property
+    def ready(self) -> bool:
+        """Ready flag reported by currently running process"""
+        return self._ready
+
+    @property
+    def status_text(self) -> str | None:
+        """Status text last reported by component's process"""
+        return self._status_text
+
+    @property
+    def output_lines(self) -> int:
+        """Number of captured output lines of all processes"""
+        if not self._process:
+            return self._output_lines
+        return self._output_lines + self._process.output_lines
+
+    @property
+    def output_bytes(self) -> int:
+        """Number of captured output bytes of all processes"""
+        if not self._process:
+            return self._output_bytes
+        return self._output_bytes + self._process.output_bytes
+
+    @property
+    def dropped_lines(self) -> int:
+        """Number of dropped output lines of all processes"""
+        if not self._process:
+            return self._dropped_lines
+        return self._dropped_lines + self._process.dropped_lines
+
+    @property
+    def latencies(self) -> dict[str, hat.orchestrator.histogram.Histogram]:
+        """Lifecycle latency histograms
+
+        Available histograms:
+
+            * ``queue`` - from start request (or process termination if
+              revive is set) until start of process creation (includes
+              start delay)
+            * ``spawn`` - duration of process creation
+            * ``ready`` - from process creation until component is running
+            * ``stop`` - from stop request (or process termination) until
+              process exit
+            * ``sigint`` - from sending SIGINT until process exit
+            * ``sigkill`` - from sending SIGKILL until process exit
+
+        """
+        if self._latencies is None:
+            self._latencies = {name: hat.orchestrator.histogram.Histogram()
+                               for name in ('queue', 'spawn', 'ready', 'stop',
+                                            'sigint', 'sigkill')}
+        return self._latencies
+
+    @property
+    def last_lifecycle(self) -> dict[str, float]:
+        """Phase times of last finished process lifecycle
+
+        Keys are phase names (``queued``, ``spawning``, ``spawned``,
+        ``ready``, ``stop_requested``, ``sigint``, ``sigkill``, ``exited``)
+        and values are durations in seconds relative to ``queued``
+        phase. Phases that did not occur are omitted.
+
+        """
+        if self._last_lifecycle is None:
+            return {}
+        return self._last_lifecycle
+
+    def notify(self, fields: dict[str, str]):
+        """Process notification sent by component's process
+
+        Notification fields are compatible with systemd's ``sd_notify``.
+        Supported fields:
+
+            * ``READY=1`` - process is ready
+            * ``RELOADING=1``, ``STOPPING=1`` - process is not ready
+            * ``STATUS=...`` - status text
+            * ``WATCHDOG=1`` - watchdog heartbeat
+            * ``WATCHDOG=trigger`` - process is restarted immediately
+
+        Other fields are ignored. Ready flag and status text changes are
+        notified by change callbacks.
+
+        """
+        changed = False
+
+        if fields.get('READY') == '1':
+            changed = not self._ready
+            self._ready = True
+
+        if fields.get('RELOADING') == '1' or fields.get('STOPPING') == '1':
+            changed = changed or self._ready
+            self._ready = False
+
+        status_text = fields.get('STATUS')
+        if status_text is not None and status_text != self._status_text:
+            changed = True
+            self._status_text = status_text
+
+        watchdog = fields.get('WATCHDOG')
+        if watchdog == '1':
+            self._watchdog_time = time.monotonic()
+
+        elif watchdog == 'trigger' and self._status == Status.RUNNING:
+            mlog.warning("component %s (%s) watchdog triggered",
+                         self.name, self.pid)
+            self.restart()
+
+        if changed:
+            self._notify_change()
+
+    def _init_process(self, env, process=None):
+        self._env = dict(env or {})
+        self._returncode = None
+        self._process = process
+        self._process_start_time = time.monotonic() if process else None
+        self._start_count = 0
+        self._ready = False
+        self._status_text = None
+        self._watchdog_time = None
+        self._output_lines = 0
+        self._output_bytes = 0
+        self._dropped_lines = 0
+        self._latencies = None
+        self._last_lifecycle = None
+
+        watchdog_timeout = self._conf.get('watchdog_timeout')
+        if watchdog_timeout is not None:
+            self._env['WATCHDOG_USEC'] = str(
+                round(watchdog_timeout * 1_000_000))
+
+    def _notify_change(self):
+        if self._change_cbs is not None:
+            self._change_cbs.notify()
+
+    async def _start_process(self, pass_fds=()):
+        conf = self._conf
+        stdin = conf.get('stdin', '')
+        process = await self._create_process(
+            args=conf['args'],
+            inherit_stdin=not stdin,
+            capture_output=conf.get('capture_output', True),
+            sigint_timeout=conf.get('sigint_timeout', 5),
+            sigkill_timeout=conf.get('sigkill_timeout', 5),
+            pass_fds=pass_fds,
+            **({'env': self._env} if self._env else {}))
+        self._lifecycle['spawned'] = time.monotonic()
+        if self._win32_job:
+            self._win32_job.add_process(process)
+        mlog.info("component %s (%s) started", self.name, process.pid)
+
+        if stdin:
+            mlog.info("writing stdin for component %s (%s)",
+                      self.name, process.pid)
+            process.write(stdin)
+
+        self._process = process
+        self._process_start_time = self._lifecycle['spawned']
+        self._start_count += 1
+        self._ready = False
+        self._status_text = None
+        self._watchdog_time = self._process_start_time
+
+        return process
+
+    def _process_stopped(self, process, lifecycle):
+        self._returncode = process.returncode
+
+        if process is self._process:
+            self._process = None
+            self._process_start_time = None
+            self._ready = False
+            self._watchdog_time = None
+        self._output_lines += process.output_lines
+        self._output_bytes += process.output_bytes
+        self._dropped_lines += process.dropped_lines
+
+        if self._detached:
+            mlog.info("component %s (%s) detached", self.name, process.pid)
+            return
+
+        if process.returncode is None and process.exit_time is None:
+            mlog.info("component %s (%s) failed to stop",
+                      self.name, process.pid)
+        elif process.returncode is None:
+            mlog.info("component %s (%s) stopped", self.name, process.pid)
+        else:
+            mlog.info("component %s (%s) stopped with return code %s",
+                      self.name, process.pid, process.returncode)
+
+        try:
+            self._finish_lifecycle(process, lifecycle)
+
+        except Exception as e:
+            mlog.warning("component %s lifecycle error: %s",
+                         self.name, e, exc_info=e)
+
+    def _finish_lifecycle(self, process, lifecycle):
+        for phase, t in [('sigint', process.sigint_time),
+                         ('sigkill', process.sigkill_time),
+                         ('exited', process.exit_time)]:
+            if t is not None:
+                lifecycle[phase] = t
+
+        self._observe_latencies(lifecycle, [
+            ('stop', 'stop_requested', 'exited'),
+            ('sigint', 'sigint', None if 'sigkill' in lifecycle
+             else 'exited'),
+            ('sigkill', 'sigkill', 'exited')])
+
+        queued = lifecycle.get('queued', 0)
+        self._last_lifecycle = {
+            phase: max(t - queued, 0)
+            for phase, t in sorted(lifecycle.items(), key=lambda i: i[1])}
+
+        mlog.info("component %s (%s) lifecycle: %s", self.name, process.pid,
+                  json.encode({'component': self.name,
+                               'pid': process.pid,
+                               'returncode': process.returncode,
+                               **{phase: round(t, 6) for phase, t
+                                  in self._last_lifecycle.items()}}))
+
+    def _observe_latencies(self, lifecycle, latencies):
+        for name, start_phase, stop_phase in latencies:
+            if start_phase in lifecycle and stop_phase in lifecycle:
+                self.latencies[name].observe(
+                    max(lifecycle[stop_phase] - lifecycle[start_phase], 0))
+
+    async def _read_stdout(self, process):
+        try:
+            while True:
+                line = await process.readline()
+                mlog.info("component %s (%s) stdout: %s",
+                          self.name, process.pid, line)
+                now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                print(f"[{now} {self.name} ({process.pid})] {line}")
+                if self._output_cbs is not None:
+                    self._output_cbs.notify(line)
+
+        except ConnectionError:
+            mlog.debug("component %s (%s) stdout closed",
+                       self.name, process.pid)
+
+
+class Component(ProcessMixin, aio.Resource):
     """Component
 
+    Listening sockets defined by component configuration are created
+    during component initialization and passed to each of component's
+    processes.
+
+    On demand component is started when incoming connection is detected on
+    any of its listening sockets. If idle timeout is configured, on demand
+    component is stopped after idle timeout without new incoming
+    connections.
+
+    If `adopted_process` is provided, component is initially running
+    adopted process (see `hat.orchestrator.process.adopt_process`) -
+    delay and start delay are not applied and auto start is ignored.
+
+    If `revive` or `started` are provided, they override configuration's
+    ``revive`` and ``auto_start`` properties (used for restoring runtime
+    state of previously running component).
+
+    Additional environment variables `env` are passed to each of
+    component's processes. If ``watchdog_timeout`` is configured, running
+    process is restarted if it doesn't report watchdog heartbeat (see
+    `Component.notify`) in watchdog timeout - process environment
+    additionally contains ``WATCHDOG_USEC`` variable, compatible with
+    systemd's watchdog.
+
+    If ``notify_ready`` is configured, previous process of overlapping
+    restart is stopped only after new process reports readiness
+    (``READY=1``) in overlap timeout - otherwise new process is stopped and
+    previous process continues running.
+
     Args:
         conf: configuration defined by
             ``hat-orchestrator://orchestrator.yaml#/$defs/component``
         win32_job: win32 job instance
+        create_process: create process implementation (process backend)
+        adopted_process: already running process
+        revive: initial revive flag
+        started: initial started flag
+        env: additional environment variables
 
     """
 
     def __init__(self,
                  conf: json.Data,
-                 win32_job: hat.orchestrator.process.Win32Job | None = None):
+                 win32_job: hat.orchestrator.process.Win32Job | None = None,
+                 create_process: hat.orchestrator.process.CreateProcessCb = (
+                     hat.orchestrator.process.create_process),
+                 adopted_process: (hat.orchestrator.process.Process |
+                                   None) = None,
+                 revive: bool | None = None,
+                 started: bool | None = None,
+                 env: dict[str, str] | None = None):
+        self._conf = conf
         self._win32_job = win32_job
+        self._create_process = create_process
+        self._adopted_process = adopted_process
 
         self._name = conf['name']
-        self._args = conf['args']
-        self._stdin = conf.get('stdin', '')
+        self._tags = conf.get('tags', [])
+        self._group = conf.get('group')
         self._capture_output = conf.get('capture_output', True)
         self._delay = conf.get('delay', 0)
-        self._revive = conf.get('revive', False)
-        self._auto_start = conf.get('auto_start', True)
+        self._revive = (conf.get('revive', False) if revive is None
+                        else revive)
+        self._auto_start = (conf.get('auto_start', True) if started is None
+                            else started)
         self._start_delay = conf.get('start_delay', 0.5)
         self._create_timeout = conf.get('create_timeout', 2)
-        self._sigint_timeout = conf.get('sigint_timeout', 5)
-        self._sigkill_timeout = conf.get('sigkill_timeout', 5)
-
-        self._status = Status.DELAYED if self._delay else Status.STOPPED
+        self._overlap_restart = conf.get('overlap_restart', False)
+        self._overlap_timeout = conf.get('overlap_timeout', 5)
+        self._notify_ready = conf.get('notify_ready', False)
+        self._on_demand = conf.get('on_demand', False)
+        self._idle_timeout = conf.get('idle_timeout')
+        self._watchdog_timeout = conf.get('watchdog_timeout')
+        self._init_process(env, adopted_process)
+
+        if self._on_demand:
+            if not conf.get('sockets'):
+                raise ValueError('on demand component without sockets')
+            self._auto_start = False
+
+        self._started = bool(self._auto_start or adopted_process)
+        self._status = (Status.DELAYED if self._delay and not adopted_process
+                        else Status.STOPPED)
+        self._restart_requested = False
+        self._detached = False
+        self._previous_process = None
+        self._previous_lifecycle = None
+        self._queued_time = (time.monotonic()
+                             if self._auto_start and not adopted_process
+                             else None)
+        self._lifecycle = {}
         self._change_cbs = util.CallbackRegistry(
             exception_cb=lambda e: mlog.warning(
                 "change callback exception: %s", e, exc_info=e))
+        self._started_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "started callback exception: %s", e, exc_info=e))
+        self._output_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "output callback exception: %s", e, exc_info=e))
         self._started_queue = aio.Queue()
+
+        self._sockets = []
+        self._epoll = None
+        try:
+            for socket_conf in conf.get('sockets', []):
+                self._sockets.append(
+                    hat.orchestrator.sockets.create_socket(socket_conf))
+
+            # listening sockets are shared with process - sockets are
+            # registered to separate epoll instance because some event loop
+            # implementations (e.g. uvloop) set registered file descriptors
+            # to non-blocking mode
+            if self._on_demand and hasattr(select, 'epoll'):
+                self._epoll = select.epoll()
+                for sock in self._sockets:
+                    self._epoll.register(sock.fileno(),
+                                         select.EPOLLIN | select.EPOLLET)
+
+        except BaseException:
+            self._close_sockets()
+            raise
+
         self._async_group = aio.Group()
+        self._async_group.spawn(aio.call_on_cancel, self._close_sockets)
         self._async_group.spawn(self._run_loop)
 
+        if self._on_demand:
+            self._async_group.spawn(self._on_demand_loop)
+
     @property
     def async_group(self) -> aio.Group:
         """Async group"""
@@ -71,11 +461,26 @@ class Component(aio.Resource):
         """Current status"""
         return self._status
 
+    @property
+    def conf(self) -> json.Data:
+        """Component configuration"""
+        return self._conf
+
     @property
     def name(self) -> str:
         """Component name"""
         return self._name
 
+    @property
+    def tags(self) -> list[str]:
+        """Component tags"""
+        return self._tags
+
+    @property
+    def group(self) -> str | None:
+        """Replicated component's group name (``None`` if not replicated)"""
+        return self._group
+
     @property
     def delay(self) -> float:
         """Delay in seconds"""
@@ -86,6 +491,28 @@ class Component(aio.Resource):
         """Revive component"""
         return self._revive
 
+    @property
+    def started(self) -> bool:
+        """Started flag
+
+        Started flag is initially set to auto start and changed by each
+        start, stop and restart request.
+
+        """
+        return self._started
+
+    @property
+    def pids(self) -> list[int]:
+        """Process IDs of all component's processes
+
+        During overlapping restart, this list contains both previous and
+        new process ID (previous process ID is listed first).
+
+        """
+        return [process.pid
+                for process in (self._previous_process, self._process)
+                if process]
+
     def register_change_cb(self,
                            cb: Callable[[], None]
                            ) -> util.RegisterCallbackHandle:
@@ -98,6 +525,27 @@ class Component(aio.Resource):
         """
         return self._change_cbs.register(cb)
 
+    def register_started_cb(self,
+                            cb: Callable[[], None]
+                            ) -> util.RegisterCallbackHandle:
+        """Register started callback
+
+        Registered callbacks are called after started flag changes.
+
+        """
+        return self._started_cbs.register(cb)
+
+    def register_output_cb(self,
+                           cb: Callable[[str], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register output callback
+
+        Registered callback is called with each line read from process's
+        captured output.
+
+        """
+        return self._output_cbs.register(cb)
+
     def set_revive(self, revive: bool):
         """Set revive flag"""
         if revive == self.revive:
@@ -109,74 +557,136 @@ class Component(aio.Resource):
 
     def start(self):
         """Start component"""
+        if (self._queued_time is None and
+                self._status in (Status.STOPPED, Status.DELAYED,
+                                 Status.STOPPING)):
+            self._queued_time = time.monotonic()
         self._started_queue.put_nowait(True)
+        self._set_started(True)
 
     def stop(self):
         """Stop component"""
+        self._restart_requested = False
+        if not self.revive:
+            self._queued_time = None
         self._started_queue.put_nowait(False)
+        self._set_started(False)
+
+    def restart(self):
+        """Restart component
+
+        If component is running, its process is stopped and new process is
+        started. Otherwise, this action is equivalent to `start`.
+
+        If overlapping restart is configured, new process is started before
+        running process is stopped. Running process is stopped only after
+        new process is created - if new process is not created in overlap
+        timeout, restart is canceled and running process is not stopped.
+
+        """
+        if self._queued_time is None:
+            self._queued_time = time.monotonic()
+        self._restart_requested = True
+        self._started_queue.put_nowait(True)
+        self._set_started(True)
+
+    def detach(self):
+        """Close component without stopping its processes
+
+        Component's processes are detached (see
+        `hat.orchestrator.process.Process.detach`) and their execution
+        continues after component is closed.
+
+        """
+        self._detached = True
+        self.close()
 
     async def _run_loop(self):
-        process = None
+        process = self._adopted_process
+        self._adopted_process = None
+        watchdog_future = None
 
         try:
-            started = self._auto_start
-            if self._delay:
+            # start and stop requests preceding run loop are included in
+            # started flag
+            started = self._started
+            if self._delay and not process:
                 with contextlib.suppress(asyncio.TimeoutError):
                     started = await aio.wait_for(
                         self._started_queue.get_until_empty(), self._delay)
             self._started_queue.put_nowait(started)
 
-            while True:
-                await asyncio.sleep(self._start_delay)
+            if process:
+                mlog.info("component %s (%s) adopted", self.name, process.pid)
 
-                started = False
-                while not (started or self.revive):
-                    started = await self._started_queue.get_until_empty()
-                    if not started:
+            while True:
+                if not process:
+                    await asyncio.sleep(self._start_delay)
+
+                    started = self._restart_requested
+                    while not (started or self.revive):
+                        started = await self._started_queue.get_until_empty()
+                        if not started:
+                            self._set_status(Status.STOPPED)
+
+                    try:
+                        self._restart_requested = False
+                        now = time.monotonic()
+                        self._lifecycle = {
+                            'queued': self._queued_time or now,
+                            'spawning': now}
+                        self._queued_time = None
+                        self._set_status(Status.STARTING)
+                        process = await aio.wait_for(self._start_process(),
+                                                     self._create_timeout)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        mlog.warning("error starting component %s: %s",
+                                     self.name, e, exc_info=e)
                         self._set_status(Status.STOPPED)
+                        continue
 
                 try:
-                    self._set_status(Status.STARTING)
-                    process = await aio.wait_for(self._start_process(),
-                                                 self._create_timeout)
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    mlog.warning("error starting component %s: %s",
-                                 self.name, e, exc_info=e)
-                    self._set_status(Status.STOPPED)
-                    continue
-
-                try:
+                    self._lifecycle['ready'] = time.monotonic()
+                    self._observe_latencies(self._lifecycle, [
+                        ('queue', 'queued', 'spawning'),
+                        ('spawn', 'spawning', 'spawned'),
+                        ('ready', 'spawned', 'ready')])
                     self._set_status(Status.RUNNING)
-                    started = True
-
-                    if self._capture_output:
-                        closing_future = self._async_group.spawn(
-                            aio.call_on_done,
-                            self._async_group.spawn(self._read_stdout,
-                                                    process),
-                            process.wait_closing)
-
-                    else:
-                        closing_future = self._async_group.spawn(
-                            process.wait_closing)
-
-                    async with self._async_group.create_subgroup() as subgroup:
-                        while started:
-                            started_future = subgroup.spawn(
-                                self._started_queue.get_until_empty)
-                            await asyncio.wait(
-                                [started_future, closing_future],
-                                return_when=asyncio.FIRST_COMPLETED)
-                            if not started_future.done():
-                                break
-                            started = started_future.result()
+
+                    if self._watchdog_timeout is not None:
+                        watchdog_future = self._async_group.spawn(
+                            self._watchdog_loop)
+
+                    closing_future = self._spawn_closing_future(process)
+                    while True:
+                        started = await self._wait_started(closing_future)
+
+                        if not (started and
+                                self._restart_requested and
+                                self._overlap_restart and
+                                not closing_future.done()):
+                            break
+
+                        new_process = await self._start_overlapping(process)
+                        if not new_process:
+                            continue
+
+                        process = new_process
+                        closing_future = self._spawn_closing_future(process)
+                        await self._stop_previous_process()
 
                 finally:
+                    if watchdog_future:
+                        watchdog_future.cancel()
+                        watchdog_future = None
+
                     self._set_status(Status.STOPPING)
                     await self._stop_process(process)
                     process = None
+                    if self.revive and self._queued_time is None:
+                        self._queued_time = time.monotonic()
                     self._set_status(Status.STOPPED)
 
         except asyncio.CancelledError:
@@ -187,12 +697,111 @@ class Component(aio.Resource):
                        self.name, e, exc_info=e)
 
         finally:
+            if self._previous_process:
+                await aio.uncancellable(self._stop_previous_process(),
+                                        raise_cancel=False)
             if process:
                 await aio.uncancellable(self._stop_process(process),
                                         raise_cancel=False)
             self._set_status(Status.STOPPED)
             self._async_group.close()
 
+    async def _on_demand_loop(self):
+        active_statuses = {Status.STARTING, Status.RUNNING}
+
+        while True:
+            while self._status not in active_statuses:
+                if not await self._wait_event(connection=True):
+                    continue
+
+                mlog.info("starting on demand component %s", self.name)
+                self.start()
+
+                while self._status not in active_statuses:
+                    await self._wait_event(connection=False)
+
+            last_connection_time = time.monotonic()
+
+            while self._status in active_statuses:
+                timeout = None
+                if self._idle_timeout is not None:
+                    timeout = (last_connection_time + self._idle_timeout -
+                               time.monotonic())
+
+                if timeout is not None and timeout <= 0:
+                    mlog.info("stopping idle component %s", self.name)
+                    self.stop()
+
+                    while self._status in active_statuses:
+                        await self._wait_event(connection=False)
+                    break
+
+                if await self._wait_event(connection=True, timeout=timeout):
+                    last_connection_time = time.monotonic()
+
+                    # without edge triggered notifications, listening
+                    # socket is readable until connection is accepted by
+                    # process
+                    if not self._epoll:
+                        await asyncio.sleep(_connection_poll_delay)
+
+    async def _watchdog_loop(self):
+        # heartbeats only update watchdog time which is checked once per
+        # timeout period
+        if self._watchdog_time is None:
+            self._watchdog_time = time.monotonic()
+
+        while True:
+            timeout = (self._watchdog_time + self._watchdog_timeout -
+                       time.monotonic())
+            if timeout > 0:
+                await asyncio.sleep(timeout)
+                continue
+
+            mlog.warning("component %s (%s) watchdog timeout",
+                         self.name, self.pid)
+            self.restart()
+            return
+
+    async def _wait_event(self, connection, timeout=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def on_event(is_connection):
+            if future.done():
+                return
+
+            if is_connection and self._epoll:
+                # edge triggered events are consumed, so epoll is readable
+                # again only after new incoming connection
+                self._epoll.poll(0)
+
+            future.set_result(is_connection)
+
+        if not connection:
+            fds = []
+        elif self._epoll:
+            fds = [self._epoll.fileno()]
+        else:
+            fds = [sock.fileno() for sock in self._sockets]
+
+        for fd in fds:
+            loop.add_reader(fd, on_event, True)
+
+        try:
+            with self.register_change_cb(lambda: on_event(False)):
+                if timeout is None:
+                    return await future
+
+                return await aio.wait_for(future, timeout)
+
+        except asyncio.TimeoutError:
+            return False
+
+        finally:
+            for fd in fds:
+                loop.remove_reader(fd)
+
     def _set_status(self, status):
         if status == self.status:
             return
@@ -201,42 +810,133 @@ class Component(aio.Resource):
         self._status = status
         self._change_cbs.notify()
 
+    def _set_started(self, started):
+        if started == self._started:
+            return
+        self._started = started
+        self._started_cbs.notify()
+
+    def _close_sockets(self):
+        if self._epoll:
+            self._epoll.close()
+            self._epoll = None
+
+        for sock in self._sockets:
+            hat.orchestrator.sockets.close_socket(sock)
+        self._sockets = []
+
+    def _spawn_closing_future(self, process):
+        if not self._capture_output:
+            return self._async_group.spawn(process.wait_closing)
+
+        return self._async_group.spawn(
+            aio.call_on_done,
+            self._async_group.spawn(self._read_stdout, process),
+            process.wait_closing)
+
+    async def _wait_started(self, closing_future):
+        started = True
+
+        async with self._async_group.create_subgroup() as subgroup:
+            while started:
+                started_future = subgroup.spawn(
+                    self._started_queue.get_until_empty)
+                await asyncio.wait([started_future, closing_future],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if not started_future.done():
+                    break
+                started = started_future.result()
+                if self._restart_requested:
+                    break
+
+        return started
+
+    async def _start_overlapping(self, process):
+        self._restart_requested = False
+        lifecycle = self._lifecycle
+        now = time.monotonic()
+        self._lifecycle = {'queued': self._queued_time or now,
+                           'spawning': now}
+        self._queued_time = None
+        self._set_status(Status.STARTING)
+
+        process_state = (self._process, self._process_start_time,
+                         self._start_count, self._ready, self._status_text,
+                         self._watchdog_time)
+        new_process = None
+
+        try:
+            new_process = await aio.wait_for(self._start_process(),
+                                             self._overlap_timeout)
+
+            # previous process is stopped only after new process reports
+            # readiness
+            if self._notify_ready:
+                await aio.wait_for(
+                    self._wait_process_ready(),
+                    max(now + self._overlap_timeout - time.monotonic(), 0))
+
+        except asyncio.CancelledError:
+            if new_process:
+                await aio.uncancellable(
+                    self._stop_process(new_process, self._lifecycle),
+                    raise_cancel=False)
+            raise
+
+        except Exception as e:
+            mlog.warning("error starting component %s during overlapping "
+                         "restart: %s", self.name, e, exc_info=e)
+
+            if new_process:
+                new_lifecycle = self._lifecycle
+                (self._process, self._process_start_time,
+                 self._start_count, self._ready, self._status_text,
+                 self._watchdog_time) = process_state
+                await self._stop_process(new_process, new_lifecycle)
+
+            self._lifecycle = lifecycle
+            self._set_status(Status.RUNNING)
+            return
+
+        self._previous_process = process
+        self._previous_lifecycle = lifecycle
+        self._lifecycle['ready'] = time.monotonic()
+        self._observe_latencies(self._lifecycle, [
+            ('queue', 'queued', 'spawning'),
+            ('spawn', 'spawning', 'spawned'),
+            ('ready', 'spawned', 'ready')])
+        self._set_status(Status.RUNNING)
+
+        return new_process
+
+    async def _wait_process_ready(self):
+        changes = aio.Queue()
+        with self._change_cbs.register(lambda: changes.put_nowait(None)):
+            while not self._ready:
+                await changes.get()
+
+    async def _stop_previous_process(self):
+        await self._stop_process(self._previous_process,
+                                 self._previous_lifecycle)
+        self._previous_process = None
+        self._previous_lifecycle = None
+        self._change_cbs.notify()
+
     async def _start_process(self):
-        process = await hat.orchestrator.process.create_process(
-            args=self._args,
-            inherit_stdin=not self._stdin,
-            capture_output=self._capture_output,
-            sigint_timeout=self._sigint_timeout,
-            sigkill_timeout=self._sigkill_timeout)
-        if self._win32_job:
-            self._win32_job.add_process(process)
-        mlog.info("component %s (%s) started", self.name, process.pid)
+        return await super()._start_process(
+            pass_fds=[sock.fileno() for sock in self._sockets])
 
-        if self._stdin:
-            mlog.info("writing stdin for component %s (%s)",
-                      self.name, process.pid)
-            process.write(self._stdin)
+    async def _stop_process(self, process, lifecycle=None):
+        if lifecycle is None:
+            lifecycle = self._lifecycle
+            self._lifecycle = {}
 
-        return process
+        lifecycle.setdefault('stop_requested', time.monotonic())
+        if self._detached:
+            process.detach()
+            await process.wait_closed()
 
-    async def _stop_process(self, process):
-        await process.async_close()
-        if process.returncode is None:
-            mlog.info("component %s (%s) failed to stop",
-                      self.name, process.pid)
         else:
-            mlog.info("component %s (%s) stopped with return code %s",
-                      self.name, process.pid, process.returncode)
+            await process.async_close()
 
-    async def _read_stdout(self, process):
-        try:
-            while True:
-                line = await process.readline()
-                mlog.info("component %s (%s) stdout: %s",
-                          self.name, process.pid, line)
-                now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                print(f"[{now} {self.name} ({process.pid})] {line}")
-
-        except ConnectionError:
-            mlog.debug("component %s (%s) stdout closed",
-                       self.name, process.pid)
+        self._process_stopped(process, lifecycle)
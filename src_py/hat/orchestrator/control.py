@@ -0,0 +1,329 @@
+"""Local control interface
+
+Control interface is based on unix domain socket. Communication is based on
+line-delimited JSON messages - each message is JSON object encoded as single
+UTF-8 line terminated with ``\\n``.
+
+Client sends request messages defined by
+``hat-orchestrator://control.yaml#/$defs/request`` and server responds to
+each request with single response message defined by
+``hat-orchestrator://control.yaml#/$defs/response``. Requests are processed
+sequentially in order of their arrival.
+
+After successful response to ``tail`` request, server continuously sends
+output messages defined by ``hat-orchestrator://control.yaml#/$defs/output``
+until connection is closed.
+
+"""
+
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+
+from hat import aio
+from hat import json
+
+import hat.orchestrator.common
+import hat.orchestrator.component
+import hat.orchestrator.event_log
+import hat.orchestrator.profiler
+import hat.orchestrator.registry
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+tail_queue_size: int = 1024
+"""Maximum number of buffered output lines per tail connection"""
+
+
+async def listen(path: Path,
+                 components: dict[int, hat.orchestrator.component.Component],
+                 event_log: hat.orchestrator.event_log.EventLog | None = None,
+                 profiler: hat.orchestrator.profiler.Profiler | None = None,
+                 reload_cb: Callable[[], Awaitable[json.Data]] | None = None,
+                 registry: hat.orchestrator.registry.Registry | None = None,
+                 detach_cb: Callable[[], Awaitable[None]] | None = None
+                 ) -> 'Server':
+    """Create control server listening on unix domain socket
+
+    Components are identified by their keys in `components`. If `reload_cb`
+    is provided, ``reload`` requests are processed by awaiting its result.
+    If `registry` is provided, components can be added and removed. If
+    `detach_cb` is provided, ``detach`` requests are processed by awaiting
+    its result.
+
+    """
+    server = Server()
+    server._path = path
+    server._components = components
+    server._event_log = event_log
+    server._profiler = profiler
+    server._reload_cb = reload_cb
+    server._registry = registry
+    server._detach_cb = detach_cb
+    server._async_group = aio.Group()
+
+    with contextlib.suppress(FileNotFoundError):
+        if path.is_socket():
+            path.unlink()
+
+    server._srv = await asyncio.start_unix_server(server._on_connection,
+                                                  str(path))
+
+    server.async_group.spawn(aio.call_on_cancel, server._on_close)
+
+    return server
+
+
+class Server(aio.Resource):
+    """Control server
+
+    For creating new instance of this class see `listen` coroutine.
+
+    """
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    async def _on_close(self):
+        self._srv.close()
+
+        with contextlib.suppress(FileNotFoundError):
+            self._path.unlink()
+
+        await self._srv.wait_closed()
+
+    def _on_connection(self, reader, writer):
+        try:
+            self.async_group.spawn(self._connection_loop, reader, writer)
+
+        except Exception:
+            writer.close()
+
+    async def _connection_loop(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    req = json.decode(line.decode('utf-8'))
+                    name, data = req['name'], req.get('data')
+
+                except Exception as e:
+                    mlog.warning("invalid request: %s", e, exc_info=e)
+                    name, data = None, None
+                    res = {'success': False,
+                           'data': f'invalid request: {e}'}
+
+                else:
+                    res = await self._process_request(name, data)
+
+                writer.write(_encode_msg(res))
+                await writer.drain()
+
+                if name == 'tail' and res['success']:
+                    await self._tail(reader, writer, data)
+                    break
+
+        except ConnectionError:
+            pass
+
+        except Exception as e:
+            mlog.error("connection loop error: %s", e, exc_info=e)
+
+        finally:
+            writer.close()
+
+    async def _process_request(self, name, data):
+        try:
+            if name == 'status':
+                result = self._get_status(data)
+
+            elif name == 'profile':
+                result = await self._get_profiler().profile(
+                    data.get('duration', 10) if data else 10)
+
+            elif name == 'tracemalloc':
+                result = await self._process_tracemalloc(data)
+
+            elif name == 'reload':
+                if self._reload_cb is None:
+                    raise Exception('reload not available')
+                result = await self._reload_cb()
+
+            elif name == 'detach':
+                if self._detach_cb is None:
+                    raise Exception('detach not available')
+                await self._detach_cb()
+                result = None
+
+            elif name == 'rolling_restart':
+                await hat.orchestrator.common.rolling_restart(
+                    self._components, data)
+                result = None
+
+            elif name in hat.orchestrator.common.registry_actions:
+                result = await hat.orchestrator.common.control_registry(
+                    self._registry, name, data)
+
+            elif name == 'events':
+                result = hat.orchestrator.common.get_events(self._event_log,
+                                                            data)
+
+            elif name == 'tail':
+                hat.orchestrator.common.select_components(
+                    self._components, _get_selector(data))
+                result = None
+
+            else:
+                hat.orchestrator.common.control_components(self._components,
+                                                           name, data)
+                result = None
+
+            return {'success': True,
+                    'data': result}
+
+        except Exception as e:
+            return {'success': False,
+                    'data': str(e)}
+
+    async def _process_tracemalloc(self, data):
+        profiler = self._get_profiler()
+        action = data['action']
+
+        if action == 'start':
+            profiler.start_tracemalloc(data.get('frames', 1))
+
+        elif action == 'stop':
+            profiler.stop_tracemalloc()
+
+        elif action == 'snapshot':
+            return await profiler.take_snapshot()
+
+        else:
+            raise Exception(f'invalid tracemalloc action {action}')
+
+    def _get_profiler(self):
+        if self._profiler is None:
+            raise Exception('profiling not available')
+
+        return self._profiler
+
+    def _get_status(self, selector):
+        selected = set(hat.orchestrator.common.select_components(
+            self._components, _get_selector(selector)))
+
+        return [hat.orchestrator.common.get_component_info(component_id,
+                                                           component)
+                for component_id, component in self._components.items()
+                if component in selected]
+
+    async def _tail(self, reader, writer, selector):
+        queue = aio.Queue(tail_queue_size)
+
+        def on_output(component, line):
+            with contextlib.suppress(aio.QueueFullError):
+                queue.put_nowait({'component': component.name,
+                                  'line': line})
+
+        selected = hat.orchestrator.common.select_components(
+            self._components, _get_selector(selector))
+
+        with contextlib.ExitStack() as exit_stack:
+            for component in selected:
+                exit_stack.enter_context(component.register_output_cb(
+                    lambda line, component=component: on_output(component,
+                                                                line)))
+
+            async with self.async_group.create_subgroup() as subgroup:
+                subgroup.spawn(aio.call_on_done, reader.read(), queue.close)
+
+                with contextlib.suppress(aio.QueueClosedError):
+                    while True:
+                        msg = await queue.get()
+                        writer.write(_encode_msg(msg))
+                        await writer.drain()
+
+
+def call(path: Path,
+         name: str,
+         data: json.Data = None,
+         timeout: float | None = 5
+         ) -> json.Data:
+    """Send single request and return response data
+
+    This is blocking function, intended for usage by command line clients.
+
+    Raises:
+        ConnectionError
+        Exception: unsuccessful response
+
+    """
+    with _connect(path, timeout) as (sock, f):
+        sock.sendall(_encode_msg({'name': name, 'data': data}))
+        return _read_response(f)
+
+
+def tail(path: Path,
+         data: json.Data = None
+         ) -> Iterable[json.Data]:
+    """Read output lines of selected components
+
+    This is blocking generator yielding data defined by
+    ``hat-orchestrator://control.yaml#/$defs/output``.
+
+    Raises:
+        ConnectionError
+        Exception: unsuccessful response
+
+    """
+    with _connect(path, None) as (sock, f):
+        sock.sendall(_encode_msg({'name': 'tail', 'data': data}))
+        _read_response(f)
+
+        for line in f:
+            yield json.decode(line.decode('utf-8'))
+
+
+@contextlib.contextmanager
+def _connect(path, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+
+        try:
+            sock.connect(os.fspath(path))
+
+        except OSError as e:
+            raise ConnectionError(str(e)) from e
+
+        with sock.makefile('rb') as f:
+            yield sock, f
+
+
+def _get_selector(selector):
+    return selector if selector is not None else {'names': ['*']}
+
+
+def _read_response(f):
+    line = f.readline()
+    if not line:
+        raise ConnectionError('connection closed')
+
+    res = json.decode(line.decode('utf-8'))
+    if not res['success']:
+        raise Exception(res['data'])
+
+    return res['data']
+
+
+def _encode_msg(msg):
+    return (json.encode(msg) + '\n').encode('utf-8')
@@ -0,0 +1,684 @@
+"""Compact supervision engine
+
+Alternative to `hat.orchestrator.component.Component` intended for very
+large number of components. Instead of each component running its own
+tasks (run loop, started queue readers, output reader, ...), all
+components are state machines driven by single dispatcher task of
+`Engine`. Dispatcher processes event queue (requests and process
+notifications) and timer heap (delay and start delay). Only process
+creation, output reading and process closing are executed by single task
+per running process.
+
+Compact components (`CompactComponent`) provide the same interface and the
+same status transitions as `hat.orchestrator.component.Component`.
+Listening sockets (including on demand components), overlapping restart
+and adopted processes are not supported (see `is_supported`).
+
+"""
+
+from collections.abc import Callable
+import asyncio
+import collections
+import enum
+import heapq
+import itertools
+import logging
+import time
+
+from hat import aio
+from hat import json
+from hat import util
+
+import hat.orchestrator.component
+import hat.orchestrator.histogram
+import hat.orchestrator.process
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+Status = hat.orchestrator.component.Status
+
+
+def is_supported(conf: json.Data) -> bool:
+    """Check if component configuration is supported by compact engine"""
+    return not (conf.get('sockets') or
+                conf.get('on_demand', False) or
+                conf.get('overlap_restart', False))
+
+
+class Engine(aio.Resource):
+    """Compact supervision engine
+
+    Closing engine closes all its components.
+
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._components = set()
+        self._events = collections.deque()
+        self._timers = []
+        self._next_timer_ids = itertools.count()
+        self._wakeup = None
+        self._process_group = aio.Group()
+        self._async_group = aio.Group()
+
+        self._async_group.spawn(self._dispatch_loop)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def component_count(self) -> int:
+        """Number of open components"""
+        return len(self._components)
+
+    def create_component(self,
+                         conf: json.Data,
+                         win32_job: (hat.orchestrator.process.Win32Job |
+                                     None) = None,
+                         create_process: hat.orchestrator.process.CreateProcessCb = (  # NOQA
+                             hat.orchestrator.process.create_process),
+                         revive: bool | None = None,
+                         started: bool | None = None,
+                         env: dict[str, str] | None = None
+                         ) -> 'CompactComponent':
+        """Create component
+
+        Arguments have the same meaning as arguments of
+        `hat.orchestrator.component.Component`.
+
+        Raises:
+            ValueError: configuration not supported by compact engine
+
+        """
+        if not self.is_open:
+            raise Exception('engine closed')
+
+        if not is_supported(conf):
+            raise ValueError('configuration not supported by compact engine')
+
+        component = CompactComponent(self, conf, win32_job, create_process,
+                                     revive, started, env)
+        self._components.add(component)
+        self._post(self._on_init, component)
+
+        return component
+
+    def _post(self, fn, *args):
+        self._events.append((fn, args))
+        if self._wakeup and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def _set_timer(self, component, delay, fn):
+        timer_id = next(self._next_timer_ids)
+        component._timer_id = timer_id
+        heapq.heappush(self._timers, (self._loop.time() + delay, timer_id,
+                                      component, fn))
+
+        if self._wakeup and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def _cancel_timer(self, component):
+        # canceled timers are removed from heap once they expire
+        component._timer_id = None
+
+    async def _dispatch_loop(self):
+        try:
+            await self._dispatch(lambda: False)
+
+        finally:
+            for component in list(self._components):
+                component.close()
+
+            await aio.uncancellable(
+                self._dispatch(lambda: not self._components),
+                raise_cancel=False)
+            await aio.uncancellable(self._process_group.async_close(),
+                                    raise_cancel=False)
+
+    async def _dispatch(self, done_cb):
+        while True:
+            self._process_events()
+            if done_cb():
+                return
+
+            self._wakeup = self._loop.create_future()
+            handle = (self._loop.call_at(self._timers[0][0],
+                                         _set_future_result, self._wakeup)
+                      if self._timers else None)
+
+            try:
+                await self._wakeup
+
+            finally:
+                self._wakeup = None
+                if handle:
+                    handle.cancel()
+
+    def _process_events(self):
+        while True:
+            now = self._loop.time()
+            while self._timers and self._timers[0][0] <= now:
+                _, timer_id, component, fn = heapq.heappop(self._timers)
+                if component._timer_id != timer_id:
+                    continue
+
+                component._timer_id = None
+                self._call(fn, component)
+
+            if not self._events:
+                break
+
+            while self._events:
+                fn, args = self._events.popleft()
+                self._call(fn, *args)
+
+    def _call(self, fn, component, *args):
+        try:
+            fn(component, *args)
+
+        except Exception as e:
+            mlog.error("component %s dispatch error: %s",
+                       component.name, e, exc_info=e)
+            component.close()
+
+    def _on_init(self, component):
+        if component._closing:
+            return
+
+        # start and stop requests preceding initialization are included in
+        # started flag
+        if component.delay:
+            component._phase = _Phase.DELAY
+            if component._pending is None:
+                self._set_timer(component, component.delay,
+                                self._on_delay_timeout)
+                return
+
+        else:
+            component._pending = component._started
+
+        self._wait_start_delay(component)
+
+    def _on_delay_timeout(self, component):
+        component._pending = component._started
+        self._wait_start_delay(component)
+
+    def _on_request(self, component):
+        if component._closing:
+            return
+
+        if component._phase == _Phase.DELAY:
+            if component._pending is not None:
+                self._cancel_timer(component)
+                self._wait_start_delay(component)
+
+        elif component._phase == _Phase.IDLE:
+            self._wait_started(component, False)
+
+        elif component._phase == _Phase.RUNNING:
+            self._check_running(component)
+
+    def _wait_start_delay(self, component):
+        component._phase = _Phase.START_DELAY
+        self._set_timer(component, component._conf.get('start_delay', 0.5),
+                        self._on_start_delay_timeout)
+
+    def _on_start_delay_timeout(self, component):
+        self._wait_started(component, component._restart_requested)
+
+    def _wait_started(self, component, started):
+        while not (started or component._revive):
+            if component._pending is None:
+                component._phase = _Phase.IDLE
+                return
+
+            started, component._pending = component._pending, None
+            if not started:
+                component._set_status(Status.STOPPED)
+
+        component._restart_requested = False
+        now = time.monotonic()
+        component._lifecycle = {'queued': component._queued_time or now,
+                                'spawning': now}
+        component._queued_time = None
+        component._set_status(Status.STARTING)
+
+        component._phase = _Phase.STARTING
+        component._task = self._process_group.spawn(self._process_loop,
+                                                    component)
+
+    def _on_create_error(self, component, e):
+        if component._phase != _Phase.STARTING:
+            return
+
+        mlog.warning("error starting component %s: %s",
+                     component.name, e, exc_info=e)
+        component._task = None
+        component._set_status(Status.STOPPED)
+
+        if component._closing:
+            self._finish_close(component)
+
+        else:
+            self._wait_start_delay(component)
+
+    def _on_created(self, component):
+        if component._phase != _Phase.STARTING:
+            return
+
+        component._lifecycle['ready'] = time.monotonic()
+        component._observe_latencies(component._lifecycle, [
+            ('queue', 'queued', 'spawning'),
+            ('spawn', 'spawning', 'spawned'),
+            ('ready', 'spawned', 'ready')])
+        component._set_status(Status.RUNNING)
+
+        component._phase = _Phase.RUNNING
+        self._check_running(component)
+
+        watchdog_timeout = component._conf.get('watchdog_timeout')
+        if (watchdog_timeout is not None and
+                component._phase == _Phase.RUNNING):
+            self._set_timer(component, watchdog_timeout,
+                            self._on_watchdog_timeout)
+
+    def _check_running(self, component):
+        if component._pending is None:
+            return
+
+        started, component._pending = component._pending, None
+        if started and not component._restart_requested:
+            return
+
+        self._stop(component)
+
+    def _on_watchdog_timeout(self, component):
+        # heartbeats only update watchdog time which is checked once per
+        # timeout period
+        timeout = (component._watchdog_time +
+                   component._conf['watchdog_timeout'] - time.monotonic())
+        if timeout > 0:
+            self._set_timer(component, timeout, self._on_watchdog_timeout)
+            return
+
+        mlog.warning("component %s (%s) watchdog timeout",
+                     component.name, component.pid)
+        component.restart()
+
+    def _on_process_closing(self, component):
+        if component._phase == _Phase.RUNNING:
+            self._stop(component)
+
+    def _stop(self, component):
+        self._cancel_timer(component)
+        component._set_status(Status.STOPPING)
+        component._phase = _Phase.STOPPING
+
+        process = component._process
+        component._lifecycle.setdefault('stop_requested', time.monotonic())
+        if component._detached:
+            process.detach()
+
+        else:
+            process.close()
+
+    def _on_process_closed(self, component):
+        component._task = None
+        component._on_process_closed()
+
+        if component._revive and component._queued_time is None:
+            component._queued_time = time.monotonic()
+        component._set_status(Status.STOPPED)
+
+        if component._closing:
+            self._finish_close(component)
+
+        else:
+            self._wait_start_delay(component)
+
+    def _on_close_request(self, component):
+        if component._phase == _Phase.CLOSED:
+            return
+
+        if component._phase in (_Phase.RUNNING, _Phase.STOPPING):
+            if component._phase == _Phase.RUNNING:
+                self._stop(component)
+            return
+
+        if component._phase == _Phase.STARTING:
+            if component._process:
+                self._stop(component)
+                return
+
+            component._task.cancel()
+            component._task = None
+
+        self._cancel_timer(component)
+        component._set_status(Status.STOPPED)
+        self._finish_close(component)
+
+    def _finish_close(self, component):
+        component._phase = _Phase.CLOSED
+        self._components.discard(component)
+        component._set_closed()
+
+    async def _process_loop(self, component):
+        try:
+            process = await aio.wait_for(
+                component._start_process(),
+                component._conf.get('create_timeout', 2))
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            self._post(self._on_create_error, component, e)
+            return
+
+        self._post(self._on_created, component)
+
+        try:
+            if component._conf.get('capture_output', True):
+                await component._read_stdout(process)
+
+            await process.wait_closing()
+            self._post(self._on_process_closing, component)
+
+        finally:
+            await aio.uncancellable(process.wait_closed())
+            self._post(self._on_process_closed, component)
+
+
+class CompactComponent(hat.orchestrator.component.ProcessMixin):
+    """Component supervised by compact engine
+
+    Provides the same interface as `hat.orchestrator.component.Component`
+    (`aio.Resource` interface is implemented without dedicated async group
+    - `async_group` is created only if accessed). For creating new
+    instance of this class see `Engine.create_component`.
+
+    """
+
+    __slots__ = ('_engine', '_conf', '_win32_job', '_create_process',
+                 '_revive', '_started', '_status', '_pending',
+                 '_restart_requested', '_detached', '_phase', '_timer_id',
+                 '_task', '_returncode', '_process', '_process_start_time',
+                 '_start_count', '_output_lines', '_output_bytes',
+                 '_dropped_lines', '_latencies', '_queued_time',
+                 '_lifecycle', '_last_lifecycle', '_change_cbs',
+                 '_started_cbs', '_output_cbs', '_closing', '_closed',
+                 '_close_futures', '_async_group', '_env', '_ready',
+                 '_status_text', '_watchdog_time')
+
+    def __init__(self, engine, conf, win32_job, create_process, revive,
+                 started, env):
+        auto_start = (conf.get('auto_start', True) if started is None
+                      else started)
+
+        self._engine = engine
+        self._conf = conf
+        self._win32_job = win32_job
+        self._create_process = create_process
+        self._revive = (conf.get('revive', False) if revive is None
+                        else revive)
+        self._started = bool(auto_start)
+        self._status = (Status.DELAYED if conf.get('delay', 0)
+                        else Status.STOPPED)
+        self._pending = None
+        self._restart_requested = False
+        self._detached = False
+        self._phase = _Phase.INIT
+        self._timer_id = None
+        self._task = None
+        self._lifecycle = None
+        self._change_cbs = None
+        self._started_cbs = None
+        self._output_cbs = None
+        self._closing = False
+        self._closed = False
+        self._close_futures = None
+        self._async_group = None
+        self._queued_time = time.monotonic() if auto_start else None
+        self._init_process(env)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group
+
+        Group is created on first access. Closing group closes component.
+
+        """
+        if self._async_group is None:
+            self._async_group = aio.Group()
+            self._async_group.spawn(aio.call_on_cancel, self.close)
+            if self._closed:
+                self._async_group.close()
+
+        return self._async_group
+
+    @property
+    def is_open(self) -> bool:
+        """``True`` if not closing or closed, ``False`` otherwise"""
+        return not self._closing
+
+    @property
+    def is_closing(self) -> bool:
+        """Is component closing or closed"""
+        return self._closing
+
+    @property
+    def is_closed(self) -> bool:
+        """Is component closed"""
+        return self._closed
+
+    async def wait_closing(self):
+        """Wait until closing is ``True``"""
+        if not self._closing:
+            await self._create_close_future(closed=False)
+
+    async def wait_closed(self):
+        """Wait until closed is ``True``"""
+        if not self._closed:
+            await self._create_close_future(closed=True)
+
+    def close(self):
+        """Close component"""
+        if self._closing:
+            return
+
+        self._closing = True
+        self._resolve_close_futures(closed=False)
+        self._engine._post(self._engine._on_close_request, self)
+
+    async def async_close(self):
+        """Close component and wait until closed is ``True``"""
+        self.close()
+        await self.wait_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.async_close()
+
+    @property
+    def status(self) -> Status:
+        """Current status"""
+        return self._status
+
+    @property
+    def conf(self) -> json.Data:
+        """Component configuration"""
+        return self._conf
+
+    @property
+    def name(self) -> str:
+        """Component name"""
+        return self._conf['name']
+
+    @property
+    def tags(self) -> list[str]:
+        """Component tags"""
+        return self._conf.get('tags', [])
+
+    @property
+    def group(self) -> str | None:
+        """Replicated component's group name (``None`` if not replicated)"""
+        return self._conf.get('group')
+
+    @property
+    def delay(self) -> float:
+        """Delay in seconds"""
+        return self._conf.get('delay', 0)
+
+    @property
+    def revive(self) -> bool:
+        """Revive component"""
+        return self._revive
+
+    @property
+    def started(self) -> bool:
+        """Started flag"""
+        return self._started
+
+    @property
+    def pids(self) -> list[int]:
+        """Process IDs of all component's processes"""
+        return [self._process.pid] if self._process else []
+
+    def register_change_cb(self,
+                           cb: Callable[[], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register change callback"""
+        if self._change_cbs is None:
+            self._change_cbs = util.CallbackRegistry(
+                exception_cb=lambda e: mlog.warning(
+                    "change callback exception: %s", e, exc_info=e))
+        return self._change_cbs.register(cb)
+
+    def register_started_cb(self,
+                            cb: Callable[[], None]
+                            ) -> util.RegisterCallbackHandle:
+        """Register started callback"""
+        if self._started_cbs is None:
+            self._started_cbs = util.CallbackRegistry(
+                exception_cb=lambda e: mlog.warning(
+                    "started callback exception: %s", e, exc_info=e))
+        return self._started_cbs.register(cb)
+
+    def register_output_cb(self,
+                           cb: Callable[[str], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register output callback"""
+        if self._output_cbs is None:
+            self._output_cbs = util.CallbackRegistry(
+                exception_cb=lambda e: mlog.warning(
+                    "output callback exception: %s", e, exc_info=e))
+        return self._output_cbs.register(cb)
+
+    def set_revive(self, revive: bool):
+        """Set revive flag"""
+        if revive == self._revive:
+            return
+        self._revive = revive
+        if revive and self._status != Status.DELAYED:
+            self.start()
+        self._notify_change()
+
+    def start(self):
+        """Start component"""
+        if (self._queued_time is None and
+                self._status in (Status.STOPPED, Status.DELAYED,
+                                 Status.STOPPING)):
+            self._queued_time = time.monotonic()
+        self._request(True)
+
+    def stop(self):
+        """Stop component"""
+        self._restart_requested = False
+        if not self._revive:
+            self._queued_time = None
+        self._request(False)
+
+    def restart(self):
+        """Restart component"""
+        if self._queued_time is None:
+            self._queued_time = time.monotonic()
+        self._restart_requested = True
+        self._request(True)
+
+    def detach(self):
+        """Close component without stopping its processes"""
+        self._detached = True
+        self.close()
+
+    def _request(self, started):
+        self._pending = started
+        self._engine._post(self._engine._on_request, self)
+
+        if started != self._started:
+            self._started = started
+            if self._started_cbs is not None:
+                self._started_cbs.notify()
+
+    def _set_status(self, status):
+        if status == self._status:
+            return
+        mlog.debug("component %s status change: %s -> %s",
+                   self.name, self._status, status)
+        self._status = status
+        self._notify_change()
+
+    def _set_closed(self):
+        self._closed = True
+        self._resolve_close_futures(closed=True)
+        if self._async_group is not None:
+            self._async_group.close()
+
+    def _create_close_future(self, closed):
+        if self._close_futures is None:
+            self._close_futures = []
+
+        future = asyncio.get_running_loop().create_future()
+        self._close_futures.append((closed, future))
+        return future
+
+    def _resolve_close_futures(self, closed):
+        if not self._close_futures:
+            return
+
+        futures, self._close_futures = self._close_futures, []
+        for future_closed, future in futures:
+            if future_closed and not closed:
+                self._close_futures.append((future_closed, future))
+
+            elif not future.done():
+                future.set_result(None)
+
+    def _on_process_closed(self):
+        lifecycle, self._lifecycle = self._lifecycle, None
+        self._process_stopped(self._process, lifecycle)
+
+
+aio.Resource.register(CompactComponent)
+
+
+class _Phase(enum.Enum):
+    INIT = enum.auto()
+    DELAY = enum.auto()
+    START_DELAY = enum.auto()
+    IDLE = enum.auto()
+    STARTING = enum.auto()
+    RUNNING = enum.auto()
+    STOPPING = enum.auto()
+    CLOSED = enum.auto()
+
+
+def _set_future_result(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,125 @@
+"""Component status change event log"""
+
+import time
+import typing
+
+from hat import json
+from hat import util
+
+import hat.orchestrator.component
+
+
+Status = hat.orchestrator.component.Status
+
+
+class Event(typing.NamedTuple):
+    seq: int
+    timestamp: float
+    component_id: int
+    component: str
+    old_status: Status
+    new_status: Status
+    returncode: int | None
+
+
+class EventLog:
+    """Component status change event log
+
+    Event log is bounded ring buffer containing last `size` status change
+    events of all watched components. Each event is identified with
+    monotonically increasing sequence number (first event has sequence
+    number 1).
+
+    """
+
+    def __init__(self, size: int = 1024):
+        if size < 1:
+            raise ValueError('invalid size')
+
+        self._size = size
+        self._events = [None] * size
+        self._last_seq = 0
+
+    @property
+    def size(self) -> int:
+        """Maximum number of stored events"""
+        return self._size
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of last event (``0`` if log is empty)"""
+        return self._last_seq
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of oldest available event"""
+        return max(self._last_seq - self._size, 0) + 1
+
+    def watch(self,
+              component_id: int,
+              component: hat.orchestrator.component.Component
+              ) -> util.RegisterCallbackHandle:
+        """Watch component status changes
+
+        Status changes are logged until returned handle is canceled. Return
+        code is included only in events representing transition from
+        STOPPING to STOPPED (after component's process was stopped).
+
+        """
+        status = component.status
+
+        def on_change():
+            nonlocal status
+            if component.status == status:
+                return
+
+            stopped = (status == Status.STOPPING and
+                       component.status == Status.STOPPED)
+            returncode = component.returncode if stopped else None
+
+            self._add(component_id, component.name, status, component.status,
+                      returncode)
+            status = component.status
+
+        return component.register_change_cb(on_change)
+
+    def get(self, since: int = 0) -> list[Event]:
+        """Get events with sequence number greater than `since`"""
+        start = max(since, self._last_seq - self._size, 0) + 1
+        return [self._events[seq % self._size]
+                for seq in range(start, self._last_seq + 1)]
+
+    def get_data(self, since: int = 0) -> json.Data:
+        """Get events with sequence number greater than `since` as JSON data
+
+        Resulting data is defined by
+        ``hat-orchestrator://juggler.yaml#/$defs/events``.
+
+        """
+        return {'first_seq': self.first_seq,
+                'last_seq': self._last_seq,
+                'lost': since + 1 < self.first_seq,
+                'events': [_event_to_json(event)
+                           for event in self.get(since)]}
+
+    def _add(self, component_id, component, old_status, new_status,
+             returncode):
+        self._last_seq += 1
+        self._events[self._last_seq % self._size] = Event(
+            seq=self._last_seq,
+            timestamp=time.time(),
+            component_id=component_id,
+            component=component,
+            old_status=old_status,
+            new_status=new_status,
+            returncode=returncode)
+
+
+def _event_to_json(event):
+    return {'seq': event.seq,
+            'timestamp': event.timestamp,
+            'component_id': event.component_id,
+            'component': event.component,
+            'old_status': event.old_status.name,
+            'new_status': event.new_status.name,
+            'returncode': event.returncode}
@@ -0,0 +1,64 @@
+"""Incrementally maintained histogram"""
+
+import bisect
+
+
+default_buckets: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025,
+                                      0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+"""Default bucket upper bounds (in seconds)"""
+
+
+class Histogram:
+    """Histogram with fixed buckets
+
+    Each observed value is counted in first bucket with upper bound greater
+    or equal to value. Values greater than all upper bounds are counted only
+    in total count.
+
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = default_buckets):
+        self._buckets = tuple(sorted(buckets))
+        self._counts = [0] * len(self._buckets)
+        self._count = 0
+        self._sum = 0
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        """Bucket upper bounds"""
+        return self._buckets
+
+    @property
+    def count(self) -> int:
+        """Number of observed values"""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """Sum of observed values"""
+        return self._sum
+
+    def copy(self) -> 'Histogram':
+        """Create independent copy of histogram"""
+        histogram = Histogram(self._buckets)
+        histogram._counts = list(self._counts)
+        histogram._count = self._count
+        histogram._sum = self._sum
+        return histogram
+
+    def observe(self, value: float):
+        """Add observed value"""
+        i = bisect.bisect_left(self._buckets, value)
+        if i < len(self._counts):
+            self._counts[i] += 1
+        self._count += 1
+        self._sum += value
+
+    def get_cumulative_counts(self) -> list[int]:
+        """Get cumulative counts associated with each bucket"""
+        result = []
+        count = 0
+        for i in self._counts:
+            count += i
+            result.append(count)
+        return result
@@ -0,0 +1,196 @@
+"""Event loop lag and slow callback monitor
+
+Event loop lag is measured continuously as difference between expected and
+actual wake up time of periodically scheduled sleep.
+
+Slow callbacks are detected by measuring execution duration of each
+`asyncio.Handle` run by event loop. This measurement is enabled only while
+monitor is open and is applicable only to event loops based on
+`asyncio.Handle` (default asyncio event loop implementations).
+
+"""
+
+from collections.abc import Callable
+import asyncio
+import collections
+import logging
+import time
+import typing
+
+from hat import aio
+from hat import json
+from hat import util
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+slow_callbacks_size: int = 20
+"""Number of last slow callbacks available in monitor data"""
+
+
+class SlowCallback(typing.NamedTuple):
+    timestamp: float
+    name: str
+    duration: float
+
+
+class LoopMonitor(aio.Resource):
+    """Event loop monitor
+
+    Only single monitor can be open at the same time.
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/loop_monitor``
+
+    """
+
+    def __init__(self, conf: json.Data):
+        global _active_monitor
+
+        if _active_monitor:
+            raise Exception('loop monitor already active')
+
+        self._interval = conf.get('interval', 0.1)
+        self._threshold = conf.get('threshold', 0.1)
+        self._report_interval = conf.get('report_interval', 10)
+        self._lags = collections.deque(maxlen=conf.get('size', 1000))
+        self._slow_callbacks = collections.deque(maxlen=slow_callbacks_size)
+        self._slow_callback_count = 0
+        self._change_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "change callback exception: %s", e, exc_info=e))
+        self._async_group = aio.Group()
+
+        _active_monitor = self
+        asyncio.Handle._run = _monitored_handle_run
+
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+        self._async_group.spawn(self._lag_loop)
+        self._async_group.spawn(self._report_loop)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def threshold(self) -> float:
+        """Slow callback duration threshold in seconds"""
+        return self._threshold
+
+    @property
+    def slow_callbacks(self) -> list[SlowCallback]:
+        """Last slow callbacks"""
+        return list(self._slow_callbacks)
+
+    @property
+    def slow_callback_count(self) -> int:
+        """Total number of detected slow callbacks"""
+        return self._slow_callback_count
+
+    def register_change_cb(self,
+                           cb: Callable[[], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register change callback
+
+        Registered callbacks are called after each periodic report.
+
+        """
+        return self._change_cbs.register(cb)
+
+    def get_lag_percentiles(self) -> dict[str, float] | None:
+        """Get ``p50``, ``p90``, ``p99`` and ``max`` of measured lags
+
+        Percentiles are calculated from last measured lags. If no lags are
+        measured, ``None`` is returned.
+
+        """
+        if not self._lags:
+            return
+
+        lags = sorted(self._lags)
+        return {'p50': _get_percentile(lags, 50),
+                'p90': _get_percentile(lags, 90),
+                'p99': _get_percentile(lags, 99),
+                'max': lags[-1]}
+
+    def get_data(self) -> json.Data:
+        """Get monitor data
+
+        Resulting data is defined by
+        ``hat-orchestrator://juggler.yaml#/$defs/loop_monitor``.
+
+        """
+        return {'lag': self.get_lag_percentiles(),
+                'slow_callback_count': self._slow_callback_count,
+                'slow_callbacks': [i._asdict() for i in self._slow_callbacks]}
+
+    def _on_close(self):
+        global _active_monitor
+
+        asyncio.Handle._run = _handle_run
+        _active_monitor = None
+
+    def _on_slow_callback(self, handle, duration):
+        name = _get_callback_name(handle._callback)
+        mlog.warning("slow callback %s took %.3f seconds", name, duration)
+
+        self._slow_callbacks.append(SlowCallback(timestamp=time.time(),
+                                                 name=name,
+                                                 duration=duration))
+        self._slow_callback_count += 1
+
+    async def _lag_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._interval)
+            self._lags.append(max(loop.time() - start - self._interval, 0))
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self._report_interval)
+
+            lag = self.get_lag_percentiles()
+            if lag:
+                mlog.info("loop lag p50=%.6f p90=%.6f p99=%.6f max=%.6f; "
+                          "slow callbacks: %s",
+                          lag['p50'], lag['p90'], lag['p99'], lag['max'],
+                          self._slow_callback_count)
+
+            self._change_cbs.notify()
+
+
+_handle_run = asyncio.Handle._run
+_active_monitor = None
+
+
+def _monitored_handle_run(handle):
+    start = time.perf_counter()
+
+    try:
+        return _handle_run(handle)
+
+    finally:
+        duration = time.perf_counter() - start
+        monitor = _active_monitor
+        if monitor and duration >= monitor.threshold:
+            monitor._on_slow_callback(handle, duration)
+
+
+def _get_callback_name(callback):
+    task = getattr(callback, '__self__', None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        return (f"{task.get_name()} "
+                f"({getattr(coro, '__qualname__', repr(coro))})")
+
+    return getattr(callback, '__qualname__', repr(callback))
+
+
+def _get_percentile(sorted_values, percentile):
+    i = max(round(percentile / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[i]
@@ -1,11 +1,15 @@
 """Orchestrator main"""
 
+from collections.abc import Callable
 from pathlib import Path
 import argparse
 import asyncio
 import contextlib
+import datetime
+import functools
 import importlib.resources
 import logging.config
+import signal
 import sys
 
 import appdirs
@@ -13,20 +17,46 @@ import appdirs
 from hat import aio
 from hat import json
 
+import hat.orchestrator.adoption
 import hat.orchestrator.component
+import hat.orchestrator.control
+import hat.orchestrator.engine
+import hat.orchestrator.event_log
+import hat.orchestrator.loop_monitor
+import hat.orchestrator.notify
 import hat.orchestrator.process
-import hat.orchestrator.ui
+import hat.orchestrator.profiler
+import hat.orchestrator.registry
+import hat.orchestrator.shard
+import hat.orchestrator.snapshot
+import hat.orchestrator.zygote
 
 
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
 user_conf_dir: Path = Path(appdirs.user_config_dir('hat'))
 """User configuration directory"""
 
-with importlib.resources.as_file(importlib.resources.files(__package__) /
-                                 'json_schema_repo.json') as _path:
-    json_schema_repo: json.SchemaRepository = json.merge_schema_repositories(
-        json.json_schema_repo,
-        json.decode_file(_path))
-    """JSON schema repository"""
+
+@functools.cache
+def get_json_schema_repo() -> json.SchemaRepository:
+    """Get JSON schema repository
+
+    Repository is loaded on first call and reused afterwards.
+
+    """
+    with importlib.resources.as_file(importlib.resources.files(__package__) /
+                                     'json_schema_repo.json') as path:
+        return json.merge_schema_repositories(json.json_schema_repo,
+                                              json.decode_file(path))
+
+
+def __getattr__(name):
+    if name == 'json_schema_repo':
+        return get_json_schema_repo()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def create_argument_parser() -> argparse.ArgumentParser:
@@ -36,6 +66,65 @@ def create_argument_parser() -> argparse.ArgumentParser:
         '--conf', metavar='PATH', type=Path, default=None,
         help="configuration defined by hat-orchestrator://orchestrator.yaml "
              "(default $XDG_CONFIG_HOME/hat/orchestrator.{yaml|yml|toml|json})")  # NOQA
+    parser.add_argument(
+        '--event-loop', choices=['asyncio', 'uvloop'], default=None,
+        help="event loop implementation (overrides event_loop configuration "
+             "property)")
+
+    subparsers = parser.add_subparsers(dest='action')
+
+    ctl_parser = subparsers.add_parser(
+        'ctl', help="control running orchestrator")
+    ctl_parser.add_argument(
+        '--path', metavar='PATH', type=Path, default=None,
+        help="control socket path (default control path from configuration)")
+    ctl_parser.add_argument(
+        '--id', metavar='ID', type=int, action='append', dest='ids',
+        default=[], help="select component by id")
+    ctl_parser.add_argument(
+        '--tag', metavar='TAG', action='append', dest='tags', default=[],
+        help="select components by tag")
+    ctl_parser.add_argument(
+        '--group', metavar='GROUP', action='append', dest='groups',
+        default=[], help="select replicated component instances by group")
+    ctl_parser.add_argument(
+        '--since', metavar='SEQ', type=int, default=0,
+        help="events sequence number (default 0)")
+    ctl_parser.add_argument(
+        '--value', choices=['true', 'false'], default='true',
+        help="revive value (default true)")
+    ctl_parser.add_argument(
+        '--max-unavailable', metavar='N', type=int, default=1,
+        help="rolling restart batch size (default 1)")
+    ctl_parser.add_argument(
+        '--min-ready', metavar='T', type=float, default=0,
+        help="rolling restart minimum ready duration in seconds "
+             "(default 0)")
+    ctl_parser.add_argument(
+        '--duration', metavar='T', type=float, default=10,
+        help="profiling duration in seconds (default 10)")
+    ctl_parser.add_argument(
+        '--frames', metavar='N', type=int, default=1,
+        help="number of frames traced by tracemalloc (default 1)")
+    ctl_parser.add_argument(
+        '--component', metavar='PATH', type=Path, default=None,
+        help="added component configuration defined by "
+             "hat-orchestrator://orchestrator.yaml#/$defs/component")
+    ctl_parser.add_argument(
+        '--instances', metavar='N', type=int, default=None,
+        help="number of replicated component instances")
+    ctl_parser.add_argument(
+        'command',
+        choices=['status', 'start', 'stop', 'restart', 'rolling-restart',
+                 'revive', 'tail',
+                 'events', 'profile', 'tracemalloc-start', 'tracemalloc-stop',
+                 'tracemalloc-snapshot', 'reload', 'add', 'remove',
+                 'scale', 'detach'],
+        help="control command")
+    ctl_parser.add_argument(
+        'names', metavar='NAME', nargs='*',
+        help="select components by name glob pattern")
+
     return parser
 
 
@@ -43,27 +132,175 @@ def main():
     """Orchestrator"""
     parser = create_argument_parser()
     args = parser.parse_args()
-    conf = json.read_conf(args.conf, user_conf_dir / 'orchestrator')
-    sync_main(conf)
 
+    if args.action == 'ctl':
+        return ctl_main(args)
+
+    read_conf = functools.partial(json.read_conf, args.conf,
+                                  user_conf_dir / 'orchestrator')
+    conf = read_conf()
+    if args.event_loop:
+        conf = {**conf, 'event_loop': args.event_loop}
+
+    sync_main(conf, None if args.conf == Path('-') else read_conf)
+
+
+def ctl_main(args: argparse.Namespace) -> int:
+    """Control client main"""
+    path = args.path
+    if path is None:
+        conf = json.read_conf(args.conf, user_conf_dir / 'orchestrator')
+        if 'control' not in conf:
+            print("control interface not configured", file=sys.stderr)
+            return 1
+        path = Path(conf['control']['path'])
+
+    selector = None
+    if args.ids or args.tags or args.groups or args.names:
+        selector = {'ids': args.ids,
+                    'names': args.names,
+                    'tags': args.tags,
+                    'groups': args.groups}
+
+    elif args.command not in ('status', 'tail', 'events', 'profile',
+                              'tracemalloc-start', 'tracemalloc-stop',
+                              'tracemalloc-snapshot', 'reload', 'add',
+                              'scale', 'detach'):
+        print("components not selected", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == 'status':
+            components = hat.orchestrator.control.call(path, 'status',
+                                                       selector)
+            for component in components:
+                print(f"{component['id']:>4}  {component['status']:<8}  "
+                      f"{'revive' if component['revive'] else '      '}  "
+                      f"{component['name']}")
+
+        elif args.command == 'tail':
+            for output in hat.orchestrator.control.tail(path, selector):
+                print(f"[{output['component']}] {output['line']}",
+                      flush=True)
+
+        elif args.command == 'events':
+            events = hat.orchestrator.control.call(path, 'events',
+                                                   {'since': args.since})
+            if events['lost']:
+                print("events lost", file=sys.stderr)
+            for event in events['events']:
+                timestamp = datetime.datetime.fromtimestamp(
+                    event['timestamp']).isoformat(sep=' ')
+                print(f"{event['seq']:>6}  {timestamp}  "
+                      f"{event['old_status']} -> {event['new_status']}  "
+                      f"{event['component_id']:>4}  {event['component']}"
+                      + (f" ({event['returncode']})"
+                         if event['returncode'] is not None else ''))
+
+        elif args.command == 'profile':
+            result = hat.orchestrator.control.call(
+                path, 'profile', {'duration': args.duration},
+                timeout=args.duration + 5)
+            print(result['stats'])
+            print(result['summary'])
+
+        elif args.command == 'tracemalloc-start':
+            hat.orchestrator.control.call(
+                path, 'tracemalloc', {'action': 'start',
+                                      'frames': args.frames})
+
+        elif args.command == 'tracemalloc-stop':
+            hat.orchestrator.control.call(path, 'tracemalloc',
+                                          {'action': 'stop'})
+
+        elif args.command == 'tracemalloc-snapshot':
+            result = hat.orchestrator.control.call(
+                path, 'tracemalloc', {'action': 'snapshot'}, timeout=None)
+            print(result['snapshot'])
+            print(result['summary'])
+            if result['diff']:
+                print(result['diff'])
 
-def sync_main(conf: json.Data):
-    """Sync main"""
-    aio.init_asyncio()
+        elif args.command == 'add':
+            if args.component is None:
+                print("component configuration not provided",
+                      file=sys.stderr)
+                return 1
 
-    validator = json.DefaultSchemaValidator(json_schema_repo)
-    validator.validate('hat-orchestrator://orchestrator.yaml', conf)
+            component_id = hat.orchestrator.control.call(
+                path, 'add', json.decode_file(args.component))
+            print(component_id)
+
+        elif args.command == 'scale':
+            if len(args.groups) != 1 or args.instances is None:
+                print("single group and number of instances required",
+                      file=sys.stderr)
+                return 1
+
+            hat.orchestrator.control.call(
+                path, 'scale', {'group': args.groups[0],
+                                'instances': args.instances})
+
+        elif args.command == 'reload':
+            result = hat.orchestrator.control.call(path, 'reload',
+                                                   timeout=None)
+            for key in ('added', 'removed', 'changed'):
+                for name in result[key]:
+                    print(f"{key:<8}  {name}")
+
+        elif args.command == 'rolling-restart':
+            hat.orchestrator.control.call(
+                path, 'rolling_restart',
+                dict(selector,
+                     max_unavailable=args.max_unavailable,
+                     min_ready=args.min_ready),
+                timeout=None)
+
+        elif args.command == 'revive':
+            hat.orchestrator.control.call(
+                path, 'revive', dict(selector, value=(args.value == 'true')))
+
+        else:
+            hat.orchestrator.control.call(path, args.command, selector)
+
+    except KeyboardInterrupt:
+        pass
+
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def sync_main(conf: json.Data,
+              read_conf_cb: Callable[[], json.Data] | None = None):
+    """Sync main
+
+    If `read_conf_cb` is provided, configuration can be reloaded.
+
+    """
+    _get_validator().validate('hat-orchestrator://orchestrator.yaml', conf)
 
     log_conf = conf.get('log')
     if log_conf:
         logging.config.dictConfig(log_conf)
 
+    aio.init_asyncio(_get_event_loop_policy(conf.get('event_loop',
+                                                     'asyncio')))
+
     with contextlib.suppress(asyncio.CancelledError):
-        aio.run_asyncio(async_main(conf))
+        aio.run_asyncio(async_main(conf, read_conf_cb))
+
 
+async def async_main(conf: json.Data,
+                     read_conf_cb: Callable[[], json.Data] | None = None):
+    """Async main
 
-async def async_main(conf: json.Data):
-    """Async main"""
+    If `read_conf_cb` is provided, configuration of components is reloaded
+    on SIGHUP signal or control interface request.
+
+    """
     async_group = aio.Group()
     async_group.spawn(aio.call_on_cancel, asyncio.sleep, 0.1)
 
@@ -74,22 +311,149 @@ async def async_main(conf: json.Data):
         else:
             win32_job = None
 
-        components = []
-        for component_conf in conf.get('components', []):
-            component = hat.orchestrator.component.Component(component_conf,
-                                                             win32_job)
-            _bind_resource(async_group, component)
-            components.append(component)
+        loop_monitor = None
+        loop_monitor_conf = conf.get('loop_monitor')
+        if loop_monitor_conf is not None:
+            loop_monitor = hat.orchestrator.loop_monitor.LoopMonitor(
+                loop_monitor_conf)
+            _bind_resource(async_group, loop_monitor)
+
+        event_log = hat.orchestrator.event_log.EventLog(
+            conf.get('event_log_size', 1024))
+
+        adoption = None
+        adopted_processes = {}
+        adoption_conf = conf.get('adoption')
+        if adoption_conf:
+            if sys.platform != 'linux':
+                raise Exception('adoption not supported')
+
+            adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+            _bind_resource(async_group, adoption)
+
+            adopted_processes = await adoption.adopt(
+                instance_conf
+                for component_conf in conf.get('components', [])
+                for instance_conf in hat.orchestrator.registry.expand_conf(
+                    component_conf))
+
+        zygotes = {}
+        for zygote_conf in conf.get('zygotes', []):
+            zygote = await hat.orchestrator.zygote.create_zygote(zygote_conf)
+            _bind_resource(async_group, zygote)
+            zygotes[zygote.name] = zygote
+
+        engine = None
+        if conf.get('engine', 'default') == 'compact':
+            engine = hat.orchestrator.engine.Engine()
+            _bind_resource(async_group, engine)
+
+        sharding = None
+        shards = conf.get('shards')
+        if shards:
+            sharding = hat.orchestrator.shard.Sharding(shards)
+            _bind_resource(async_group, sharding)
+
+        notify_server = None
+        notify_conf = conf.get('notify')
+        if notify_conf:
+            notify_server = hat.orchestrator.notify.NotifyServer(notify_conf)
+            _bind_resource(async_group, notify_server)
 
+        snapshot = None
+        snapshot_conf = conf.get('snapshot')
+        if snapshot_conf:
+            snapshot = hat.orchestrator.snapshot.Snapshot(snapshot_conf)
+            _bind_resource(async_group, snapshot)
+
+        registry = await hat.orchestrator.registry.create_registry(
+            conf.get('components', []),
+            functools.partial(_create_component,
+                              win32_job=win32_job,
+                              adoption=adoption,
+                              adopted_processes=adopted_processes,
+                              snapshot=snapshot,
+                              zygotes=zygotes,
+                              engine=engine,
+                              sharding=sharding,
+                              notify_server=notify_server),
+            _validate_component_conf)
+        _bind_resource(async_group, registry)
+        components = registry.components
+
+        if snapshot:
+            snapshot.set_components(components.values())
+            registry.register_change_cb(
+                lambda: snapshot.set_components(components.values()))
+
+        if notify_server:
+            notify_server.set_components(components.values())
+            registry.register_change_cb(
+                lambda: notify_server.set_components(components.values()))
+
+        event_log_handles = {}
+
+        def on_components_change():
+            current = set(components.values())
+            for component in list(event_log_handles.keys()):
+                if component not in current:
+                    event_log_handles.pop(component).cancel()
+
+            for component_id, component in components.items():
+                if component not in event_log_handles:
+                    event_log_handles[component] = event_log.watch(
+                        component_id, component)
+
+        on_components_change()
+        registry.register_change_cb(on_components_change)
+
+        ui = None
         ui_conf = conf.get('ui')
         if ui_conf:
             htpasswd = (Path(ui_conf['htpasswd']) if 'htpasswd' in ui_conf
                         else None)
-            ui = await hat.orchestrator.ui.create(host=ui_conf['host'],
-                                                  port=ui_conf['port'],
-                                                  components=components,
-                                                  htpasswd=htpasswd)
+            ui = await _create_ui(host=ui_conf['host'],
+                                  port=ui_conf['port'],
+                                  components=components,
+                                  htpasswd=htpasswd,
+                                  event_log=event_log,
+                                  loop_monitor=loop_monitor,
+                                  registry=registry)
             _bind_resource(async_group, ui)
+            registry.register_change_cb(
+                lambda: ui.set_components(components))
+
+        profiler = None
+        profiling_conf = conf.get('profiling')
+        if profiling_conf:
+            profiler = hat.orchestrator.profiler.Profiler(profiling_conf)
+            _bind_resource(async_group, profiler)
+
+        reload_cb = (functools.partial(_reload, registry, read_conf_cb)
+                     if read_conf_cb else None)
+        if reload_cb and sys.platform != 'win32':
+            _add_reload_signal_handler(async_group, reload_cb)
+
+        control_conf = conf.get('control')
+        if control_conf:
+            control = await hat.orchestrator.control.listen(
+                path=Path(control_conf['path']),
+                components=components,
+                event_log=event_log,
+                profiler=profiler,
+                reload_cb=reload_cb,
+                registry=registry,
+                detach_cb=(functools.partial(_detach, registry)
+                           if adoption else None))
+            _bind_resource(async_group, control)
+
+        metrics_conf = conf.get('metrics')
+        if metrics_conf:
+            metrics = await _listen_metrics(host=metrics_conf['host'],
+                                            port=metrics_conf['port'],
+                                            components=components.values(),
+                                            ui=ui)
+            _bind_resource(async_group, metrics)
 
         await async_group.wait_closing()
 
@@ -97,6 +461,121 @@ async def async_main(conf: json.Data):
         await aio.uncancellable(async_group.async_close())
 
 
+@functools.cache
+def _get_validator():
+    return json.DefaultSchemaValidator(get_json_schema_repo())
+
+
+def _create_component(conf, win32_job, adoption, adopted_processes,
+                      snapshot, zygotes, engine, sharding, notify_server):
+    kwargs = {}
+
+    if notify_server:
+        kwargs['env'] = {'NOTIFY_SOCKET': notify_server.path}
+
+    elif conf.get('watchdog_timeout') is not None:
+        raise Exception('watchdog timeout requires notify socket')
+
+    elif conf.get('notify_ready'):
+        raise Exception('notify ready requires notify socket')
+
+    zygote_name = conf.get('zygote')
+    if zygote_name is not None:
+        zygote = zygotes.get(zygote_name)
+        if zygote is None:
+            raise Exception(f"zygote {zygote_name} not configured")
+
+        # processes created by zygote are not adopted
+        kwargs['create_process'] = zygote.create_process
+
+    elif adoption:
+        kwargs['create_process'] = adoption.get_create_process(conf)
+        kwargs['adopted_process'] = adopted_processes.pop(conf['name'], None)
+
+    state = snapshot.get_state(conf['name']) if snapshot else None
+    if state:
+        kwargs['revive'] = state.revive
+        kwargs['started'] = state.started
+
+    if (engine and
+            hat.orchestrator.engine.is_supported(conf) and
+            not kwargs.get('adopted_process')):
+        kwargs.pop('adopted_process', None)
+        return engine.create_component(conf, win32_job=win32_job, **kwargs)
+
+    # processes created by zygote or adoption are bound to main event loop
+    if sharding and 'create_process' not in kwargs:
+        return sharding.create_component(conf, win32_job=win32_job,
+                                         **kwargs)
+
+    return hat.orchestrator.component.Component(conf, win32_job=win32_job,
+                                                **kwargs)
+
+
+def _get_event_loop_policy(event_loop):
+    if event_loop != 'uvloop':
+        return None
+
+    # uvloop is optional dependency (not available on Windows)
+    try:
+        import uvloop
+
+    except ImportError:
+        mlog.warning("uvloop not available - using default event loop")
+        return None
+
+    return uvloop.EventLoopPolicy()
+
+
+def _validate_component_conf(conf):
+    _get_validator().validate(
+        'hat-orchestrator://orchestrator.yaml#/$defs/component', conf)
+
+
+async def _create_ui(**kwargs):
+    # web user interface stack (aiohttp and juggler) is imported only if
+    # user interface is configured
+    import hat.orchestrator.ui
+
+    return await hat.orchestrator.ui.create(**kwargs)
+
+
+async def _listen_metrics(**kwargs):
+    import hat.orchestrator.metrics
+
+    return await hat.orchestrator.metrics.listen(**kwargs)
+
+
+async def _reload(registry, read_conf_cb):
+    loop = asyncio.get_running_loop()
+    conf = await loop.run_in_executor(None, read_conf_cb)
+    _get_validator().validate('hat-orchestrator://orchestrator.yaml', conf)
+
+    diff = await registry.reload(conf.get('components', []))
+    return diff._asdict()
+
+
+async def _detach(registry):
+    mlog.info("detaching components")
+    for component in registry.components.values():
+        component.detach()
+
+
+def _add_reload_signal_handler(async_group, reload_cb):
+
+    async def reload():
+        try:
+            await reload_cb()
+
+        except Exception as e:
+            mlog.error("reload error: %s", e, exc_info=e)
+
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGHUP, async_group.spawn, reload)
+    async_group.spawn(aio.call_on_cancel, loop.remove_signal_handler,
+                      signal.SIGHUP)
+
+
 def _bind_resource(async_group, resource):
     async_group.spawn(aio.call_on_cancel, resource.async_close)
     async_group.spawn(aio.call_on_done, resource.wait_closing(),
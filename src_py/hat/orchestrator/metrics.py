@@ -0,0 +1,204 @@
+"""Metrics in Prometheus text exposition format"""
+
+from collections.abc import Iterable
+import asyncio
+import logging
+import time
+
+import aiohttp.web
+
+from hat import aio
+
+import hat.orchestrator.component
+import hat.orchestrator.histogram
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+content_type: str = 'text/plain; version=0.0.4; charset=utf-8'
+"""Metrics HTTP content type"""
+
+
+async def collect(components: Iterable[hat.orchestrator.component.Component],
+                  ui: 'hat.orchestrator.ui.WebServer | None' = None
+                  ) -> str:
+    """Collect orchestrator and component metrics
+
+    All metrics are maintained incrementally by their sources. Collecting
+    metrics only reads current values.
+
+    """
+    loop_lag = await _measure_loop_lag()
+
+    lines = []
+    _add_metric(lines, 'hat_orchestrator_loop_lag_seconds', 'gauge',
+                "event loop scheduling lag", [({}, loop_lag)])
+    _add_metric(lines, 'hat_orchestrator_tasks', 'gauge',
+                "number of asyncio tasks",
+                [({}, len(asyncio.all_tasks()))])
+
+    if ui:
+        _add_metric(lines, 'hat_orchestrator_ui_clients', 'gauge',
+                    "number of connected juggler clients",
+                    [({}, ui.client_count)])
+        _add_metric(lines, 'hat_orchestrator_ui_state_changes_total',
+                    'counter', "number of juggler state changes",
+                    [({}, ui.state_change_count)])
+
+    components = list(components)
+    _add_metric(lines, 'hat_orchestrator_component_status', 'gauge',
+                "component status",
+                [({'component': component.name, 'status': status.name},
+                  int(component.status == status))
+                 for component in components
+                 for status in hat.orchestrator.component.Status])
+    _add_metric(lines, 'hat_orchestrator_component_revive', 'gauge',
+                "component revive flag",
+                [({'component': component.name}, int(component.revive))
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_starts_total', 'counter',
+                "number of started processes",
+                [({'component': component.name}, component.start_count)
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_restarts_total',
+                'counter', "number of started processes after first start",
+                [({'component': component.name},
+                  max(component.start_count - 1, 0))
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_uptime_seconds', 'gauge',
+                "running process execution duration",
+                [({'component': component.name}, component.uptime or 0)
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_last_returncode',
+                'gauge', "return code of last stopped process",
+                [({'component': component.name}, component.returncode)
+                 for component in components
+                 if component.returncode is not None])
+    _add_metric(lines, 'hat_orchestrator_component_output_lines_total',
+                'counter', "number of captured output lines",
+                [({'component': component.name}, component.output_lines)
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_output_bytes_total',
+                'counter', "number of captured output bytes",
+                [({'component': component.name}, component.output_bytes)
+                 for component in components])
+    _add_metric(lines, 'hat_orchestrator_component_dropped_lines_total',
+                'counter', "number of output lines exceeding maximum length",
+                [({'component': component.name}, component.dropped_lines)
+                 for component in components])
+
+    latency_names = sorted({name
+                            for component in components
+                            for name in component.latencies.keys()})
+    for name in latency_names:
+        _add_histogram(lines,
+                       f'hat_orchestrator_component_{name}_latency_seconds',
+                       f"component {name} latency",
+                       [({'component': component.name},
+                         component.latencies[name])
+                        for component in components
+                        if name in component.latencies])
+
+    lines.append('')
+    return '\n'.join(lines)
+
+
+async def listen(host: str,
+                 port: int,
+                 components: Iterable[hat.orchestrator.component.Component],
+                 ui: 'hat.orchestrator.ui.WebServer | None' = None
+                 ) -> 'Server':
+    """Create HTTP server providing metrics on ``/metrics`` path"""
+    server = Server()
+    server._components = components
+    server._ui = ui
+    server._async_group = aio.Group()
+
+    app = aiohttp.web.Application()
+    app.add_routes([aiohttp.web.get('/metrics', server._on_metrics)])
+
+    server._runner = aiohttp.web.AppRunner(app, shutdown_timeout=0.1)
+    await server._runner.setup()
+
+    try:
+        site = aiohttp.web.TCPSite(runner=server._runner,
+                                   host=host,
+                                   port=port,
+                                   reuse_address=True)
+        await site.start()
+
+    except BaseException:
+        await aio.uncancellable(server._runner.cleanup())
+        raise
+
+    server.async_group.spawn(aio.call_on_cancel, server._on_close)
+
+    return server
+
+
+class Server(aio.Resource):
+    """Metrics HTTP server
+
+    For creating new instance of this class see `listen` coroutine.
+
+    """
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    async def _on_close(self):
+        await self._runner.cleanup()
+
+    async def _on_metrics(self, request):
+        text = await collect(self._components, self._ui)
+        return aiohttp.web.Response(body=text.encode('utf-8'),
+                                    headers={'Content-Type': content_type})
+
+
+def _add_metric(lines, name, metric_type, description, samples):
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for labels, value in samples:
+        lines.append(f'{name}{_encode_labels(labels)} {value}')
+
+
+def _add_histogram(lines, name, description, samples):
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} histogram')
+    for labels, histogram in samples:
+        counts = histogram.get_cumulative_counts()
+        for bucket, count in zip(histogram.buckets, counts):
+            bucket_labels = dict(labels, le=str(bucket))
+            lines.append(f'{name}_bucket{_encode_labels(bucket_labels)} '
+                         f'{count}')
+        bucket_labels = dict(labels, le='+Inf')
+        lines.append(f'{name}_bucket{_encode_labels(bucket_labels)} '
+                     f'{histogram.count}')
+        lines.append(f'{name}_sum{_encode_labels(labels)} {histogram.sum}')
+        lines.append(f'{name}_count{_encode_labels(labels)} '
+                     f'{histogram.count}')
+
+
+def _encode_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label_value(v)}"'
+                          for k, v in labels.items()) + '}'
+
+
+def _escape_label_value(value):
+    return (value.replace('\\', '\\\\')
+                 .replace('"', '\\"')
+                 .replace('\n', '\\n'))
+
+
+async def _measure_loop_lag():
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    start = time.monotonic()
+    loop.call_soon(future.set_result, None)
+    await future
+    return time.monotonic() - start
@@ -0,0 +1,243 @@
+"""Notification socket compatible with systemd's ``sd_notify``
+
+Orchestrator listens for notifications on single unix datagram socket.
+Path of this socket is passed to component's processes as ``NOTIFY_SOCKET``
+environment variable, so processes can use any ``sd_notify``
+implementation for reporting readiness (``READY=1``), status
+(``STATUS=...``) and watchdog heartbeats (``WATCHDOG=1``).
+
+Each datagram contains newline separated ``KEY=VALUE`` assignments. Sender
+is identified by process ID obtained from socket credentials - notifications
+sent by component's process or any of its descendant processes are passed
+to component (see `hat.orchestrator.component.Component.notify`).
+
+All datagrams available on socket are read and dispatched as single batch,
+so high rate of notifications (e.g. watchdog heartbeats with short
+watchdog timeout) doesn't schedule event loop callback for each datagram.
+Notification socket is supported only on Linux.
+
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+import array
+import asyncio
+import collections
+import contextlib
+import logging
+import socket
+import struct
+import sys
+import typing
+
+from hat import aio
+from hat import json
+
+import hat.orchestrator.component
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+max_batch_size: int = 1024
+"""Maximum number of datagrams read from socket in single batch"""
+
+max_datagram_size: int = 4096
+"""Maximum notification datagram size"""
+
+_ucred = struct.Struct('3i')
+
+
+class Notification(typing.NamedTuple):
+    pid: int
+    fields: dict[str, str]
+
+
+class NotifyServer(aio.Resource):
+    """Notification socket server
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/notify``
+
+    """
+
+    def __init__(self, conf: json.Data):
+        if sys.platform != 'linux':
+            raise Exception('notify socket not supported')
+
+        self._path = conf['path']
+        self._loop = asyncio.get_running_loop()
+        self._components = []
+        self._pids = {}
+        self._async_group = aio.Group()
+        self._sock = _create_socket(self._path)
+
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def path(self) -> str:
+        """Notification socket path (``NOTIFY_SOCKET`` value)"""
+        return self._path
+
+    def set_components(self,
+                       components: Iterable[
+                           hat.orchestrator.component.Component]):
+        """Set components which receive notifications
+
+        Notifications are passed only to set components.
+
+        """
+        self._components = list(components)
+        self._pids = {}
+
+    def _on_close(self):
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+
+        if not self._path.startswith('@'):
+            with contextlib.suppress(OSError):
+                Path(self._path).unlink()
+
+    def _on_readable(self):
+        notifications = []
+        with contextlib.suppress(BlockingIOError):
+            while len(notifications) < max_batch_size:
+                notification = _receive(self._sock)
+                if notification:
+                    notifications.append(notification)
+
+        if notifications:
+            self._dispatch(notifications)
+
+    def _dispatch(self, notifications):
+        components = collections.defaultdict(dict)
+        pids_updated = False
+
+        for notification in notifications:
+            component = self._pids.get(notification.pid)
+
+            if component is None and not pids_updated:
+                self._update_pids()
+                pids_updated = True
+                component = self._pids.get(notification.pid)
+
+            if component is None:
+                component = self._get_ancestor_component(notification.pid)
+
+            if component is None:
+                mlog.debug("notification from unknown process %s",
+                           notification.pid)
+                continue
+
+            # watchdog trigger is not overridden by following heartbeats
+            fields = components[component]
+            trigger = fields.get('WATCHDOG') == 'trigger'
+            fields.update(notification.fields)
+            if trigger:
+                fields['WATCHDOG'] = 'trigger'
+
+        for component, fields in components.items():
+            component.notify(fields)
+
+    def _update_pids(self):
+        self._pids = {pid: component
+                      for component in self._components
+                      for pid in component.pids}
+
+    def _get_ancestor_component(self, pid):
+        # descendant processes are cached until next pid index update
+        ancestor_pid = pid
+        visited = set()
+        while ancestor_pid > 1 and ancestor_pid not in visited:
+            visited.add(ancestor_pid)
+            ancestor_pid = _get_parent_pid(ancestor_pid)
+            if ancestor_pid is None:
+                return
+
+            component = self._pids.get(ancestor_pid)
+            if component is not None:
+                self._pids[pid] = component
+                return component
+
+
+def parse(data: bytes) -> dict[str, str]:
+    """Parse notification datagram
+
+    Lines without ``=`` are ignored.
+
+    """
+    fields = {}
+    for line in data.decode('utf-8', errors='replace').split('\n'):
+        key, sep, value = line.partition('=')
+        if sep and key:
+            fields[key] = value
+    return fields
+
+
+def _create_socket(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_PASSCRED, 1)
+        sock.setblocking(False)
+
+        if path.startswith('@'):
+            sock.bind('\0' + path[1:])
+
+        else:
+            with contextlib.suppress(FileNotFoundError):
+                if Path(path).is_socket():
+                    Path(path).unlink()
+            sock.bind(path)
+
+    except BaseException:
+        sock.close()
+        raise
+
+    return sock
+
+
+def _receive(sock):
+    data, ancdata, _, _ = sock.recvmsg(
+        max_datagram_size,
+        socket.CMSG_SPACE(_ucred.size) + socket.CMSG_SPACE(16 * 4))
+
+    pid = None
+    for level, cmsg_type, cmsg_data in ancdata:
+        if level != socket.SOL_SOCKET:
+            continue
+
+        if cmsg_type == socket.SCM_CREDENTIALS:
+            pid, _, _ = _ucred.unpack(cmsg_data[:_ucred.size])
+
+        elif cmsg_type == socket.SCM_RIGHTS:
+            # passing file descriptors (e.g. FDSTORE=1) is not supported
+            fds = array.array('i')
+            fds.frombytes(cmsg_data[:len(cmsg_data) - len(cmsg_data) % 4])
+            for fd in fds:
+                with contextlib.suppress(OSError):
+                    socket.close(fd)
+
+    if not pid:
+        return
+
+    return Notification(pid=pid,
+                        fields=parse(data))
+
+
+def _get_parent_pid(pid):
+    try:
+        stat = Path(f'/proc/{pid}/stat').read_text()
+
+    except OSError:
+        return
+
+    # process name can contain spaces and parentheses
+    return int(stat[stat.rfind(')') + 2:].split()[1])
@@ -1,37 +1,166 @@
 """Process control"""
 
+from collections.abc import Awaitable, Callable, Collection
+from pathlib import Path
 import asyncio
 import contextlib
 import ctypes
 import ctypes.util
+import functools
+import os
 import signal
 import subprocess
 import sys
+import time
+import typing
 
 from hat import aio
 
 
+CreateProcessCb: typing.TypeAlias = Callable[..., Awaitable['Process']]
+"""Create process callback
+
+Callback has the same signature as `create_process`.
+
+"""
+
+listen_fds_start: int = 3
+"""First file descriptor passed to process (see `create_process`)"""
+
+
 async def create_process(args: list[str],
                          inherit_stdin: bool = True,
                          capture_output: bool = True,
                          sigint_timeout: float = 5,
                          sigkill_timeout: float = 2,
-                         read_queue_size: int = 1024
+                         read_queue_size: int = 1024,
+                         pass_fds: Collection[int] = (),
+                         detached: bool = False,
+                         output_fifo: Path | None = None,
+                         env: dict[str, str] | None = None
                          ) -> 'Process':
-    """Create process"""
-    process = Process()
-    process._sigint_timeout = sigint_timeout
-    process._sigkill_timeout = sigkill_timeout
-    process._async_group = aio.Group()
-    process._read_queue = aio.Queue()
+    """Create process
+
+    Process inherits orchestrator's environment extended with additional
+    `env` variables.
+
+    File descriptors `pass_fds` are passed to process as consecutive file
+    descriptors starting with `listen_fds_start`. Process environment
+    additionally contains ``LISTEN_FDS`` (number of passed file
+    descriptors) and ``LISTEN_PID`` (process ID) variables, compatible with
+    systemd socket activation. Passing file descriptors is supported only
+    on POSIX systems.
+
+    Detached process is started in new session and is not killed when
+    orchestrator's process exits, so it can be adopted by other
+    orchestrator's process (see `adopt_process`). If `output_fifo` is set,
+    captured output is written to named pipe, created at `output_fifo` path
+    if it doesn't exist, instead of anonymous pipe. Process keeps named pipe
+    open for both reading and writing, so writing to named pipe doesn't
+    fail while output is not read. Detached processes and named pipes are
+    supported only on Linux.
+
+    """
+    if pass_fds and sys.platform == 'win32':
+        raise Exception('passing file descriptors not supported')
+
+    if (detached or output_fifo) and sys.platform != 'linux':
+        raise Exception('detached processes not supported')
+
+    process = _create_process_instance(sigint_timeout, sigkill_timeout,
+                                       read_queue_size)
+
+    pass_fds = list(pass_fds)
+    listen_fds = range(listen_fds_start, listen_fds_start + len(pass_fds))
+
+    fifo_fd = (_open_fifo(output_fifo)
+               if capture_output and output_fifo else None)
+
+    # explicit environment replaces environment of child process, so it
+    # can't be combined with LISTEN_PID (known only after fork) - with
+    # passed file descriptors, encoded variables are only put to child
+    # process environment by preexec function
+    process_env = None
+    listen_env = []
+    if pass_fds:
+        listen_env = [(os.fsencode(key), os.fsencode(value))
+                      for key, value in [*(env or {}).items(),
+                                         ('LISTEN_FDS', str(len(pass_fds)))]]
+
+    elif env:
+        process_env = {**os.environ, **env}
+
+    try:
+        if fifo_fd is not None:
+            stdout = fifo_fd
+        elif capture_output:
+            stdout = subprocess.PIPE
+        else:
+            stdout = subprocess.DEVNULL
+
+        with _reserve_fds(listen_fds):
+            process._process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=(None if inherit_stdin else subprocess.PIPE),
+                stdout=stdout,
+                stderr=subprocess.STDOUT,
+                creationflags=creationflags,
+                pass_fds=[*pass_fds, *listen_fds],
+                start_new_session=detached,
+                env=process_env,
+                preexec_fn=_get_preexec_fn(pass_fds, detached,
+                                           listen_env))
+
+        if fifo_fd is not None:
+            process._stdout, process._stdout_transport = \
+                await _connect_fifo(output_fifo)
+        else:
+            process._stdout = process._process.stdout
+
+    finally:
+        if fifo_fd is not None:
+            os.close(fifo_fd)
+
+    process._async_group.spawn(process._read_loop)
+
+    return process
+
+
+async def adopt_process(pid: int,
+                        output_fifo: Path | None = None,
+                        sigint_timeout: float = 5,
+                        sigkill_timeout: float = 2,
+                        read_queue_size: int = 1024
+                        ) -> 'Process':
+    """Adopt running process
+
+    Adopted process is usually detached process created by other
+    orchestrator's process (see `create_process`). Adopted process is not
+    child of current process - its exit is detected with process file
+    descriptor and its return code is not available. If `output_fifo` is
+    set, output is read from named pipe (output written while process was
+    not adopted is buffered by named pipe). Adopting processes is supported
+    only on Linux.
+
+    Raises:
+        ProcessLookupError: process doesn't exist
+
+    """
+    if sys.platform != 'linux':
+        raise Exception('adopting processes not supported')
 
-    process._process = await asyncio.create_subprocess_exec(
-        *args,
-        stdin=(None if inherit_stdin else subprocess.PIPE),
-        stdout=(subprocess.PIPE if capture_output else subprocess.DEVNULL),
-        stderr=subprocess.STDOUT,
-        creationflags=creationflags,
-        preexec_fn=preexec_fn)
+    process = _create_process_instance(sigint_timeout, sigkill_timeout,
+                                       read_queue_size)
+    process._process = _PidfdProcess(pid)
+
+    try:
+        if output_fifo:
+            process._stdout, process._stdout_transport = \
+                await _connect_fifo(output_fifo)
+
+    except BaseException:
+        process._process.close()
+        raise
 
     process._async_group.spawn(process._read_loop)
 
@@ -56,6 +185,36 @@ class Process(aio.Resource):
         """Return code"""
         return self._process.returncode
 
+    @property
+    def sigint_time(self) -> float | None:
+        """Monotonic time of sending SIGINT"""
+        return self._sigint_time
+
+    @property
+    def sigkill_time(self) -> float | None:
+        """Monotonic time of sending SIGKILL"""
+        return self._sigkill_time
+
+    @property
+    def exit_time(self) -> float | None:
+        """Monotonic time of detecting process exit"""
+        return self._exit_time
+
+    @property
+    def output_lines(self) -> int:
+        """Number of captured output lines"""
+        return self._output_lines
+
+    @property
+    def output_bytes(self) -> int:
+        """Number of captured output bytes"""
+        return self._output_bytes
+
+    @property
+    def dropped_lines(self) -> int:
+        """Number of output lines dropped due to exceeding maximum length"""
+        return self._dropped_lines
+
     def write(self,
               data: str,
               close: bool = True):
@@ -64,6 +223,17 @@ class Process(aio.Resource):
         if close:
             self._process.stdin.close()
 
+    def detach(self):
+        """Close process without terminating operating system process
+
+        Captured output is no longer read. This method should be used only
+        for detached processes - other processes are killed once
+        orchestrator's process exits.
+
+        """
+        self._detached = True
+        self.close()
+
     async def readline(self) -> str:
         """Read line from stdout"""
         try:
@@ -75,46 +245,233 @@ class Process(aio.Resource):
     async def _read_loop(self):
         try:
             try:
-                while self._process.stdout:
+                while self._stdout:
                     try:
-                        line = await self._process.stdout.readline()
+                        line = await self._stdout.readline()
 
                     except ValueError:
                         line = b'[LINE TO LONG]'
+                        self._dropped_lines += 1
 
                     if not line:
                         break
 
+                    self._output_lines += 1
+                    self._output_bytes += len(line)
+
                     line_str = line.decode('utf-8', 'ignore').rstrip()
                     await self._read_queue.put(line_str)
 
             finally:
                 self._read_queue.close()
+                if self._stdout_transport:
+                    self._stdout_transport.close()
 
-            await self._process.wait()
+            await self._wait()
 
         finally:
             self.close()
             await aio.uncancellable(self._close())
 
+    async def _wait(self):
+        await self._process.wait()
+        self._set_exit_time()
+
+    def _set_exit_time(self):
+        if self._exit_time is None:
+            self._exit_time = time.monotonic()
+
+    def _is_exited(self):
+        return (self._process.returncode is not None or
+                self._exit_time is not None)
+
     async def _close(self):
-        if self._process.returncode is not None:
+        if self._detached:
             return
 
+        if self._is_exited():
+            self._set_exit_time()
+            return
+
+        self._sigint_time = time.monotonic()
         with contextlib.suppress(Exception):
             self._process.send_signal(SIGINT)
 
         with contextlib.suppress(asyncio.TimeoutError):
-            await aio.wait_for(self._process.wait(), self._sigint_timeout)
+            await aio.wait_for(self._wait(), self._sigint_timeout)
 
-        if self._process.returncode is not None:
+        if self._is_exited():
             return
 
+        self._sigkill_time = time.monotonic()
         with contextlib.suppress(Exception):
             self._process.kill()
 
         with contextlib.suppress(asyncio.TimeoutError):
-            await aio.wait_for(self._process.wait(), self._sigkill_timeout)
+            await aio.wait_for(self._wait(), self._sigkill_timeout)
+
+
+def _create_process_instance(sigint_timeout, sigkill_timeout,
+                             read_queue_size):
+    process = Process()
+    process._sigint_timeout = sigint_timeout
+    process._sigkill_timeout = sigkill_timeout
+    process._async_group = aio.Group()
+    process._read_queue = aio.Queue(read_queue_size)
+    process._stdout = None
+    process._stdout_transport = None
+    process._detached = False
+    process._output_lines = 0
+    process._output_bytes = 0
+    process._dropped_lines = 0
+    process._sigint_time = None
+    process._sigkill_time = None
+    process._exit_time = None
+    return process
+
+
+class _PidfdProcess:
+    # subset of asyncio.subprocess.Process interface implemented with
+    # process file descriptor (process doesn't have to be child process)
+
+    def __init__(self, pid):
+        self._pid = pid
+        self._pidfd = os.pidfd_open(pid)
+        self._exit_future = None
+
+    @property
+    def pid(self):
+        return self._pid
+
+    @property
+    def returncode(self):
+        return None
+
+    @property
+    def stdin(self):
+        return None
+
+    def close(self):
+        if self._pidfd is None:
+            return
+        os.close(self._pidfd)
+        self._pidfd = None
+
+    async def wait(self):
+        if self._exit_future is None:
+            loop = asyncio.get_running_loop()
+            self._exit_future = loop.create_future()
+            loop.add_reader(self._pidfd, self._on_exit, loop)
+
+        await asyncio.shield(self._exit_future)
+
+    def _on_exit(self, loop):
+        loop.remove_reader(self._pidfd)
+        self.close()
+        self._exit_future.set_result(None)
+
+    def send_signal(self, sig):
+        if self._pidfd is None:
+            return
+        signal.pidfd_send_signal(self._pidfd, sig)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+def _open_fifo(path):
+    try:
+        os.mkfifo(path)
+
+    except FileExistsError:
+        pass
+
+    return os.open(path, os.O_RDWR)
+
+
+async def _connect_fifo(path):
+    return await _connect_read_pipe(
+        open(os.open(path, os.O_RDONLY | os.O_NONBLOCK), 'rb', buffering=0))
+
+
+async def _connect_read_pipe(pipe):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2 ** 16, loop=loop)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+
+    try:
+        transport, _ = await loop.connect_read_pipe(lambda: protocol, pipe)
+
+    except BaseException:
+        pipe.close()
+        raise
+
+    return reader, transport
+
+
+@contextlib.contextmanager
+def _reserve_fds(fds):
+    # file descriptors kept in child process have to be open in parent
+    # process - unused file descriptors are temporarily opened
+    reserved = []
+
+    try:
+        for fd in fds:
+            with contextlib.suppress(OSError):
+                os.fstat(fd)
+                continue
+
+            null_fd = os.open(os.devnull, os.O_RDONLY)
+            if null_fd != fd:
+                os.dup2(null_fd, fd, inheritable=False)
+                os.close(null_fd)
+            reserved.append(fd)
+
+        yield
+
+    finally:
+        for fd in reserved:
+            os.close(fd)
+
+
+def _get_preexec_fn(pass_fds, detached, listen_env):
+    if not pass_fds:
+        # detached process is not killed on orchestrator's exit
+        return None if detached else preexec_fn
+
+    return functools.partial(_detached_preexec_fn if detached
+                             else _listen_fds_preexec_fn,
+                             pass_fds, listen_env)
+
+
+def _detached_preexec_fn(pass_fds, listen_env):
+    _pass_listen_fds(pass_fds, listen_env)
+
+
+def _listen_fds_preexec_fn(pass_fds, listen_env):
+    if preexec_fn:
+        preexec_fn()
+
+    _pass_listen_fds(pass_fds, listen_env)
+
+
+def _pass_listen_fds(pass_fds, listen_env):
+    min_fd = max(*pass_fds, listen_fds_start + len(pass_fds)) + 1
+    tmp_fds = [fcntl.fcntl(fd, fcntl.F_DUPFD, min_fd) for fd in pass_fds]
+
+    for i, tmp_fd in enumerate(tmp_fds):
+        os.dup2(tmp_fd, listen_fds_start + i)
+        os.close(tmp_fd)
+
+    for fd in pass_fds:
+        if fd >= listen_fds_start + len(pass_fds):
+            os.close(fd)
+
+    # os.environ is not updated in child process - variables are only
+    # put to environment passed to executed program
+    for key, value in listen_env:
+        os.putenv(key, value)
+    os.putenv(b'LISTEN_PID', str(os.getpid()).encode())
 
 
 class Win32Job(aio.Resource):
@@ -156,6 +513,8 @@ class Win32Job(aio.Resource):
 
 if sys.platform == 'linux':
 
+    import fcntl
+
     class LibC:
 
         def __init__(self):
@@ -0,0 +1,184 @@
+"""On-demand profiling of running orchestrator
+
+Profiling results are written to files in configured directory. File names
+are based on current local time.
+
+"""
+
+from pathlib import Path
+import asyncio
+import cProfile
+import datetime
+import io
+import logging
+import pstats
+import tracemalloc
+
+from hat import aio
+from hat import json
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+summary_limit: int = 50
+"""Number of entries included in text summaries"""
+
+
+class Profiler(aio.Resource):
+    """Profiler
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/profiling``
+
+    """
+
+    def __init__(self, conf: json.Data):
+        self._path = Path(conf['path'])
+        self._profiling = False
+        self._tracemalloc_started = False
+        self._last_snapshot = None
+        self._async_group = aio.Group()
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def path(self) -> Path:
+        """Output directory path"""
+        return self._path
+
+    async def profile(self, duration: float) -> json.Data:
+        """Profile event loop thread for `duration` seconds
+
+        Profile statistics are written to ``.prof`` file (readable with
+        `pstats`) and text summary sorted by cumulative time is written to
+        ``.txt`` file. Result contains paths of written files.
+
+        Raises:
+            Exception: profiling already in progress
+
+        """
+        if self._profiling:
+            raise Exception('profiling already in progress')
+
+        self._profiling = True
+        return await self.async_group.spawn(self._profile, duration)
+
+    def start_tracemalloc(self, frames: int = 1):
+        """Start tracing memory allocations"""
+        if tracemalloc.is_tracing():
+            raise Exception('tracemalloc already started')
+
+        tracemalloc.start(frames)
+        self._tracemalloc_started = True
+        self._last_snapshot = None
+        mlog.info("tracemalloc started")
+
+    def stop_tracemalloc(self):
+        """Stop tracing memory allocations"""
+        if not tracemalloc.is_tracing():
+            raise Exception('tracemalloc not started')
+
+        tracemalloc.stop()
+        self._tracemalloc_started = False
+        self._last_snapshot = None
+        mlog.info("tracemalloc stopped")
+
+    async def take_snapshot(self) -> json.Data:
+        """Take memory allocations snapshot
+
+        Snapshot is written to ``.snapshot`` file (readable with
+        `tracemalloc.Snapshot.load`) and text summary is written to ``.txt``
+        file. If previous snapshot is available, differences between
+        previous and current snapshot are written to additional
+        ``-diff.txt`` file. Result contains paths of written files.
+
+        Raises:
+            Exception: tracemalloc not started
+
+        """
+        if not tracemalloc.is_tracing():
+            raise Exception('tracemalloc not started')
+
+        snapshot = tracemalloc.take_snapshot()
+        last_snapshot, self._last_snapshot = self._last_snapshot, snapshot
+
+        name = _get_name('tracemalloc')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._write_snapshot, name,
+                                          snapshot, last_snapshot)
+
+    def _on_close(self):
+        if self._tracemalloc_started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    async def _profile(self, duration):
+        profile = cProfile.Profile()
+
+        try:
+            mlog.info("profiling started")
+            profile.enable()
+            await asyncio.sleep(duration)
+
+        finally:
+            profile.disable()
+            self._profiling = False
+            mlog.info("profiling stopped")
+
+        name = _get_name('profile')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._write_profile, name,
+                                          profile)
+
+    def _write_profile(self, name, profile):
+        self._path.mkdir(parents=True, exist_ok=True)
+        stats_path = self._path / f'{name}.prof'
+        summary_path = self._path / f'{name}.txt'
+
+        profile.dump_stats(stats_path)
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(summary_limit)
+        summary_path.write_text(summary.getvalue(), encoding='utf-8')
+
+        return {'stats': str(stats_path),
+                'summary': str(summary_path)}
+
+    def _write_snapshot(self, name, snapshot, last_snapshot):
+        self._path.mkdir(parents=True, exist_ok=True)
+        snapshot_path = self._path / f'{name}.snapshot'
+        summary_path = self._path / f'{name}.txt'
+        diff_path = self._path / f'{name}-diff.txt' if last_snapshot else None
+
+        snapshot.dump(str(snapshot_path))
+
+        stats = snapshot.statistics('lineno')
+        summary_path.write_text(_format_stats(stats), encoding='utf-8')
+
+        if last_snapshot:
+            stats = snapshot.compare_to(last_snapshot, 'lineno')
+            diff_path.write_text(_format_stats(stats), encoding='utf-8')
+
+        return {'snapshot': str(snapshot_path),
+                'summary': str(summary_path),
+                'diff': str(diff_path) if diff_path else None}
+
+
+def _get_name(prefix):
+    now = datetime.datetime.now()
+    return f"{prefix}-{now.strftime('%Y%m%d-%H%M%S-%f')}"
+
+
+def _format_stats(stats):
+    total = sum(stat.size for stat in stats)
+    lines = [f'total: {total / 1024:.1f} KiB']
+    lines.extend(str(stat) for stat in stats[:summary_limit])
+    lines.append('')
+    return '\n'.join(lines)
@@ -0,0 +1,460 @@
+"""Component registry
+
+Registry contains components created from configuration. Components can be
+added and removed at runtime and configuration of running registry can be
+reloaded - only components whose configuration changed are affected.
+
+"""
+
+from collections.abc import Awaitable, Callable, Iterable
+import asyncio
+import itertools
+import logging
+import typing
+
+from hat import aio
+from hat import json
+from hat import util
+
+import hat.orchestrator.component
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+CreateComponentCb: typing.TypeAlias = Callable[
+    [json.Data],
+    hat.orchestrator.component.Component |
+    Awaitable[hat.orchestrator.component.Component]]
+"""Create component callback"""
+
+
+instance_placeholder: str = '{instance}'
+"""Placeholder replaced with instance number in replicated component's
+arguments and stdin"""
+
+
+class Diff(typing.NamedTuple):
+    added: list[str]
+    removed: list[str]
+    changed: list[str]
+
+
+def expand_conf(conf: json.Data) -> list[json.Data]:
+    """Expand component configuration
+
+    Configuration of replicated component (configuration with
+    ``instances`` property) is expanded into configurations of its
+    instances (see `get_instance_conf`). Other configurations are
+    returned unchanged.
+
+    """
+    if 'instances' not in conf:
+        return [conf]
+
+    return [get_instance_conf(conf, instance)
+            for instance in range(conf['instances'])]
+
+
+async def create_registry(confs: Iterable[json.Data],
+                          create_component: CreateComponentCb = (
+                              hat.orchestrator.component.Component),
+                          validate_cb: (Callable[[json.Data], None] |
+                                        None) = None
+                          ) -> 'Registry':
+    """Create registry
+
+    Unlike `Registry` constructor, which requires `create_component`
+    returning component, initial components can also be created
+    asynchronously (`create_component` can return awaitable).
+
+    Arguments are the same as for `Registry`.
+
+    """
+    registry = Registry([], create_component, validate_cb)
+
+    try:
+        confs = list(confs)
+        registry._groups = {conf['name']: conf for conf in confs
+                            if 'instances' in conf}
+
+        for conf in _expand_confs(confs):
+            registry._components[next(registry._next_ids)] = \
+                await registry._create_bound_component(conf)
+
+    except BaseException:
+        await aio.uncancellable(registry.async_close())
+        raise
+
+    return registry
+
+
+def get_instance_conf(conf: json.Data,
+                      instance: int
+                      ) -> json.Data:
+    """Get configuration of replicated component's instance
+
+    Instance is named ``<name>/<instance>`` and belongs to group named as
+    replicated component (``group`` property). Occurrences of
+    `instance_placeholder` in arguments and stdin are replaced with
+    instance number.
+
+    """
+    instance_conf = {k: v for k, v in conf.items() if k != 'instances'}
+    instance_conf['name'] = f"{conf['name']}/{instance}"
+    instance_conf['group'] = conf['name']
+    instance_conf['args'] = [_format_instance(arg, instance)
+                             for arg in conf['args']]
+
+    if 'stdin' in conf:
+        instance_conf['stdin'] = _format_instance(conf['stdin'], instance)
+
+    return instance_conf
+
+
+def get_diff(old_confs: Iterable[json.Data],
+             new_confs: Iterable[json.Data]
+             ) -> Diff:
+    """Get differences between component configurations
+
+    Component configurations are matched by component names. Replicated
+    component configurations are expanded (see `expand_conf`).
+
+    Raises:
+        Exception: duplicate component names
+
+    """
+    old_confs = _get_confs_by_name(_expand_confs(old_confs))
+    new_confs = _get_confs_by_name(_expand_confs(new_confs))
+
+    return Diff(added=[name for name in new_confs
+                       if name not in old_confs],
+                removed=[name for name in old_confs
+                         if name not in new_confs],
+                changed=[name for name, conf in new_confs.items()
+                         if name in old_confs and old_confs[name] != conf])
+
+
+class Registry(aio.Resource):
+    """Component registry
+
+    Each component is identified with stable component id - ids are
+    assigned in order of component creation and are not reused. Components
+    mapping (component id to component) is ordered as component
+    configurations (components added with `add` are appended) and is
+    updated in place.
+
+    If any of registry's components is closed (without being removed),
+    registry is also closed. Closing registry closes all components.
+
+    Initial components are created synchronously by constructor - while
+    creating them, `create_component` should return component (see
+    `create_registry`). Components added, scaled or reloaded later can
+    also be created asynchronously (`create_component` can return
+    awaitable).
+
+    Args:
+        confs: component configurations defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/component``
+        create_component: create component callback
+        validate_cb: component configuration validation callback (used
+            by `add`)
+
+    """
+
+    def __init__(self,
+                 confs: Iterable[json.Data],
+                 create_component: CreateComponentCb = (
+                     hat.orchestrator.component.Component),
+                 validate_cb: Callable[[json.Data], None] | None = None):
+        self._create_component = create_component
+        self._validate_cb = validate_cb
+        self._components = {}
+        self._component_groups = {}
+        self._groups = {}
+        self._next_ids = itertools.count()
+        self._lock = asyncio.Lock()
+        self._change_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "change callback exception: %s", e, exc_info=e))
+        self._async_group = aio.Group()
+
+        try:
+            confs = list(confs)
+            self._groups = {conf['name']: conf for conf in confs
+                            if 'instances' in conf}
+
+            for conf in _expand_confs(confs):
+                self._components[next(self._next_ids)] = \
+                    self._bind_component(self._create_component(conf))
+
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def components(self) -> dict[int, hat.orchestrator.component.Component]:
+        """Components"""
+        return self._components
+
+    def register_change_cb(self,
+                           cb: Callable[[], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register change callback
+
+        Registered callbacks are called after components mapping changes.
+
+        """
+        return self._change_cbs.register(cb)
+
+    async def add(self, conf: json.Data) -> int:
+        """Add new component and return its id
+
+        Replicated components can not be added (see `scale`).
+
+        Raises:
+            Exception: invalid configuration or duplicate component name
+
+        """
+        if self._validate_cb:
+            self._validate_cb(conf)
+
+        if 'instances' in conf:
+            raise Exception('replicated component can not be added')
+
+        async with self._lock:
+            if any(component.name == conf['name']
+                   for component in self._components.values()):
+                raise Exception(f"duplicate component name {conf['name']}")
+
+            component_id = next(self._next_ids)
+            self._components[component_id] = \
+                await self._create_bound_component(conf)
+            self._change_cbs.notify()
+
+            mlog.info("component %s added (id %s)", conf['name'],
+                      component_id)
+            return component_id
+
+    async def remove(self, component_ids: Iterable[int]):
+        """Stop and remove components
+
+        Raises:
+            Exception: invalid component id
+
+        """
+        component_ids = set(component_ids)
+
+        async with self._lock:
+            for component_id in component_ids:
+                if component_id not in self._components:
+                    raise Exception(f'invalid component id {component_id}')
+
+            await self._close_components(
+                self._components[component_id]
+                for component_id in component_ids)
+
+            for component_id in component_ids:
+                mlog.info("component %s removed (id %s)",
+                          self._components.pop(component_id).name,
+                          component_id)
+
+            if component_ids:
+                self._change_cbs.notify()
+
+    async def scale(self, group: str, instances: int):
+        """Change number of replicated component's instances
+
+        New instances are appended. Instances with greatest instance
+        numbers are stopped and removed.
+
+        Raises:
+            Exception: invalid group or number of instances
+
+        """
+        if instances < 0:
+            raise Exception('invalid number of instances')
+
+        async with self._lock:
+            conf = self._groups.get(group)
+            if conf is None:
+                raise Exception(f'invalid group {group}')
+
+            names = {get_instance_conf(conf, instance)['name']: instance
+                     for instance in range(max(conf['instances'],
+                                               instances))}
+            removed_ids = [
+                component_id
+                for component_id, component in self._components.items()
+                if names.get(component.name, -1) >= instances]
+            existing_names = {component.name
+                              for component in self._components.values()}
+
+            await self._close_components(self._components[component_id]
+                                         for component_id in removed_ids)
+            for component_id in removed_ids:
+                del self._components[component_id]
+
+            for instance in range(instances):
+                instance_conf = get_instance_conf(conf, instance)
+                if instance_conf['name'] in existing_names:
+                    continue
+
+                self._components[next(self._next_ids)] = \
+                    await self._create_bound_component(instance_conf)
+
+            self._groups[group] = dict(conf, instances=instances)
+            self._change_cbs.notify()
+
+            mlog.info("group %s scaled from %s to %s instances", group,
+                      conf['instances'], instances)
+
+    async def reload(self, confs: Iterable[json.Data]) -> Diff:
+        """Apply new component configurations
+
+        Components which are not available in new configurations are closed
+        and removed. Components with changed configuration are closed and
+        replaced with new components (replaced components retain their
+        ids). New components are added. Other components are left
+        untouched.
+
+        New and replacement components are created before any of existing
+        components is closed - if creation of any component fails, created
+        components are closed and registry is left unchanged. Exceptions
+        are new and replacement components with listening sockets, which
+        are created only after removed and replaced components are closed
+        (sockets can not be bound twice). If creation of such component
+        fails, it is not added to registry (replaced component is removed).
+
+        Raises:
+            Exception: duplicate component names or component creation
+                error
+
+        """
+        confs = list(confs)
+
+        async with self._lock:
+            diff = get_diff((component.conf
+                             for component in self._components.values()),
+                            confs)
+
+            ids = {component.name: component_id
+                   for component_id, component in self._components.items()}
+            closing_names = {*diff.removed, *diff.changed}
+            closing = [component for component in self._components.values()
+                       if component.name in closing_names]
+
+            components = {}
+            created = []
+            deferred_confs = {}
+            order = []
+            try:
+                for conf in _expand_confs(confs):
+                    name = conf['name']
+                    component_id = ids.get(name)
+
+                    if component_id is None:
+                        component_id = next(self._next_ids)
+                    order.append(component_id)
+
+                    if name in ids and name not in closing_names:
+                        components[component_id] = \
+                            self._components[component_id]
+                        continue
+
+                    if conf.get('sockets'):
+                        if name in ids:
+                            components[component_id] = \
+                                self._components[component_id]
+                        deferred_confs[component_id] = conf
+                        continue
+
+                    component = await self._create_bound_component(conf)
+                    components[component_id] = component
+                    created.append(component)
+
+            except BaseException:
+                await aio.uncancellable(self._close_components(created))
+                raise
+
+            self._groups = {conf['name']: conf for conf in confs
+                            if 'instances' in conf}
+            self._components.clear()
+            self._components.update(components)
+            self._change_cbs.notify()
+
+            await self._close_components(closing)
+
+            errors = []
+            for component_id, conf in deferred_confs.items():
+                try:
+                    self._components[component_id] = \
+                        await self._create_bound_component(conf)
+
+                except Exception as e:
+                    mlog.error("error creating component %s: %s",
+                               conf['name'], e, exc_info=e)
+                    self._components.pop(component_id, None)
+                    errors.append(e)
+
+            if deferred_confs:
+                components = dict(self._components)
+                self._components.clear()
+                self._components.update(
+                    (component_id, components[component_id])
+                    for component_id in order
+                    if component_id in components)
+                self._change_cbs.notify()
+
+            mlog.info("components reloaded (added: %s; removed: %s; "
+                      "changed: %s)", diff.added, diff.removed, diff.changed)
+
+            if errors:
+                raise Exception(f'component creation error: {errors[0]}')
+
+            return diff
+
+    async def _create_bound_component(self, conf):
+        component = await aio.call(self._create_component, conf)
+        return self._bind_component(component)
+
+    def _bind_component(self, component):
+        group = self._async_group.create_subgroup()
+        group.spawn(aio.call_on_cancel, component.async_close)
+        group.spawn(aio.call_on_done, component.wait_closing(), self.close)
+        self._component_groups[component] = group
+
+        return component
+
+    async def _close_components(self, components):
+        groups = [self._component_groups.pop(component)
+                  for component in components]
+        if not groups:
+            return
+
+        await asyncio.wait([self._async_group.spawn(group.async_close)
+                            for group in groups])
+
+
+def _expand_confs(confs):
+    for conf in confs:
+        yield from expand_conf(conf)
+
+
+def _format_instance(value, instance):
+    return value.replace(instance_placeholder, str(instance))
+
+
+def _get_confs_by_name(confs):
+    result = {}
+    for conf in confs:
+        name = conf['name']
+        if name in result:
+            raise Exception(f'duplicate component name {name}')
+        result[name] = conf
+    return result
@@ -0,0 +1,148 @@
+"""Rolling restart of components
+
+Rolling restart restarts running components in batches of at most
+`max_unavailable` components. Each batch is restarted only after all
+components of previous batch are running again. Readiness is based only on
+component's status - restarted component is ready once its new process is
+running (and stays running for `min_ready` seconds). Components with
+``notify_ready`` configuration are additionally ready only after their new
+process reports readiness (``READY=1`` notification). Components with
+overlapping restart are restarted the same way (their status changes from
+``STARTING`` to ``RUNNING`` without stopping previous process).
+
+"""
+
+from collections.abc import Callable, Iterable
+import asyncio
+import logging
+
+from hat import aio
+
+import hat.orchestrator.component
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+Status = hat.orchestrator.component.Status
+
+
+async def rolling_restart(components: Iterable[
+                              hat.orchestrator.component.Component],
+                          max_unavailable: int = 1,
+                          min_ready: float = 0,
+                          ready_timeout: float = 30,
+                          progress_cb: Callable[[int, int], None] | None = None
+                          ):
+    """Restart components in batches
+
+    Only components which are running at the time their batch is
+    restarted are restarted - other components are skipped. If any of
+    restarted components fails (its new process is not started, or is
+    stopped before it is ready, or component doesn't become ready in
+    `ready_timeout` seconds), rolling restart is aborted and remaining
+    batches are not restarted.
+
+    If `progress_cb` is provided, it is called after each batch with
+    number of processed (restarted or skipped) components and total number
+    of components.
+
+    Raises:
+        ValueError: invalid max unavailable
+        Exception: rolling restart aborted
+
+    """
+    if max_unavailable < 1:
+        raise ValueError('invalid max unavailable')
+
+    components = list(components)
+    for i in range(0, len(components), max_unavailable):
+        batch = [component
+                 for component in components[i:i + max_unavailable]
+                 if component.status == Status.RUNNING]
+        if not batch:
+            if progress_cb:
+                progress_cb(min(i + max_unavailable, len(components)),
+                            len(components))
+            continue
+
+        mlog.info("rolling restart of components %s",
+                  [component.name for component in batch])
+
+        async with aio.Group(log_exceptions=False) as group:
+            futures = [group.spawn(_restart, component, min_ready,
+                                   ready_timeout)
+                       for component in batch]
+            await asyncio.wait(futures, return_when=asyncio.FIRST_EXCEPTION)
+
+            errors = [str(future.exception()) for future in futures
+                      if future.done() and future.exception()]
+            if errors:
+                mlog.warning("rolling restart aborted: %s", errors)
+                raise Exception(f"rolling restart aborted "
+                                f"({'; '.join(errors)})")
+
+        if progress_cb:
+            progress_cb(min(i + max_unavailable, len(components)),
+                        len(components))
+
+
+async def _restart(component, min_ready, ready_timeout):
+    status_queue = aio.Queue()
+
+    with component.register_change_cb(
+            lambda: status_queue.put_nowait(component.status)):
+        start_count = component.start_count
+        component.restart()
+
+        try:
+            await aio.wait_for(
+                _wait_ready(component, start_count, status_queue),
+                ready_timeout)
+
+        except asyncio.TimeoutError:
+            raise Exception(f'component {component.name} not ready')
+
+        if not min_ready:
+            return
+
+        try:
+            status = await aio.wait_for(
+                _wait_status_change(status_queue, Status.RUNNING), min_ready)
+
+        except asyncio.TimeoutError:
+            return
+
+        raise Exception(f'component {component.name} status changed to '
+                        f'{status.name} before ready')
+
+
+async def _wait_status_change(status_queue, status):
+    # change callbacks are also notified on changes not related to status
+    while True:
+        new_status = await status_queue.get()
+        if new_status != status:
+            return new_status
+
+
+async def _wait_ready(component, start_count, status_queue):
+    starting = False
+
+    while True:
+        status = await status_queue.get()
+
+        if status == Status.STARTING:
+            starting = True
+
+        elif status == Status.RUNNING and starting:
+            if component.start_count <= start_count:
+                raise Exception(f'component {component.name} not restarted')
+
+            if component.ready or not component.conf.get('notify_ready'):
+                return
+
+        elif status == Status.STOPPED and starting:
+            raise Exception(f'component {component.name} stopped')
+
+        if component.is_closing:
+            raise Exception(f'component {component.name} closed')
@@ -0,0 +1,564 @@
+"""Sharded supervision of components
+
+Components can be partitioned across shards - worker threads, each running
+its own event loop. Each component (`hat.orchestrator.component.Component`
+instance) and all of its processes are supervised by event loop of single
+shard. Main event loop uses `ShardComponent` instances, which provide the
+same interface as supervised components: requests (start, stop, ...) are
+forwarded to shard's event loop, while status changes and captured
+output are forwarded to main event loop (output is forwarded only while
+output callbacks are registered).
+
+Notifications from shard to main event loop are batched - all
+notifications queued while main event loop is busy are processed by
+single main event loop callback. Main event loop never accesses objects
+owned by shard's event loop - `ShardComponent` properties are based on
+snapshots of component's state, published by shard's event loop on each
+component's change (output counters are additionally published on
+captured output).
+
+On Linux, component's processes are created with ``PR_SET_PDEATHSIG``,
+which is triggered by termination of thread which created process - all
+processes still running when shard's thread terminates are killed. Shard's
+thread terminates only after all shard's components are closed, so this
+affects only processes which could not be stopped (detached processes are
+created without ``PR_SET_PDEATHSIG``).
+
+"""
+
+from collections.abc import Callable
+import asyncio
+import collections
+import contextlib
+import logging
+import threading
+import time
+import typing
+
+from hat import aio
+from hat import json
+from hat import util
+
+import hat.orchestrator.component
+import hat.orchestrator.histogram
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+Status = hat.orchestrator.component.Status
+
+
+class Sharding(aio.Resource):
+    """Sharding
+
+    New component is assigned to shard with the least number of
+    components.
+
+    Args:
+        count: number of shards
+
+    """
+
+    def __init__(self, count: int):
+        if count < 1:
+            raise ValueError('invalid shard count')
+
+        self._async_group = aio.Group()
+        self._shards = []
+
+        try:
+            for i in range(count):
+                shard = Shard(f'shard-{i}')
+                self._shards.append(shard)
+                self._async_group.spawn(aio.call_on_cancel, shard.async_close)
+                self._async_group.spawn(aio.call_on_done,
+                                        shard.wait_closing(), self.close)
+
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def shards(self) -> list['Shard']:
+        """Shards"""
+        return self._shards
+
+    async def create_component(self,
+                               conf: json.Data,
+                               **kwargs
+                               ) -> 'ShardComponent':
+        """Create component in shard with the least number of components
+
+        Additional arguments are passed to
+        `hat.orchestrator.component.Component`.
+
+        """
+        if not self.is_open:
+            raise Exception('sharding closed')
+
+        shard = min(self._shards, key=lambda shard: shard.component_count)
+        return await shard.create_component(conf, **kwargs)
+
+
+class Shard(aio.Resource):
+    """Shard
+
+    Shard's event loop is running in new daemon thread. Closing shard
+    closes all shard's components and stops its event loop.
+
+    Args:
+        name: shard name (used as thread name)
+
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._main_loop = asyncio.get_running_loop()
+        self._loop = asyncio.new_event_loop()
+        self._components = set()
+        self._pending = collections.deque()
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+        self._async_group = aio.Group()
+
+        self._thread = threading.Thread(target=self._run_thread,
+                                        name=name,
+                                        daemon=True)
+        self._thread.start()
+
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def name(self) -> str:
+        """Shard name"""
+        return self._name
+
+    @property
+    def component_count(self) -> int:
+        """Number of shard's components"""
+        return len(self._components)
+
+    async def create_component(self,
+                               conf: json.Data,
+                               **kwargs
+                               ) -> 'ShardComponent':
+        """Create component supervised by shard's event loop
+
+        Additional arguments are passed to
+        `hat.orchestrator.component.Component`. Component is created by
+        shard's event loop - if this coroutine is cancelled, component
+        creation is completed and created component is closed.
+
+        Raises:
+            Exception: component creation error
+
+        """
+        if not self.is_open:
+            raise Exception('shard closed')
+
+        # component is counted during creation, so concurrently created
+        # components are assigned to different shards
+        component = ShardComponent(self, conf)
+        self._components.add(component)
+
+        try:
+            await aio.uncancellable(self._call(component._create(**kwargs)))
+
+        except BaseException:
+            await aio.uncancellable(component.async_close())
+            raise
+
+        return component
+
+    def _call_soon(self, fn, *args):
+        # called from main event loop
+        return self._loop.call_soon_threadsafe(fn, *args)
+
+    async def _call(self, coro):
+        # called from main event loop
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    def _notify(self, fn, *args):
+        # called from shard's event loop
+        with self._lock:
+            self._pending.append((fn, args))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+
+        self._main_loop.call_soon_threadsafe(self._flush)
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, collections.deque()
+            self._flush_scheduled = False
+
+        for fn, args in pending:
+            fn(*args)
+
+    def _run_thread(self):
+        asyncio.set_event_loop(self._loop)
+
+        try:
+            self._loop.run_forever()
+
+        finally:
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+
+            if tasks:
+                self._loop.run_until_complete(
+                    asyncio.gather(*tasks, return_exceptions=True))
+
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    async def _on_close(self):
+        components = list(self._components)
+        if components:
+            await asyncio.wait([asyncio.create_task(component.async_close())
+                                for component in components])
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._thread.join)
+
+        # notifications queued during components closing
+        self._flush()
+
+
+class ShardComponent(aio.Resource):
+    """Component supervised by shard's event loop
+
+    Provides the same interface as `hat.orchestrator.component.Component`
+    and should be used only from main event loop. For creating new instance
+    of this class see `Shard.create_component`.
+
+    """
+
+    def __init__(self, shard: Shard, conf: json.Data):
+        self._shard = shard
+        self._conf = conf
+        self._component = None
+        self._state = None
+        self._request_count = 0
+        self._applied_request_count = 0
+        self._output_counts_scheduled = False
+        self._change_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "change callback exception: %s", e, exc_info=e))
+        self._started_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "started callback exception: %s", e, exc_info=e))
+        self._output_cbs = util.CallbackRegistry(
+            exception_cb=lambda e: mlog.warning(
+                "output callback exception: %s", e, exc_info=e))
+        self._output_cb_count = 0
+        self._async_group = aio.Group()
+
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def shard(self) -> Shard:
+        """Shard supervising component"""
+        return self._shard
+
+    @property
+    def status(self) -> Status:
+        """Current status"""
+        return self._state.status
+
+    @property
+    def conf(self) -> json.Data:
+        """Component configuration"""
+        return self._conf
+
+    @property
+    def name(self) -> str:
+        """Component name"""
+        return self._state.name
+
+    @property
+    def tags(self) -> list[str]:
+        """Component tags"""
+        return self._state.tags
+
+    @property
+    def group(self) -> str | None:
+        """Replicated component's group name (``None`` if not replicated)"""
+        return self._state.group
+
+    @property
+    def delay(self) -> float:
+        """Delay in seconds"""
+        return self._state.delay
+
+    @property
+    def revive(self) -> bool:
+        """Revive component"""
+        return self._state.revive
+
+    @property
+    def started(self) -> bool:
+        """Started flag"""
+        return self._state.started
+
+    @property
+    def returncode(self) -> int | None:
+        """Return code of last stopped process"""
+        return self._state.returncode
+
+    @property
+    def pid(self) -> int | None:
+        """Process ID of currently running process"""
+        return self._state.pid
+
+    @property
+    def pids(self) -> list[int]:
+        """Process IDs of all component's processes"""
+        return self._state.pids
+
+    @property
+    def uptime(self) -> float | None:
+        """Duration in seconds of currently running process execution"""
+        if self._state.process_start_time is None:
+            return None
+        return time.monotonic() - self._state.process_start_time
+
+    @property
+    def start_count(self) -> int:
+        """Number of successfully started processes"""
+        return self._state.start_count
+
+    @property
+    def ready(self) -> bool:
+        """Ready flag reported by currently running process"""
+        return self._state.ready
+
+    @property
+    def status_text(self) -> str | None:
+        """Status text last reported by component's process"""
+        return self._state.status_text
+
+    @property
+    def output_lines(self) -> int:
+        """Number of captured output lines of all processes"""
+        return self._state.output_lines
+
+    @property
+    def output_bytes(self) -> int:
+        """Number of captured output bytes of all processes"""
+        return self._state.output_bytes
+
+    @property
+    def dropped_lines(self) -> int:
+        """Number of dropped output lines of all processes"""
+        return self._state.dropped_lines
+
+    @property
+    def latencies(self) -> dict[str, hat.orchestrator.histogram.Histogram]:
+        """Lifecycle latency histograms"""
+        return self._state.latencies
+
+    @property
+    def last_lifecycle(self) -> dict[str, float]:
+        """Phase times of last finished process lifecycle"""
+        return self._state.last_lifecycle
+
+    def register_change_cb(self,
+                           cb: Callable[[], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register change callback"""
+        return self._change_cbs.register(cb)
+
+    def register_started_cb(self,
+                            cb: Callable[[], None]
+                            ) -> util.RegisterCallbackHandle:
+        """Register started callback"""
+        return self._started_cbs.register(cb)
+
+    def register_output_cb(self,
+                           cb: Callable[[str], None]
+                           ) -> util.RegisterCallbackHandle:
+        """Register output callback"""
+        handle = self._output_cbs.register(cb)
+        self._output_cb_count += 1
+
+        def cancel():
+            handle.cancel()
+            self._output_cb_count -= 1
+
+        return util.RegisterCallbackHandle(cancel)
+
+    def set_revive(self, revive: bool):
+        """Set revive flag"""
+        self._request(self._component.set_revive, revive, revive=revive)
+
+    def start(self):
+        """Start component"""
+        self._request(self._component.start, started=True)
+
+    def stop(self):
+        """Stop component"""
+        self._request(self._component.stop, started=False)
+
+    def restart(self):
+        """Restart component"""
+        self._request(self._component.restart, started=True)
+
+    def notify(self, fields: dict[str, str]):
+        """Process notification sent by component's process"""
+        self._shard._call_soon(self._component.notify, fields)
+
+    def detach(self):
+        """Close component without stopping its processes"""
+        self._shard._call_soon(self._component.detach)
+
+    def _request(self, fn, *args, **state):
+        # state (revive and started flags) is updated immediately and
+        # overrides published snapshots until request is applied
+        self._request_count += 1
+        self._state = self._state._replace(**state)
+        self._shard._call_soon(self._apply_request, self._request_count,
+                               fn, *args)
+
+    def _apply_request(self, request_count, fn, *args):
+        # executed by shard's event loop
+        self._applied_request_count = request_count
+        fn(*args)
+
+    async def _create(self, **kwargs):
+        # executed by shard's event loop
+        component = hat.orchestrator.component.Component(self._conf,
+                                                         **kwargs)
+
+        component.register_change_cb(
+            lambda: self._shard._notify(self._on_change,
+                                        self._get_state()))
+        component.register_started_cb(
+            lambda: self._shard._notify(self._on_started,
+                                        self._get_state()))
+        component.register_output_cb(self._on_output)
+        component.async_group.spawn(
+            aio.call_on_cancel, self._shard._notify, self.close)
+
+        self._component = component
+        self._state = self._get_state()
+
+    def _get_state(self):
+        # executed by shard's event loop
+        component = self._component
+        uptime = component.uptime
+
+        return _State(
+            request_count=self._applied_request_count,
+            name=component.name,
+            tags=list(component.tags),
+            group=component.group,
+            delay=component.delay,
+            status=component.status,
+            revive=component.revive,
+            started=component.started,
+            returncode=component.returncode,
+            pid=component.pid,
+            pids=component.pids,
+            process_start_time=(None if uptime is None
+                                else time.monotonic() - uptime),
+            start_count=component.start_count,
+            ready=component.ready,
+            status_text=component.status_text,
+            output_lines=component.output_lines,
+            output_bytes=component.output_bytes,
+            dropped_lines=component.dropped_lines,
+            latencies={name: histogram.copy()
+                       for name, histogram in component.latencies.items()},
+            last_lifecycle=dict(component.last_lifecycle))
+
+    def _on_output(self, line):
+        # executed by shard's event loop - output is forwarded only if
+        # main event loop has registered output callbacks
+        if self._output_cb_count:
+            self._shard._notify(self._output_cbs.notify, line)
+
+        # output counters are published once per shard's event loop
+        # iteration
+        if not self._output_counts_scheduled:
+            self._output_counts_scheduled = True
+            self._shard._loop.call_soon(self._publish_output_counts)
+
+    def _publish_output_counts(self):
+        # executed by shard's event loop
+        self._output_counts_scheduled = False
+        component = self._component
+        self._shard._notify(self._on_output_counts, component.output_lines,
+                            component.output_bytes, component.dropped_lines)
+
+    def _on_output_counts(self, output_lines, output_bytes, dropped_lines):
+        self._state = self._state._replace(output_lines=output_lines,
+                                           output_bytes=output_bytes,
+                                           dropped_lines=dropped_lines)
+
+    def _set_state(self, state):
+        if state.request_count < self._request_count:
+            state = state._replace(revive=self._state.revive,
+                                   started=self._state.started)
+        self._state = state
+
+    def _on_change(self, state):
+        self._set_state(state)
+        self._change_cbs.notify()
+
+    def _on_started(self, state):
+        self._set_state(state)
+        self._started_cbs.notify()
+
+    async def _on_close(self):
+        try:
+            if self._component:
+                with contextlib.suppress(RuntimeError):
+                    await self._shard._call(self._component.async_close())
+
+        finally:
+            self._shard._components.discard(self)
+
+
+class _State(typing.NamedTuple):
+    request_count: int
+    name: str
+    tags: list[str]
+    group: str | None
+    delay: float
+    status: Status
+    revive: bool
+    started: bool
+    returncode: int | None
+    pid: int | None
+    pids: list[int]
+    process_start_time: float | None
+    start_count: int
+    ready: bool
+    status_text: str | None
+    output_lines: int
+    output_bytes: int
+    dropped_lines: int
+    latencies: dict[str, hat.orchestrator.histogram.Histogram]
+    last_lifecycle: dict[str, float]
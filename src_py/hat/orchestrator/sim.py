@@ -0,0 +1,253 @@
+"""Simulated process backend and virtual clock event loop
+
+Simulated processes don't create operating system processes. Their
+behavior (output, execution duration, return code and response to SIGINT)
+is defined by `Script`. `Backend.create_process` has the same signature as
+`hat.orchestrator.process.create_process` and can be passed to
+`hat.orchestrator.component.Component` instead of default implementation.
+
+Simulated processes are driven only by event loop timers. In combination
+with `VirtualClockEventLoop`, which advances its clock to next scheduled
+timer instead of waiting, this enables testing of components' lifecycle
+with large number of components without real delays.
+
+"""
+
+from collections.abc import Callable, Collection
+import asyncio
+import contextlib
+import itertools
+import selectors
+import time
+import typing
+
+from hat import aio
+
+import hat.orchestrator.process
+
+
+class Script(typing.NamedTuple):
+    output: list[tuple[float, str]] = []
+    """output lines with delays (in seconds) relative to previous line"""
+    duration: float | None = None
+    """execution duration in seconds (``None`` - until terminated)"""
+    returncode: int = 0
+    """return code after execution duration expires"""
+    ignore_sigint: bool = False
+    """ignore SIGINT (only SIGKILL terminates process)"""
+    spawn_duration: float = 0
+    """process creation duration in seconds"""
+
+
+sigint_returncode: int = -2
+"""Return code of process terminated with SIGINT"""
+
+sigkill_returncode: int = -9
+"""Return code of process terminated with SIGKILL"""
+
+
+class Backend:
+    """Simulated process backend
+
+    Args:
+        script_cb: callback returning script based on process arguments
+
+    """
+
+    def __init__(self, script_cb: Callable[[list[str]], Script]):
+        self._script_cb = script_cb
+        self._processes = []
+        self._next_pids = itertools.count(1)
+
+    @property
+    def processes(self) -> list['Process']:
+        """All created processes"""
+        return self._processes
+
+    async def create_process(self,
+                             args: list[str],
+                             inherit_stdin: bool = True,
+                             capture_output: bool = True,
+                             sigint_timeout: float = 5,
+                             sigkill_timeout: float = 2,
+                             read_queue_size: int = 1024,
+                             pass_fds: Collection[int] = (),
+                             env: dict[str, str] | None = None
+                             ) -> 'Process':
+        """Create simulated process"""
+        script = self._script_cb(args)
+        if script.spawn_duration:
+            await asyncio.sleep(script.spawn_duration)
+
+        process = Process()
+        process._args = args
+        process._pass_fds = list(pass_fds)
+        process._env = dict(env or {})
+        process._script = script
+        process._pid = next(self._next_pids)
+        process._returncode = None
+        process._stdin = None if inherit_stdin else ''
+        process._exit_future = asyncio.get_running_loop().create_future()
+        process._sigint_timeout = sigint_timeout
+        process._sigkill_timeout = sigkill_timeout
+        process._async_group = aio.Group()
+        process._read_queue = aio.Queue(read_queue_size)
+        process._output_lines = 0
+        process._output_bytes = 0
+        process._dropped_lines = 0
+        process._sigint_time = None
+        process._sigkill_time = None
+        process._exit_time = None
+
+        if not capture_output:
+            process._read_queue.close()
+
+        process._async_group.spawn(process._run_loop)
+
+        self._processes.append(process)
+        return process
+
+
+class Process(hat.orchestrator.process.Process):
+    """Simulated process
+
+    For creating new instance of this class see `Backend.create_process`.
+
+    """
+
+    @property
+    def pid(self) -> int:
+        """Simulated process ID"""
+        return self._pid
+
+    @property
+    def returncode(self) -> int | None:
+        """Return code"""
+        return self._returncode
+
+    @property
+    def args(self) -> list[str]:
+        """Process arguments"""
+        return self._args
+
+    @property
+    def pass_fds(self) -> list[int]:
+        """File descriptors passed to process"""
+        return self._pass_fds
+
+    @property
+    def env(self) -> dict[str, str]:
+        """Additional environment variables"""
+        return self._env
+
+    @property
+    def stdin(self) -> str | None:
+        """Data written to stdin (``None`` if stdin is inherited)"""
+        return self._stdin
+
+    def write(self,
+              data: str,
+              close: bool = True):
+        """Write data to stdin"""
+        self._stdin += data
+
+    async def _run_loop(self):
+        try:
+            async with self.async_group.create_subgroup() as subgroup:
+                subgroup.spawn(self._output_loop)
+
+                if self._script.duration is None:
+                    await asyncio.shield(self._exit_future)
+
+                else:
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await aio.wait_for(asyncio.shield(self._exit_future),
+                                           self._script.duration)
+                    self._exit(self._script.returncode)
+
+            self._read_queue.close()
+
+        finally:
+            self.close()
+            await aio.uncancellable(self._close())
+
+    async def _output_loop(self):
+        for delay, line in self._script.output:
+            if delay:
+                await asyncio.sleep(delay)
+
+            if self._read_queue.is_closed:
+                continue
+
+            self._output_lines += 1
+            self._output_bytes += len(line) + 1
+            await self._read_queue.put(line)
+
+    def _exit(self, returncode):
+        if self._returncode is not None or self._exit_future.done():
+            return
+
+        self._returncode = returncode
+        self._exit_time = time.monotonic()
+        self._exit_future.set_result(None)
+
+    async def _close(self):
+        self._read_queue.close()
+
+        if self._returncode is not None:
+            return
+
+        self._sigint_time = time.monotonic()
+        if not self._script.ignore_sigint:
+            self._exit(sigint_returncode)
+            return
+
+        with contextlib.suppress(asyncio.TimeoutError):
+            await aio.wait_for(asyncio.shield(self._exit_future),
+                               self._sigint_timeout)
+
+        if self._returncode is not None:
+            return
+
+        self._sigkill_time = time.monotonic()
+        self._exit(sigkill_returncode)
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):
+    """Event loop with virtual clock
+
+    Instead of waiting for next scheduled timer, event loop advances its
+    virtual clock (available as `time`) to timer's scheduled time. Waiting
+    for I/O events without scheduled timers is not affected.
+
+    """
+
+    def __init__(self, selector: selectors.BaseSelector | None = None):
+        super().__init__(selector)
+        self._virtual_time = 0
+        self._selector.select = _VirtualSelect(self, self._selector.select)
+
+    def time(self) -> float:
+        """Virtual time"""
+        return self._virtual_time
+
+    def advance(self, delta: float):
+        """Advance virtual clock"""
+        self._virtual_time += delta
+
+
+class _VirtualSelect:
+
+    def __init__(self, loop, select):
+        self._loop = loop
+        self._select = select
+
+    def __call__(self, timeout=None):
+        if timeout is None or timeout <= 0:
+            return self._select(timeout)
+
+        result = self._select(0)
+        if not result:
+            self._loop.advance(timeout)
+
+        return result
@@ -0,0 +1,176 @@
+"""Runtime state snapshot
+
+Snapshot contains runtime control state (revive and started flags) of
+each component, identified by component name. Snapshot is written to file
+after state of any component changes. Writes are delayed, so multiple
+changes occurring in short period of time result in single write, and
+skipped if state didn't change (status changes don't affect snapshot).
+Snapshot file is replaced atomically.
+
+Snapshot read during orchestrator startup is used for initializing
+components (see `hat.orchestrator.component.Component`), so components
+stopped by user are not started after orchestrator restart.
+
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+import asyncio
+import functools
+import logging
+import os
+import typing
+
+from hat import aio
+from hat import json
+
+import hat.orchestrator.component
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+
+class State(typing.NamedTuple):
+    revive: bool
+    started: bool
+
+
+class Snapshot(aio.Resource):
+    """Snapshot
+
+    Initial state is read from snapshot file. Pending changes are written
+    when snapshot is closed.
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/snapshot``
+
+    """
+
+    def __init__(self, conf: json.Data):
+        self._path = Path(conf['path'])
+        self._write_delay = conf.get('write_delay', 1)
+        self._states = _read_snapshot(self._path)
+        self._written_states = dict(self._states)
+        self._change_handles = []
+        self._write_task = None
+        self._write_lock = asyncio.Lock()
+        self._async_group = aio.Group()
+
+        self._async_group.spawn(aio.call_on_cancel, self._on_close)
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    def get_state(self, name: str) -> State | None:
+        """Get last known state of component"""
+        return self._states.get(name)
+
+    def set_components(self,
+                       components: Iterable[
+                           hat.orchestrator.component.Component]):
+        """Set components whose state is included in snapshot
+
+        Snapshot contains only state of set components.
+
+        """
+        for handle in self._change_handles:
+            handle.cancel()
+
+        components = list(components)
+        self._states = {component.name: _get_state(component)
+                        for component in components}
+        self._change_handles = [
+            register_cb(
+                functools.partial(self._on_component_change, component))
+            for component in components
+            for register_cb in (component.register_change_cb,
+                                component.register_started_cb)]
+
+        self._schedule_write()
+
+    def _on_component_change(self, component):
+        state = _get_state(component)
+        if self._states.get(component.name) == state:
+            return
+
+        self._states[component.name] = state
+        self._schedule_write()
+
+    def _schedule_write(self):
+        if self._write_task or not self.is_open:
+            return
+
+        if self._states == self._written_states:
+            return
+
+        self._write_task = self._async_group.spawn(self._write_after_delay)
+
+    async def _write_after_delay(self):
+        try:
+            await asyncio.sleep(self._write_delay)
+
+        finally:
+            self._write_task = None
+
+        await aio.uncancellable(self._write())
+
+    async def _write(self):
+        async with self._write_lock:
+            states = dict(self._states)
+            if states == self._written_states:
+                return
+
+            loop = asyncio.get_running_loop()
+
+            try:
+                await loop.run_in_executor(None, _write_snapshot, self._path,
+                                           states)
+
+            except Exception as e:
+                mlog.error("error writing snapshot: %s", e, exc_info=e)
+                return
+
+            self._written_states = states
+            mlog.debug("snapshot written (%s components)", len(states))
+
+    async def _on_close(self):
+        for handle in self._change_handles:
+            handle.cancel()
+
+        await self._write()
+
+
+def _get_state(component):
+    return State(revive=component.revive,
+                 started=component.started)
+
+
+def _read_snapshot(path):
+    if not path.exists():
+        return {}
+
+    try:
+        data = json.decode_file(path, json.Format.JSON)
+        return {name: State(revive=state[0], started=state[1])
+                for name, state in data.items()}
+
+    except Exception as e:
+        mlog.warning("error reading snapshot: %s", e, exc_info=e)
+        return {}
+
+
+def _write_snapshot(path, states):
+    # state is encoded as [revive, started]
+    data = {name: list(state) for name, state in states.items()}
+    tmp_path = path.with_name(f'{path.name}.tmp')
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.encode(data))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
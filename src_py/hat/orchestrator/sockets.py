@@ -0,0 +1,71 @@
+"""Listening sockets owned by orchestrator
+
+Listening sockets are created by orchestrator and passed to component's
+processes (see `hat.orchestrator.process.create_process`). Sockets are
+created once and kept open for the lifetime of component, so connections
+queued while component's process is restarted are not refused.
+
+"""
+
+from pathlib import Path
+import contextlib
+import socket
+import sys
+
+from hat import json
+
+
+def create_socket(conf: json.Data) -> socket.socket:
+    """Create listening socket
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/socket``
+
+    """
+    backlog = conf.get('backlog', 128)
+
+    if conf['type'] == 'tcp':
+        return socket.create_server((conf.get('host', '127.0.0.1'),
+                                     conf['port']),
+                                    backlog=backlog)
+
+    if conf['type'] == 'unix':
+        if sys.platform == 'win32':
+            raise Exception('unix sockets not supported')
+
+        path = Path(conf['path'])
+        with contextlib.suppress(FileNotFoundError):
+            if path.is_socket():
+                path.unlink()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(str(path))
+            sock.listen(backlog)
+
+        except BaseException:
+            sock.close()
+            raise
+
+        return sock
+
+    raise ValueError('unsupported socket type')
+
+
+def close_socket(sock: socket.socket):
+    """Close listening socket
+
+    Path of unix socket is removed.
+
+    """
+    path = None
+    if sock.family == getattr(socket, 'AF_UNIX', None):
+        with contextlib.suppress(OSError):
+            path = sock.getsockname()
+
+    sock.close()
+
+    if path:
+        with contextlib.suppress(OSError):
+            Path(path).unlink()
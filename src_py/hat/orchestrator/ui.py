@@ -1,16 +1,24 @@
 """UI web server"""
 
 from pathlib import Path
+import asyncio
 import contextlib
 import functools
 import importlib.resources
 import logging
 
+import aiohttp.web
+
 from hat import aio
 from hat import json
 from hat import juggler
 
+import hat.orchestrator.common
 import hat.orchestrator.component
+import hat.orchestrator.event_log
+import hat.orchestrator.loop_monitor
+import hat.orchestrator.metrics
+import hat.orchestrator.registry
 
 
 mlog: logging.Logger = logging.getLogger(__name__)
@@ -22,12 +30,36 @@ autoflush_delay: float = 0.2
 
 async def create(host: str,
                  port: int,
-                 components: list[hat.orchestrator.component.Component],
-                 htpasswd: Path | None = None
+                 components: dict[int, hat.orchestrator.component.Component],
+                 htpasswd: Path | None = None,
+                 event_log: hat.orchestrator.event_log.EventLog | None = None,
+                 loop_monitor: (hat.orchestrator.loop_monitor.LoopMonitor |
+                                None) = None,
+                 registry: hat.orchestrator.registry.Registry | None = None
                  ) -> 'WebServer':
-    """Create ui for monitoring and controlling components"""
+    """Create ui for monitoring and controlling components
+
+    Components are identified by their keys in `components`. If `registry`
+    is provided, components can be added and removed.
+
+    Rolling restart request is answered as soon as rolling restart is
+    started - its progress and result are available as ``rollout``
+    property of juggler state. Only single rolling restart can be active
+    at the same time.
+
+    """
     srv = WebServer()
-    srv._components = components
+    srv._components = {}
+    srv._positions = {}
+    srv._component_handles = []
+    srv._registry = registry
+    srv._event_log = event_log
+    srv._loop_monitor = loop_monitor
+    srv._dirty_ids = set()
+    srv._update_handle = None
+    srv._client_count = 0
+    srv._state_change_count = 0
+    srv._rollout_future = None
 
     exit_stack = contextlib.ExitStack()
     try:
@@ -35,24 +67,32 @@ async def create(host: str,
             importlib.resources.as_file(
                 importlib.resources.files(__package__) / 'ui'))
 
-        state = json.Storage({'components': []})
-        for component_id, component in enumerate(components):
-            update_state = functools.partial(
-                _update_component_state, state, component_id, component)
+        srv._state = json.Storage({'components': [],
+                                   'groups': []})
+        srv._set_components(components)
+        exit_stack.callback(srv._cancel_component_handles)
+
+        if loop_monitor:
+            srv._state.set('loop_monitor', loop_monitor.get_data())
             exit_stack.enter_context(
-                component.register_change_cb(update_state))
-            update_state()
+                loop_monitor.register_change_cb(srv._on_loop_monitor_change))
 
-        srv._srv = await juggler.listen(host=host,
-                                        port=port,
-                                        request_cb=srv._on_request,
-                                        static_dir=ui_path,
-                                        htpasswd_file=htpasswd,
-                                        autoflush_delay=autoflush_delay,
-                                        state=state)
+        srv._srv = await juggler.listen(
+            host=host,
+            port=port,
+            connection_cb=srv._on_connection,
+            request_cb=srv._on_request,
+            static_dir=ui_path,
+            htpasswd_file=htpasswd,
+            autoflush_delay=autoflush_delay,
+            state=srv._state,
+            additional_routes=[aiohttp.web.get('/metrics',
+                                               srv._on_metrics)])
 
         try:
             srv.async_group.spawn(aio.call_on_cancel, exit_stack.close)
+            srv.async_group.spawn(aio.call_on_cancel,
+                                  srv._cancel_update_state)
 
         except BaseException:
             await aio.uncancellable(srv.async_close())
@@ -77,27 +117,166 @@ class WebServer(aio.Resource):
         """Async group"""
         return self._srv.async_group
 
+    @property
+    def client_count(self) -> int:
+        """Number of connected juggler clients"""
+        return self._client_count
+
+    @property
+    def state_change_count(self) -> int:
+        """Number of juggler state changes
+
+        Multiple state changes can be synchronized with clients as single
+        state update.
+
+        """
+        return self._state_change_count
+
+    def set_components(self,
+                       components: dict[int,
+                                        hat.orchestrator.component.Component]
+                       ):
+        """Set components
+
+        State of all components is recreated. Change callbacks of previous
+        components are unregistered.
+
+        """
+        self._set_components(components)
+        self._state_change_count += 1
+
+    def _set_components(self, components):
+        self._cancel_component_handles()
+        self._cancel_update_state()
+        self._dirty_ids = set()
+
+        self._components = components
+        self._positions = {component_id: position
+                           for position, component_id
+                           in enumerate(components.keys())}
+        self._component_handles = [
+            component.register_change_cb(
+                functools.partial(self._on_component_change, component_id))
+            for component_id, component in components.items()]
+
+        self._state.set([], {
+            **self._state.data,
+            'components': [
+                hat.orchestrator.common.get_component_info(component_id,
+                                                           component)
+                for component_id, component in components.items()],
+            'groups': hat.orchestrator.common.get_groups_info(
+                components.values())})
+
+    def _cancel_component_handles(self):
+        for handle in self._component_handles:
+            handle.cancel()
+        self._component_handles = []
+
+    def _on_connection(self, conn):
+        self._client_count += 1
+        conn.async_group.spawn(aio.call_on_cancel,
+                               self._on_connection_close)
+
+    def _on_connection_close(self):
+        self._client_count -= 1
+
+    async def _on_metrics(self, request):
+        text = await hat.orchestrator.metrics.collect(
+            self._components.values(), self)
+        return aiohttp.web.Response(
+            body=text.encode('utf-8'),
+            headers={'Content-Type': hat.orchestrator.metrics.content_type})
+
     async def _on_request(self, conn, name, data):
-        if name == 'start':
-            component = self._components[data['id']]
-            component.start()
+        if name == 'events':
+            return hat.orchestrator.common.get_events(self._event_log, data)
 
-        elif name == 'stop':
-            component = self._components[data['id']]
-            component.stop()
+        if name == 'rolling_restart':
+            return self._start_rolling_restart(data)
 
-        elif name == 'revive':
-            component = self._components[data['id']]
-            component.set_revive(bool(data['value']))
+        if name in hat.orchestrator.common.registry_actions:
+            return await hat.orchestrator.common.control_registry(
+                self._registry, name, data)
 
-        else:
+        if name not in hat.orchestrator.common.control_actions:
             raise Exception('received invalid message type')
 
+        hat.orchestrator.common.control_components(self._components, name,
+                                                   data)
+
+    def _start_rolling_restart(self, data):
+        if self._rollout_future and not self._rollout_future.done():
+            raise Exception('rolling restart already active')
+
+        # invalid selection is reported as request error
+        total = len(hat.orchestrator.common.select_components(
+            self._components, data))
+
+        self._set_rollout('running', 0, total)
+        self._rollout_future = self.async_group.spawn(self._rolling_restart,
+                                                      data, total)
+
+    async def _rolling_restart(self, data, total):
+        processed = 0
+
+        def on_progress(count, _):
+            nonlocal processed
+            processed = count
+            self._set_rollout('running', processed, total)
+
+        try:
+            await hat.orchestrator.common.rolling_restart(
+                self._components, data, on_progress)
+            self._set_rollout('finished', total, total)
+
+        except Exception as e:
+            self._set_rollout('aborted', processed, total, str(e))
+
+    def _set_rollout(self, status, processed, total, error=None):
+        self._state.set('rollout', {'status': status,
+                                    'processed': processed,
+                                    'total': total,
+                                    'error': error})
+        self._state_change_count += 1
+
+    def _on_loop_monitor_change(self):
+        self._state.set('loop_monitor', self._loop_monitor.get_data())
+        self._state_change_count += 1
+
+    def _on_component_change(self, component_id):
+        self._dirty_ids.add(component_id)
+        if self._update_handle:
+            return
+
+        loop = asyncio.get_running_loop()
+        self._update_handle = loop.call_soon(self._update_state)
+
+    def _update_state(self):
+        self._update_handle = None
+
+        components = list(self._state.get('components'))
+        groups_changed = False
+        for component_id in self._dirty_ids:
+            component = self._components[component_id]
+            info = hat.orchestrator.common.get_component_info(component_id,
+                                                              component)
+            components[self._positions[component_id]] = info
+            groups_changed = groups_changed or component.group is not None
+        self._dirty_ids = set()
+
+        if groups_changed:
+            self._state.set([], {
+                **self._state.data,
+                'components': components,
+                'groups': hat.orchestrator.common.get_groups_info(
+                    self._components.values())})
+
+        else:
+            self._state.set('components', components)
+        self._state_change_count += 1
 
-def _update_component_state(state, component_id, component):
-    data = {'id': component_id,
-            'name': component.name,
-            'delay': component.delay,
-            'revive': component.revive,
-            'status': component.status.name}
-    state.set(['components', component_id], data)
+    def _cancel_update_state(self):
+        if self._update_handle:
+            self._update_handle.cancel()
+            self._update_handle = None
@@ -0,0 +1,357 @@
+"""Zygote (fork server) for Python components
+
+Zygote is Python interpreter process which imports configured modules
+once and creates component processes by forking itself, so component
+processes don't pay for interpreter startup and imports of preimported
+modules (memory of preimported modules is also shared with copy-on-write).
+Process created by zygote executes module (first argument) as
+``__main__`` module, same as ``python -m`` - remaining arguments are
+available in `sys.argv`.
+
+Zygote process is implemented by `hat.orchestrator.zygote_server`.
+Processes created by zygote are not children of orchestrator's process -
+they are supervised as other processes (`hat.orchestrator.process.Process`
+instances), with exit detected by process file descriptor and return code
+reported by zygote. Preimported modules should not start threads. Zygotes
+are supported only on Linux.
+
+"""
+
+from collections.abc import Collection
+import asyncio
+import contextlib
+import importlib.resources
+import itertools
+import logging
+import os
+import signal
+import socket
+import sys
+
+from hat import aio
+from hat import json
+
+import hat.orchestrator.process
+
+
+mlog: logging.Logger = logging.getLogger(__name__)
+"""Module logger"""
+
+close_timeout: float = 5
+"""Maximum duration (in seconds) of waiting for zygote process exit"""
+
+
+async def create_zygote(conf: json.Data) -> 'Zygote':
+    """Create zygote
+
+    Zygote is created once all preimported modules are imported.
+
+    Args:
+        conf: configuration defined by
+            ``hat-orchestrator://orchestrator.yaml#/$defs/zygote``
+
+    Raises:
+        Exception: zygote process creation error
+
+    """
+    if sys.platform != 'linux':
+        raise Exception('zygotes not supported')
+
+    zygote = Zygote()
+    zygote._name = conf['name']
+    zygote._next_ids = itertools.count(1)
+    zygote._create_futures = {}
+    zygote._children = {}
+    zygote._async_group = aio.Group()
+
+    zygote._sock, zygote_sock = socket.socketpair(socket.AF_UNIX,
+                                                  socket.SOCK_SEQPACKET)
+
+    try:
+        zygote._sock.setblocking(False)
+
+        with zygote_sock:
+            zygote._process = await asyncio.create_subprocess_exec(
+                conf.get('python', sys.executable),
+                '-c', _get_server_source(),
+                str(zygote_sock.fileno()),
+                json.encode(conf.get('modules', [])),
+                pass_fds=[zygote_sock.fileno()],
+                preexec_fn=hat.orchestrator.process.preexec_fn)
+
+        msg = await zygote._receive()
+        if msg['type'] != 'ready':
+            raise Exception('invalid zygote message')
+
+    except BaseException:
+        zygote._sock.close()
+        if zygote._process is not None:
+            await aio.uncancellable(zygote._stop_process())
+        raise
+
+    mlog.info("zygote %s (%s) ready", zygote.name, zygote.pid)
+
+    zygote._async_group.spawn(zygote._receive_loop)
+    zygote._async_group.spawn(aio.call_on_cancel, zygote._on_close)
+
+    return zygote
+
+
+class Zygote(aio.Resource):
+    """Zygote
+
+    For creating new instance of this class see `create_zygote` coroutine.
+
+    """
+
+    _process = None
+
+    @property
+    def async_group(self) -> aio.Group:
+        """Async group"""
+        return self._async_group
+
+    @property
+    def name(self) -> str:
+        """Zygote name"""
+        return self._name
+
+    @property
+    def pid(self) -> int:
+        """Zygote process ID"""
+        return self._process.pid
+
+    async def create_process(self,
+                             args: list[str],
+                             inherit_stdin: bool = True,
+                             capture_output: bool = True,
+                             sigint_timeout: float = 5,
+                             sigkill_timeout: float = 2,
+                             read_queue_size: int = 1024,
+                             pass_fds: Collection[int] = (),
+                             env: dict[str, str] | None = None
+                             ) -> hat.orchestrator.process.Process:
+        """Create process by forking zygote
+
+        This method has the same signature as
+        `hat.orchestrator.process.create_process`. First argument is name of
+        executed module.
+
+        Raises:
+            Exception: process creation error
+
+        """
+        if not self.is_open:
+            raise Exception('zygote closed')
+
+        if not args:
+            raise Exception('module not provided')
+
+        process = hat.orchestrator.process._create_process_instance(
+            sigint_timeout, sigkill_timeout, read_queue_size)
+
+        loop = asyncio.get_running_loop()
+        req_id = next(self._next_ids)
+        future = loop.create_future()
+        stdin_r, stdin_w = os.pipe() if not inherit_stdin else (None, None)
+        stdout_r, stdout_w = (os.pipe() if capture_output
+                              else (None, os.open(os.devnull, os.O_WRONLY)))
+        stdin_transport = None
+
+        try:
+            fds = [*([stdin_r] if stdin_r is not None else []),
+                   stdout_w,
+                   *pass_fds]
+
+            self._create_futures[req_id] = future
+            socket.send_fds(self._sock,
+                            [json.encode({'id': req_id,
+                                          'args': args,
+                                          'stdin': stdin_r is not None,
+                                          'env': env or {}}
+                                         ).encode('utf-8')],
+                            fds)
+
+            if stdin_w is not None:
+                stdin_pipe = open(stdin_w, 'wb', buffering=0)
+                stdin_w = None
+                try:
+                    stdin_transport, _ = await loop.connect_write_pipe(
+                        asyncio.Protocol, stdin_pipe)
+
+                except BaseException:
+                    stdin_pipe.close()
+                    raise
+
+            if stdout_r is not None:
+                stdout_pipe = open(stdout_r, 'rb', buffering=0)
+                stdout_r = None
+                process._stdout, process._stdout_transport = \
+                    await hat.orchestrator.process._connect_read_pipe(
+                        stdout_pipe)
+
+            child = await future
+
+        except BaseException:
+            if process._stdout_transport:
+                process._stdout_transport.close()
+            if stdin_transport:
+                stdin_transport.close()
+            raise
+
+        finally:
+            self._create_futures.pop(req_id, None)
+            for fd in (stdin_r, stdin_w, stdout_r, stdout_w):
+                if fd is not None:
+                    os.close(fd)
+
+        child._stdin = stdin_transport
+        process._process = child
+        process._async_group.spawn(process._read_loop)
+
+        return process
+
+    async def _receive(self):
+        loop = asyncio.get_running_loop()
+        data = await loop.sock_recv(self._sock, 1024 * 1024)
+        if not data:
+            raise ConnectionError()
+
+        return json.decode(data.decode('utf-8'))
+
+    async def _receive_loop(self):
+        try:
+            while True:
+                self._process_msg(await self._receive())
+
+        except ConnectionError:
+            mlog.warning("zygote %s connection closed", self.name)
+
+        except Exception as e:
+            mlog.error("zygote %s receive loop error: %s", self.name, e,
+                       exc_info=e)
+
+        finally:
+            self.close()
+
+    def _process_msg(self, msg):
+        if msg['type'] == 'created':
+            child = _Child(msg['pid'])
+            self._children[child.pid] = child
+
+            future = self._create_futures.get(msg['id'])
+            if future and not future.done():
+                future.set_result(child)
+
+            else:
+                child.send_signal(signal.SIGKILL)
+
+        elif msg['type'] == 'error':
+            future = self._create_futures.get(msg['id'])
+            if future and not future.done():
+                future.set_exception(Exception(msg['error']))
+
+        elif msg['type'] == 'exited':
+            child = self._children.pop(msg['pid'], None)
+            if child:
+                child._set_exited(msg['returncode'])
+
+        else:
+            raise Exception('invalid zygote message')
+
+    async def _on_close(self):
+        for future in self._create_futures.values():
+            if not future.done():
+                future.set_exception(Exception('zygote closed'))
+
+        # exit of processes created by zygote is still notified by zygote
+        with contextlib.suppress(Exception):
+            while self._children:
+                self._process_msg(await self._receive())
+
+        for child in self._children.values():
+            child._watch_pidfd()
+
+        self._sock.close()
+        await self._stop_process()
+
+    async def _stop_process(self):
+        with contextlib.suppress(asyncio.TimeoutError):
+            await aio.wait_for(self._process.wait(), close_timeout)
+            return
+
+        with contextlib.suppress(Exception):
+            self._process.kill()
+
+        await self._process.wait()
+
+
+class _Child:
+    # subset of asyncio.subprocess.Process interface (see
+    # hat.orchestrator.process.Process)
+
+    def __init__(self, pid):
+        self._pid = pid
+        self._stdin = None
+        self._returncode = None
+        self._exit_future = asyncio.get_running_loop().create_future()
+
+        try:
+            self._pidfd = os.pidfd_open(pid)
+
+        except ProcessLookupError:
+            self._pidfd = None
+
+    @property
+    def pid(self):
+        return self._pid
+
+    @property
+    def returncode(self):
+        return self._returncode
+
+    @property
+    def stdin(self):
+        return self._stdin
+
+    async def wait(self):
+        await asyncio.shield(self._exit_future)
+
+    def send_signal(self, sig):
+        if self._pidfd is None:
+            return
+        signal.pidfd_send_signal(self._pidfd, sig)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def _set_exited(self, returncode):
+        if self._exit_future.done():
+            return
+
+        self._returncode = returncode
+        self._close_pidfd()
+        self._exit_future.set_result(None)
+
+    def _watch_pidfd(self):
+        # used if zygote doesn't notify exit (return code is not available)
+        if self._pidfd is None:
+            self._set_exited(None)
+            return
+
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._pidfd, self._set_exited, None)
+
+    def _close_pidfd(self):
+        if self._pidfd is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(self._pidfd)
+        os.close(self._pidfd)
+        self._pidfd = None
+
+
+def _get_server_source():
+    return importlib.resources.files('hat.orchestrator').joinpath(
+        'zygote_server.py').read_text()
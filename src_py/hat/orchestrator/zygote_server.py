@@ -0,0 +1,224 @@
+"""Zygote server
+
+This module is executed by zygote process (see `hat.orchestrator.zygote`)
+as ``python -c`` script. It depends only on standard library, so it can be
+executed with any Python interpreter.
+
+Command line arguments are zygote's end of control socket (file
+descriptor) and JSON encoded list of preimported modules.
+
+Control socket is ``SOCK_SEQPACKET`` unix socket - each message is JSON
+encoded object. After modules are imported, zygote sends ``ready``
+message. Each request (``id``, ``args`` and ``stdin`` properties) creates
+new process - request contains file descriptors (optional stdin, stdout
+and passed file descriptors) and is answered with ``created`` (``id`` and
+``pid`` properties) or ``error`` (``id`` and ``error`` properties)
+message. Exit of each created process is notified with ``exited`` message
+(``pid`` and ``returncode`` properties).
+
+When control socket is closed, zygote exits after all created processes
+exit.
+
+"""
+
+import atexit
+import ctypes
+import fcntl
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import socket
+import sys
+import traceback
+
+
+max_msg_size = 1024 * 1024
+max_fds = 256
+listen_fds_start = 3
+
+
+def main():
+    sock = socket.socket(fileno=int(sys.argv[1]))
+
+    # zygote is closed by closing control socket
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    for module in json.loads(sys.argv[2]):
+        importlib.import_module(module)
+
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *args: None)
+
+    children = set()
+    _send(sock, {'type': 'ready'})
+
+    while True:
+        readable, _, _ = select.select([sock, wakeup_r], [], [])
+
+        if wakeup_r in readable:
+            while _read_nonblocking(wakeup_r):
+                pass
+            _reap_children(sock, children)
+
+        if sock not in readable:
+            continue
+
+        data, fds, _, _ = socket.recv_fds(sock, max_msg_size, max_fds)
+        if not data:
+            break
+
+        req = json.loads(data)
+        pid = _fork(req, fds, [sock.fileno(), wakeup_r, wakeup_w])
+        if pid is None:
+            _send(sock, {'type': 'error',
+                         'id': req['id'],
+                         'error': 'fork failed'})
+            continue
+
+        children.add(pid)
+        _send(sock, {'type': 'created',
+                     'id': req['id'],
+                     'pid': pid})
+
+    sock.close()
+
+    while children:
+        pid, _ = os.waitpid(-1, 0)
+        children.discard(pid)
+
+
+def _send(sock, msg):
+    try:
+        sock.send(json.dumps(msg).encode('utf-8'))
+
+    except OSError:
+        pass
+
+
+def _read_nonblocking(fd):
+    try:
+        return os.read(fd, 1024)
+
+    except BlockingIOError:
+        return b''
+
+
+def _reap_children(sock, children):
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+
+        except ChildProcessError:
+            break
+
+        if not pid:
+            break
+
+        children.discard(pid)
+        _send(sock, {'type': 'exited',
+                     'pid': pid,
+                     'returncode': os.waitstatus_to_exitcode(status)})
+
+
+def _fork(req, fds, close_fds):
+    try:
+        pid = os.fork()
+
+    except OSError:
+        pid = None
+
+    if pid == 0:
+        _run_child(req, fds, close_fds)
+
+    for fd in fds:
+        os.close(fd)
+
+    return pid
+
+
+def _run_child(req, fds, close_fds):
+    returncode = 1
+
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        for fd in close_fds:
+            os.close(fd)
+
+        # child process is killed if zygote exits
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.prctl(1, signal.SIGKILL, 0, 0, 0)
+
+        stdin_fd = fds.pop(0) if req['stdin'] else None
+        stdout_fd = fds.pop(0)
+        _move_fds(stdin_fd, stdout_fd, fds)
+
+        if fds:
+            os.environ['LISTEN_FDS'] = str(len(fds))
+            os.environ['LISTEN_PID'] = str(os.getpid())
+
+        os.environ.update(req.get('env', {}))
+
+        sys.argv = list(req['args'])
+        runpy.run_module(req['args'][0], run_name='__main__', alter_sys=True)
+        returncode = 0
+
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+
+        elif isinstance(e.code, int):
+            returncode = e.code
+
+        else:
+            print(e.code, file=sys.stderr)
+
+    except BaseException:
+        traceback.print_exc()
+
+    finally:
+        try:
+            atexit._run_exitfuncs()
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+        finally:
+            os._exit(returncode)
+
+
+def _move_fds(stdin_fd, stdout_fd, pass_fds):
+    # all file descriptors are first moved above their target file
+    # descriptors
+    min_fd = max(stdin_fd or 0, stdout_fd, *pass_fds,
+                 listen_fds_start + len(pass_fds)) + 1
+
+    def move(fd):
+        tmp_fd = fcntl.fcntl(fd, fcntl.F_DUPFD, min_fd)
+        os.close(fd)
+        return tmp_fd
+
+    targets = {}
+    if stdin_fd is not None:
+        targets[0] = move(stdin_fd)
+    targets[1] = move(stdout_fd)
+    targets[2] = targets[1]
+    for i, fd in enumerate(pass_fds):
+        targets[listen_fds_start + i] = move(fd)
+
+    for target, fd in targets.items():
+        os.dup2(fd, target)
+
+    for fd in set(targets.values()):
+        os.close(fd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+from pathlib import Path
+import asyncio
+import datetime
+import importlib.metadata
+import json
+import platform
+import sys
+import time
+
+import psutil
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--perf-output', metavar='PATH', type=Path,
+                     default=Path('build/perf/results.json'),
+                     help="benchmark results output path")
+    parser.addoption('--event-loop', choices=['asyncio', 'uvloop'],
+                     default='asyncio',
+                     help="event loop implementation")
+
+
+def pytest_configure(config):
+    if config.getoption('--event-loop') != 'uvloop':
+        return
+
+    try:
+        import uvloop
+
+    except ImportError:
+        raise pytest.UsageError('uvloop not available')
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+class Results:
+
+    def __init__(self, event_loop):
+        self._event_loop = event_loop
+        self._results = []
+
+    @property
+    def event_loop(self):
+        return self._event_loop
+
+    @property
+    def results(self):
+        return self._results
+
+    def add(self, name, params, values):
+        result = {'name': name,
+                  'params': {'event_loop': self._event_loop, **params},
+                  'values': values}
+        self._results.append(result)
+        print(f"\n{json.dumps(result)}")
+
+
+class Measurement:
+
+    def __init__(self):
+        self._process = psutil.Process()
+        self._start_time = None
+        self._start_cpu = None
+        self.duration = None
+        self.cpu = None
+
+    def __enter__(self):
+        self._start_cpu = _get_cpu_time(self._process)
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.duration = time.perf_counter() - self._start_time
+        self.cpu = _get_cpu_time(self._process) - self._start_cpu
+
+
+@pytest.fixture(scope='session')
+def event_loop_name(request):
+    return request.config.getoption('--event-loop')
+
+
+@pytest.fixture(scope='session')
+def results(request, event_loop_name):
+    results = Results(event_loop_name)
+    yield results
+
+    path = request.config.getoption('--perf-output')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'version': _get_version(),
+                                'python': sys.version,
+                                'platform': platform.platform(),
+                                'event_loop': results.event_loop,
+                                'timestamp': datetime.datetime.now(
+                                    datetime.timezone.utc).isoformat(),
+                                'results': results.results},
+                               indent=2))
+
+
+@pytest.fixture
+def measure():
+    return Measurement
+
+
+@pytest.fixture
+def get_rss():
+    return lambda: psutil.Process().memory_info().rss
+
+
+def _get_cpu_time(process):
+    cpu_times = process.cpu_times()
+    return cpu_times.user + cpu_times.system
+
+
+def _get_version():
+    try:
+        return importlib.metadata.version('hat-orchestrator')
+
+    except importlib.metadata.PackageNotFoundError:
+        return None
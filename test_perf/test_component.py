@@ -0,0 +1,92 @@
+import asyncio
+import gc
+import shutil
+import sys
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="sleep executable not available")
+
+
+def create_components(count):
+    sleep_path = shutil.which('sleep')
+    return [Component({'name': f'c{i}',
+                       'args': [sleep_path, '3600'],
+                       'auto_start': False,
+                       'start_delay': 0,
+                       'create_timeout': 600,
+                       'sigint_timeout': 5,
+                       'sigkill_timeout': 5})
+            for i in range(count)]
+
+
+async def wait_condition(components, condition):
+    event = asyncio.Event()
+
+    def on_change():
+        if all(condition(component) for component in components):
+            event.set()
+
+    handles = [component.register_change_cb(on_change)
+               for component in components]
+    try:
+        on_change()
+        await event.wait()
+
+    finally:
+        for handle in handles:
+            handle.cancel()
+
+
+@pytest.mark.parametrize('count', [10, 100, 1000])
+async def test_start_stop_restart(results, measure, get_rss, count):
+    gc.collect()
+    rss = get_rss()
+
+    components = create_components(count)
+    await asyncio.sleep(0.1)
+
+    with measure() as start:
+        for component in components:
+            component.start()
+        await wait_condition(components,
+                             lambda c: c.status == Status.RUNNING)
+
+    rss_per_component = (get_rss() - rss) / count
+
+    with measure() as restart:
+        for component in components:
+            component.restart()
+        await wait_condition(components,
+                             lambda c: (c.status == Status.RUNNING and
+                                        c.start_count == 2))
+
+    with measure() as stop:
+        for component in components:
+            component.stop()
+        await wait_condition(components,
+                             lambda c: c.status == Status.STOPPED)
+
+    with measure() as close:
+        await asyncio.gather(*(component.async_close()
+                               for component in components))
+
+    results.add('component_start_stop_restart',
+                {'count': count},
+                {'start_duration': start.duration,
+                 'start_per_second': count / start.duration,
+                 'start_cpu': start.cpu,
+                 'restart_duration': restart.duration,
+                 'restart_per_second': count / restart.duration,
+                 'restart_cpu': restart.cpu,
+                 'stop_duration': stop.duration,
+                 'stop_per_second': count / stop.duration,
+                 'stop_cpu': stop.cpu,
+                 'close_duration': close.duration,
+                 'rss_per_component': rss_per_component,
+                 'cpu_per_component': (start.cpu + restart.cpu +
+                                       stop.cpu) / count})
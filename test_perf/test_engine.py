@@ -0,0 +1,143 @@
+import asyncio
+import contextlib
+import gc
+import shutil
+import sys
+import tracemalloc
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.engine
+import hat.orchestrator.sim
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="sleep executable not available")
+
+
+@contextlib.asynccontextmanager
+async def create_components(engine, confs, **kwargs):
+    if engine == 'default':
+        components = [Component(conf, **kwargs) for conf in confs]
+        yield components
+
+        await asyncio.gather(*(component.async_close()
+                               for component in components))
+        return
+
+    engine = hat.orchestrator.engine.Engine()
+    try:
+        yield [engine.create_component(conf, **kwargs) for conf in confs]
+
+    finally:
+        await engine.async_close()
+
+
+async def wait_condition(components, condition):
+    event = asyncio.Event()
+
+    def on_change():
+        if all(condition(component) for component in components):
+            event.set()
+
+    handles = [component.register_change_cb(on_change)
+               for component in components]
+    try:
+        on_change()
+        await event.wait()
+
+    finally:
+        for handle in handles:
+            handle.cancel()
+
+
+@pytest.mark.parametrize('engine', ['default', 'compact'])
+@pytest.mark.parametrize('started', [False, True])
+async def test_memory(results, get_rss, engine, started):
+    count = 2000
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    confs = [{'name': f'c{i}',
+              'args': [],
+              'auto_start': started,
+              'start_delay': 0}
+             for i in range(count)]
+
+    gc.collect()
+    rss = get_rss()
+    tracemalloc.start()
+
+    try:
+        async with create_components(
+                engine, confs,
+                create_process=backend.create_process) as components:
+            await wait_condition(
+                components,
+                lambda c: c.status == (Status.RUNNING if started
+                                       else Status.STOPPED))
+            await asyncio.sleep(0.1)
+
+            gc.collect()
+            size, _ = tracemalloc.get_traced_memory()
+            rss_per_component = (get_rss() - rss) / count
+            task_count = len(asyncio.all_tasks())
+
+            # simulated processes are allocated independently of engine
+            process_size = 0
+            if started:
+                snapshot = tracemalloc.take_snapshot()
+                process_size = sum(
+                    stat.size for stat in snapshot.filter_traces([
+                        tracemalloc.Filter(True, hat.orchestrator.sim.__file__)
+                        ]).statistics('filename'))
+
+    finally:
+        tracemalloc.stop()
+
+    results.add('engine_memory',
+                {'engine': engine,
+                 'started': started,
+                 'count': count},
+                {'traced_per_component': (size - process_size) / count,
+                 'rss_per_component': rss_per_component,
+                 'tasks_per_component': task_count / count})
+
+
+@pytest.mark.parametrize('engine', ['default', 'compact'])
+@pytest.mark.parametrize('count', [100, 1000])
+async def test_start_stop(results, measure, engine, count):
+    sleep_path = shutil.which('sleep')
+    confs = [{'name': f'c{i}',
+              'args': [sleep_path, '3600'],
+              'auto_start': False,
+              'start_delay': 0,
+              'create_timeout': 600,
+              'sigint_timeout': 5,
+              'sigkill_timeout': 5}
+             for i in range(count)]
+
+    async with create_components(engine, confs) as components:
+        await asyncio.sleep(0.1)
+
+        with measure() as start:
+            for component in components:
+                component.start()
+            await wait_condition(components,
+                                 lambda c: c.status == Status.RUNNING)
+
+        with measure() as stop:
+            for component in components:
+                component.stop()
+            await wait_condition(components,
+                                 lambda c: c.status == Status.STOPPED)
+
+    results.add('engine_start_stop',
+                {'engine': engine,
+                 'count': count},
+                {'start_duration': start.duration,
+                 'start_per_second': count / start.duration,
+                 'start_cpu': start.cpu,
+                 'stop_duration': stop.duration,
+                 'stop_per_second': count / stop.duration,
+                 'stop_cpu': stop.cpu})
@@ -0,0 +1,66 @@
+import asyncio
+import sys
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.notify
+
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux',
+                                reason="notify socket not supported")
+
+
+@pytest.mark.parametrize('count', [1, 10])
+@pytest.mark.parametrize('heartbeat_count', [10_000])
+async def test_heartbeats(results, measure, monkeypatch, tmp_path, count,
+                          heartbeat_count):
+    path = str(tmp_path / 'notify')
+    code = ('import os, socket\n'
+            's = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)\n'
+            's.connect(os.environ["NOTIFY_SOCKET"])\n'
+            f'for _ in range({heartbeat_count}):\n'
+            '    s.send(b"WATCHDOG=1")\n')
+    confs = [{'name': f'c{i}',
+              'args': [sys.executable, '-c', code],
+              'auto_start': False,
+              'start_delay': 0,
+              'watchdog_timeout': 60}
+             for i in range(count)]
+
+    notify_count = 0
+    notify = Component.notify
+
+    def count_notify(self, fields):
+        nonlocal notify_count
+        notify_count += 1
+        notify(self, fields)
+
+    monkeypatch.setattr(Component, 'notify', count_notify)
+
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    components = [Component(conf, env={'NOTIFY_SOCKET': path})
+                  for conf in confs]
+    server.set_components(components)
+
+    with measure() as m:
+        for component in components:
+            component.start()
+
+        while not all(component.start_count and
+                      component.status == Status.STOPPED
+                      for component in components):
+            await asyncio.sleep(0.01)
+
+    for component in components:
+        await component.async_close()
+    await server.async_close()
+
+    results.add('notify_heartbeats',
+                {'count': count,
+                 'heartbeat_count': heartbeat_count},
+                {'duration': m.duration,
+                 'cpu': m.cpu,
+                 'heartbeats_per_second': count * heartbeat_count / m.duration,
+                 'heartbeats_per_notify': (count * heartbeat_count /
+                                           max(notify_count, 1))})
@@ -0,0 +1,78 @@
+import asyncio
+import contextlib
+import io
+import sys
+
+import pytest
+
+from hat import aio
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.process
+
+
+def get_args(line_count, line_size):
+    return [sys.executable, '-c',
+            f'import sys\n'
+            f'line = "x" * {line_size} + "\\n"\n'
+            f'for _ in range({line_count}):\n'
+            f'    sys.stdout.write(line)\n']
+
+
+@pytest.mark.parametrize('line_size', [10, 100, 1000])
+async def test_process_output(results, measure, line_size):
+    line_count = 100_000
+
+    with measure() as m:
+        process = await hat.orchestrator.process.create_process(
+            get_args(line_count, line_size))
+
+        with contextlib.suppress(ConnectionError):
+            while True:
+                await process.readline()
+
+        await process.wait_closed()
+
+    assert process.output_lines == line_count
+
+    results.add('process_output',
+                {'line_count': line_count,
+                 'line_size': line_size},
+                {'duration': m.duration,
+                 'cpu': m.cpu,
+                 'lines_per_second': line_count / m.duration,
+                 'bytes_per_second': process.output_bytes / m.duration})
+
+
+@pytest.mark.parametrize('line_size', [10, 100, 1000])
+async def test_component_output(results, measure, line_size):
+    line_count = 100_000
+
+    component = Component({'name': 'c',
+                           'args': get_args(line_count, line_size),
+                           'auto_start': False,
+                           'start_delay': 0})
+    status_queue = aio.Queue()
+    component.register_change_cb(
+        lambda: status_queue.put_nowait(component.status))
+    await asyncio.sleep(0.1)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with measure() as m:
+            component.start()
+            while await status_queue.get() != Status.RUNNING:
+                pass
+            while await status_queue.get() != Status.STOPPED:
+                pass
+
+    assert component.output_lines == line_count
+
+    results.add('component_output',
+                {'line_count': line_count,
+                 'line_size': line_size},
+                {'duration': m.duration,
+                 'cpu': m.cpu,
+                 'lines_per_second': line_count / m.duration,
+                 'bytes_per_second': component.output_bytes / m.duration})
+
+    await component.async_close()
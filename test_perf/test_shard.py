@@ -0,0 +1,152 @@
+import asyncio
+import contextlib
+import io
+import shutil
+import sys
+import time
+
+import pytest
+
+from hat import aio
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.shard
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="sleep executable not available")
+
+
+@contextlib.asynccontextmanager
+async def create_components(shards, confs):
+    if not shards:
+        components = [Component(conf) for conf in confs]
+        yield components
+
+        await asyncio.gather(*(component.async_close()
+                               for component in components))
+        return
+
+    sharding = hat.orchestrator.shard.Sharding(shards)
+    try:
+        yield [await sharding.create_component(conf) for conf in confs]
+
+    finally:
+        await sharding.async_close()
+
+
+async def wait_condition(components, condition):
+    event = asyncio.Event()
+
+    def on_change():
+        if all(condition(component) for component in components):
+            event.set()
+
+    handles = [component.register_change_cb(on_change)
+               for component in components]
+    try:
+        on_change()
+        await event.wait()
+
+    finally:
+        for handle in handles:
+            handle.cancel()
+
+
+async def measure_lag(lags, interval=0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+@pytest.mark.parametrize('shards', [0, 1, 4])
+@pytest.mark.parametrize('count', [100, 1000])
+async def test_start_stop(results, measure, shards, count):
+    sleep_path = shutil.which('sleep')
+    confs = [{'name': f'c{i}',
+              'args': [sleep_path, '3600'],
+              'auto_start': False,
+              'start_delay': 0,
+              'create_timeout': 600,
+              'sigint_timeout': 5,
+              'sigkill_timeout': 5}
+             for i in range(count)]
+
+    async with create_components(shards, confs) as components:
+        await asyncio.sleep(0.1)
+
+        with measure() as start:
+            for component in components:
+                component.start()
+            await wait_condition(components,
+                                 lambda c: c.status == Status.RUNNING)
+
+        with measure() as stop:
+            for component in components:
+                component.stop()
+            await wait_condition(components,
+                                 lambda c: c.status == Status.STOPPED)
+
+    results.add('shard_start_stop',
+                {'shards': shards,
+                 'count': count},
+                {'start_duration': start.duration,
+                 'start_per_second': count / start.duration,
+                 'start_cpu': start.cpu,
+                 'stop_duration': stop.duration,
+                 'stop_per_second': count / stop.duration,
+                 'stop_cpu': stop.cpu})
+
+
+@pytest.mark.parametrize('shards', [0, 1, 4])
+@pytest.mark.parametrize('tail', [False, True])
+async def test_output(results, measure, shards, tail):
+    count = 4
+    line_count = 25_000
+    confs = [{'name': f'c{i}',
+              'args': [sys.executable, '-c',
+                       f'for _ in range({line_count}): print("x" * 100)'],
+              'auto_start': False,
+              'start_delay': 0}
+             for i in range(count)]
+
+    lags = []
+    received = 0
+
+    def on_output(line):
+        nonlocal received
+        received += 1
+
+    async with create_components(shards, confs) as components:
+        if tail:
+            for component in components:
+                component.register_output_cb(on_output)
+        await asyncio.sleep(0.1)
+
+        async with aio.Group() as group:
+            group.spawn(measure_lag, lags)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                with measure() as m:
+                    for component in components:
+                        component.start()
+                    await wait_condition(
+                        components,
+                        lambda c: c.start_count and c.status == Status.STOPPED)
+
+        output_lines = sum(component.output_lines
+                           for component in components)
+
+    assert output_lines == count * line_count
+    assert received == (output_lines if tail else 0)
+
+    results.add('shard_output',
+                {'shards': shards,
+                 'tail': tail,
+                 'count': count,
+                 'line_count': line_count},
+                {'duration': m.duration,
+                 'cpu': m.cpu,
+                 'lines_per_second': output_lines / m.duration,
+                 'main_loop_lag_max': max(lags, default=0)})
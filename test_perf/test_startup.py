@@ -0,0 +1,84 @@
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from hat import json
+from hat import util
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="sleep executable not available")
+
+repeat_count = 5
+
+
+def run_python(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], check=True)
+    return time.perf_counter() - start
+
+
+def run_orchestrator(conf):
+    process = psutil.Popen([sys.executable, '-m', 'hat.orchestrator',
+                            '--conf', '-'],
+                           stdin=subprocess.PIPE)
+    process.stdin.write(json.encode(conf).encode('utf-8'))
+    process.stdin.close()
+    return process
+
+
+def test_import(results):
+    interpreter_durations = [run_python('pass')
+                             for _ in range(repeat_count)]
+    import_durations = [run_python('import hat.orchestrator.main')
+                        for _ in range(repeat_count)]
+
+    results.add('import', {'repeat_count': repeat_count},
+                {'interpreter_median': statistics.median(
+                    interpreter_durations),
+                 'import_median': statistics.median(import_durations)})
+
+
+def test_lazy_ui_import():
+    run_python('import sys\n'
+               'import hat.orchestrator.main\n'
+               'assert "hat.orchestrator.ui" not in sys.modules\n'
+               'assert "aiohttp" not in sys.modules\n')
+
+
+@pytest.mark.parametrize('with_ui', [False, True])
+def test_first_spawn(results, event_loop_name, with_ui):
+    conf = {'type': 'orchestrator',
+            'event_loop': event_loop_name,
+            'components': [{'name': 'c',
+                            'args': ['sleep', '3600'],
+                            'start_delay': 0}]}
+
+    durations = []
+    for _ in range(repeat_count):
+        if with_ui:
+            conf['ui'] = {'host': '127.0.0.1',
+                          'port': util.get_unused_tcp_port()}
+
+        start = time.perf_counter()
+        process = run_orchestrator(conf)
+
+        try:
+            while not process.children():
+                time.sleep(0.001)
+
+            durations.append(time.perf_counter() - start)
+
+        finally:
+            process.terminate()
+            process.wait()
+
+    results.add('first_spawn', {'with_ui': with_ui,
+                                'repeat_count': repeat_count},
+                {'median': statistics.median(durations),
+                 'min': min(durations),
+                 'max': max(durations)})
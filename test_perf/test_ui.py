@@ -0,0 +1,94 @@
+import asyncio
+import statistics
+import time
+
+import pytest
+
+from hat import aio
+from hat import juggler
+from hat import util
+
+from hat.orchestrator.component import Status
+import hat.orchestrator.ui
+
+
+class Component:
+
+    def __init__(self, name):
+        self._name = name
+        self._status = Status.STOPPED
+        self._change_cbs = util.CallbackRegistry()
+
+    name = property(lambda self: self._name)
+    status = property(lambda self: self._status)
+    group = property(lambda self: None)
+    tags = property(lambda self: [])
+    delay = property(lambda self: 0)
+    revive = property(lambda self: False)
+    pids = property(lambda self: [])
+    ready = False
+    status_text = None
+    latencies = property(lambda self: {})
+    last_lifecycle = property(lambda self: {})
+
+    def register_change_cb(self, cb):
+        return self._change_cbs.register(cb)
+
+    def set_status(self, status):
+        self._status = status
+        self._change_cbs.notify()
+
+
+@pytest.mark.parametrize('component_count', [10, 1000])
+@pytest.mark.parametrize('client_count', [1, 10, 50])
+async def test_state_propagation(monkeypatch, results, measure,
+                                 component_count, client_count):
+    monkeypatch.setattr(hat.orchestrator.ui, 'autoflush_delay', 0)
+    change_count = 20
+
+    port = util.get_unused_tcp_port()
+    components = [Component(str(i)) for i in range(component_count)]
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
+
+    clients = []
+    queues = []
+    for _ in range(client_count):
+        client = await juggler.connect(f'ws://127.0.0.1:{port}/ws')
+        queue = aio.Queue()
+        client.state.register_change_cb(queue.put_nowait)
+        clients.append(client)
+        queues.append(queue)
+
+    for client, queue in zip(clients, queues):
+        while client.state.data is None:
+            await queue.get()
+        if not queue.empty():
+            queue.get_nowait_until_empty()
+
+    latencies = []
+    with measure() as m:
+        for i in range(change_count):
+            status = Status.RUNNING if i % 2 == 0 else Status.STOPPED
+            start = time.perf_counter()
+            components[-1].set_status(status)
+
+            for queue in queues:
+                while True:
+                    state = await queue.get()
+                    if state['components'][-1]['status'] == status.name:
+                        break
+
+            latencies.append(time.perf_counter() - start)
+
+    results.add('ui_state_propagation',
+                {'component_count': component_count,
+                 'client_count': client_count},
+                {'latency_mean': statistics.mean(latencies),
+                 'latency_max': max(latencies),
+                 'cpu_per_change': m.cpu / change_count})
+
+    for client in clients:
+        await client.async_close()
+    await ui.async_close()
+    await asyncio.sleep(0)
@@ -0,0 +1,78 @@
+import statistics
+import sys
+import time
+
+import psutil
+import pytest
+
+import hat.orchestrator.process
+import hat.orchestrator.zygote
+
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux',
+                                reason="zygotes available only on linux")
+
+modules = ['asyncio', 'hat.aio', 'hat.json']
+repeat_count = 10
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch):
+    code = (''.join(f'import {module}\n' for module in modules) +
+            'import time\n'
+            'print("ready", flush=True)\n'
+            'time.sleep(3600)\n')
+    (tmp_path / 'zygote_perf.py').write_text(code)
+
+    monkeypatch.setenv('PYTHONPATH', str(tmp_path))
+
+    return 'zygote_perf'
+
+
+def get_memory(processes):
+    infos = [psutil.Process(process.pid).memory_full_info()
+             for process in processes]
+    return {'uss_mean': statistics.mean(info.uss for info in infos),
+            'pss_mean': statistics.mean(info.pss for info in infos)}
+
+
+@pytest.mark.parametrize('backend', ['process', 'zygote'])
+async def test_start(results, module, backend):
+    zygote = None
+    if backend == 'zygote':
+        zygote = await hat.orchestrator.zygote.create_zygote({
+            'name': 'zygote',
+            'modules': modules})
+        create_process = zygote.create_process
+        args = [module]
+
+    else:
+        create_process = hat.orchestrator.process.create_process
+        args = [sys.executable, '-m', module]
+
+    durations = []
+    processes = []
+
+    try:
+        for _ in range(repeat_count):
+            start = time.perf_counter()
+            process = await create_process(args)
+            processes.append(process)
+            assert await process.readline() == 'ready'
+            durations.append(time.perf_counter() - start)
+
+        memory = get_memory(processes)
+
+    finally:
+        for process in processes:
+            await process.async_close()
+
+        if zygote:
+            await zygote.async_close()
+
+    results.add('zygote_start', {'backend': backend,
+                                 'modules': modules,
+                                 'repeat_count': repeat_count},
+                {'start_median': statistics.median(durations),
+                 'start_max': max(durations),
+                 **memory})
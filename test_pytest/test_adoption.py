@@ -0,0 +1,197 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from hat import json
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.adoption
+
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux',
+                                reason="only for linux")
+
+
+@pytest.fixture
+def adoption_conf(tmp_path):
+    return {'state_path': str(tmp_path / 'state.json'),
+            'fifo_dir': str(tmp_path / 'fifo')}
+
+
+def create_conf(name, duration=10, output_flag_path=None):
+    code = 'import os, time\n'
+    if output_flag_path:
+        # output is written only after flag file is created
+        code += (f'while not os.path.exists({str(output_flag_path)!r}):\n'
+                 f'    time.sleep(0.01)\n')
+    code += f'print("abc", flush=True)\ntime.sleep({duration})'
+
+    return {'name': name,
+            'args': [sys.executable, '-c', code],
+            'start_delay': 0,
+            'sigint_timeout': 1}
+
+
+def create_component(adoption, conf, adopted_processes={}):
+    return Component(
+        conf,
+        create_process=adoption.get_create_process(conf),
+        adopted_process=adopted_processes.pop(conf['name'], None))
+
+
+async def wait_status(component, status):
+    while component.status != status:
+        await asyncio.sleep(0.01)
+
+
+def is_running(pid):
+    return hat.orchestrator.adoption.get_process_start_time(pid) is not None
+
+
+def test_get_conf_hash():
+    assert (hat.orchestrator.adoption.get_conf_hash({'a': 1, 'b': 2}) ==
+            hat.orchestrator.adoption.get_conf_hash({'b': 2, 'a': 1}))
+    assert (hat.orchestrator.adoption.get_conf_hash({'a': 1}) !=
+            hat.orchestrator.adoption.get_conf_hash({'a': 2}))
+
+
+def test_get_process_start_time():
+    start_time = hat.orchestrator.adoption.get_process_start_time(
+        os.getpid())
+    assert isinstance(start_time, int)
+
+    assert hat.orchestrator.adoption.get_process_start_time(2 ** 30) is None
+
+
+async def test_state(adoption_conf):
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    conf = create_conf('a')
+
+    assert await adoption.adopt([conf]) == {}
+
+    component = create_component(adoption, conf)
+    await wait_status(component, Status.RUNNING)
+
+    state = json.decode_file(adoption_conf['state_path'], json.Format.JSON)
+    assert state == {
+        'a': {'pid': component.pid,
+              'start_time': hat.orchestrator.adoption.get_process_start_time(
+                  component.pid),
+              'conf_hash': hat.orchestrator.adoption.get_conf_hash(conf)}}
+
+    await component.async_close()
+    await asyncio.sleep(0.01)
+
+    state = json.decode_file(adoption_conf['state_path'], json.Format.JSON)
+    assert state == {}
+
+    await adoption.async_close()
+
+
+async def test_detach_and_adopt(adoption_conf, tmp_path):
+    output_flag_path = tmp_path / 'output'
+    conf = create_conf('a', output_flag_path=output_flag_path)
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    await adoption.adopt([conf])
+
+    component = create_component(adoption, conf)
+    await wait_status(component, Status.RUNNING)
+    pid = component.pid
+
+    component.detach()
+    await component.wait_closed()
+    await adoption.async_close()
+
+    assert is_running(pid)
+
+    output_flag_path.touch()
+    await asyncio.sleep(0.1)
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    adopted_processes = await adoption.adopt([conf])
+
+    assert list(adopted_processes.keys()) == ['a']
+
+    output_queue = asyncio.Queue()
+    component = create_component(adoption, conf, adopted_processes)
+    component.register_output_cb(output_queue.put_nowait)
+
+    assert component.pid == pid
+    await wait_status(component, Status.RUNNING)
+    assert component.start_count == 0
+
+    # output written before adoption is buffered by named pipe
+    assert await output_queue.get() == 'abc'
+
+    await component.async_close()
+    assert not is_running(pid)
+
+    await adoption.async_close()
+
+
+async def test_adopted_process_exit(adoption_conf):
+    conf = create_conf('a', duration=0.5)
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    await adoption.adopt([conf])
+
+    component = create_component(adoption, conf)
+    await wait_status(component, Status.RUNNING)
+
+    component.detach()
+    await component.wait_closed()
+    await adoption.async_close()
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    adopted_processes = await adoption.adopt([conf])
+    component = create_component(adoption, conf, adopted_processes)
+
+    changes = asyncio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait(component.status))
+
+    assert await changes.get() == Status.RUNNING
+    assert await changes.get() == Status.STOPPING
+    assert await changes.get() == Status.STOPPED
+
+    await component.async_close()
+    await adoption.async_close()
+
+
+async def test_changed_conf(adoption_conf):
+    conf = create_conf('a')
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    await adoption.adopt([conf])
+
+    component = create_component(adoption, conf)
+    await wait_status(component, Status.RUNNING)
+    pid = component.pid
+
+    component.detach()
+    await component.wait_closed()
+    await adoption.async_close()
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    adopted_processes = await adoption.adopt([dict(conf, revive=True)])
+
+    assert adopted_processes == {}
+    assert not is_running(pid)
+
+    state = json.decode_file(adoption_conf['state_path'], json.Format.JSON)
+    assert state == {}
+
+    await adoption.async_close()
+
+
+async def test_invalid_state(adoption_conf):
+    with open(adoption_conf['state_path'], 'w') as f:
+        f.write('invalid')
+
+    adoption = hat.orchestrator.adoption.Adoption(adoption_conf)
+    assert await adoption.adopt([create_conf('a')]) == {}
+
+    await adoption.async_close()
@@ -1,12 +1,16 @@
 import asyncio
+import socket
 import unittest.mock
 import sys
 
 import pytest
 
 from hat import aio
+from hat import json
+from hat import util
 
 from hat.orchestrator.component import Status, Component
+import hat.orchestrator.sim
 
 
 @pytest.fixture()
@@ -568,6 +572,446 @@ async def test_console_output(capsys):
     assert captured.out.endswith('abc\n')
 
 
+async def test_restart(process_queue):
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', 'import time; time.sleep(30)'],
+        'delay': 0,
+        'revive': False,
+        'auto_start': False,
+        'start_delay': 0.001,
+        'create_timeout': 0.1,
+        'sigint_timeout': 0.001,
+        'sigkill_timeout': 0.001})
+
+    component.restart()
+    assert (await status_queue.get() == Status.STARTING)
+    assert (await status_queue.get() == Status.RUNNING)
+    p1 = await process_queue.get()
+
+    component.restart()
+    assert (await status_queue.get() == Status.STOPPING)
+    assert (await status_queue.get() == Status.STOPPED)
+    assert (await status_queue.get() == Status.STARTING)
+    assert (await status_queue.get() == Status.RUNNING)
+    p2 = await process_queue.get()
+    assert p1.returncode is not None
+    assert p2.returncode is None
+
+    await asyncio.sleep(0.01)
+    assert status_queue.empty()
+
+    await component.async_close()
+
+
+async def test_restart_then_stop(process_queue):
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', 'import time; time.sleep(30)'],
+        'delay': 0,
+        'revive': False,
+        'auto_start': True,
+        'start_delay': 0.001,
+        'create_timeout': 0.1,
+        'sigint_timeout': 0.001,
+        'sigkill_timeout': 0.001})
+
+    assert (await status_queue.get() == Status.STARTING)
+    assert (await status_queue.get() == Status.RUNNING)
+    await process_queue.get()
+
+    component.restart()
+    component.stop()
+    assert (await status_queue.get() == Status.STOPPING)
+    assert (await status_queue.get() == Status.STOPPED)
+
+    await asyncio.sleep(0.01)
+    assert status_queue.empty()
+    assert process_queue.empty()
+    assert component.status == Status.STOPPED
+
+    await component.async_close()
+
+
+async def test_overlap_restart():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script(ignore_sigint=True))
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'overlap_restart': True,
+                           'sigint_timeout': 0.05},
+                          create_process=backend.create_process)
+    changes = aio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait((component.status, component.pids)))
+
+    assert await changes.get() == (Status.STARTING, [])
+    assert await changes.get() == (Status.RUNNING, [1])
+
+    component.restart()
+    assert await changes.get() == (Status.STARTING, [1])
+    assert await changes.get() == (Status.RUNNING, [1, 2])
+    p1, p2 = backend.processes
+    assert p1.returncode is None
+
+    assert await changes.get() == (Status.RUNNING, [2])
+    assert p1.returncode == hat.orchestrator.sim.sigkill_returncode
+    assert p2.returncode is None
+    assert component.start_count == 2
+    assert component.last_lifecycle['sigkill'] > 0
+
+    component.stop()
+    assert await changes.get() == (Status.STOPPING, [2])
+    assert await changes.get() == (Status.STOPPED, [])
+
+    await component.async_close()
+
+
+async def test_overlap_restart_create_error():
+    scripts = [hat.orchestrator.sim.Script(),
+               hat.orchestrator.sim.Script(spawn_duration=1)]
+    backend = hat.orchestrator.sim.Backend(lambda args: scripts.pop(0))
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'overlap_restart': True,
+                           'overlap_timeout': 0.01},
+                          create_process=backend.create_process)
+    changes = aio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait((component.status, component.pids)))
+
+    assert await changes.get() == (Status.STARTING, [])
+    assert await changes.get() == (Status.RUNNING, [1])
+
+    component.restart()
+    assert await changes.get() == (Status.STARTING, [1])
+    assert await changes.get() == (Status.RUNNING, [1])
+    assert component.start_count == 1
+    assert backend.processes[0].returncode is None
+
+    await component.async_close()
+    assert backend.processes[0].returncode is not None
+
+
+async def test_overlap_restart_notify_ready():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'overlap_restart': True,
+                           'notify_ready': True},
+                          create_process=backend.create_process)
+    changes = aio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait((component.status, component.pids)))
+
+    assert await changes.get() == (Status.STARTING, [])
+    assert await changes.get() == (Status.RUNNING, [1])
+
+    component.restart()
+    assert await changes.get() == (Status.STARTING, [1])
+
+    while component.start_count < 2:
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+    assert changes.empty()
+    assert component.status == Status.STARTING
+    assert backend.processes[0].returncode is None
+
+    component.notify({'READY': '1'})
+    assert await changes.get() == (Status.STARTING, [2])
+    assert await changes.get() == (Status.RUNNING, [1, 2])
+    assert await changes.get() == (Status.RUNNING, [2])
+    assert backend.processes[0].returncode is not None
+    assert component.ready
+
+    await component.async_close()
+
+
+async def test_overlap_restart_notify_ready_timeout():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'overlap_restart': True,
+                           'overlap_timeout': 0.05,
+                           'notify_ready': True},
+                          create_process=backend.create_process)
+    changes = aio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait((component.status, component.pids)))
+
+    assert await changes.get() == (Status.STARTING, [])
+    assert await changes.get() == (Status.RUNNING, [1])
+    component.notify({'READY': '1'})
+    assert await changes.get() == (Status.RUNNING, [1])
+
+    component.restart()
+    assert await changes.get() == (Status.STARTING, [1])
+    assert await changes.get() == (Status.RUNNING, [1])
+    assert component.start_count == 1
+    assert component.ready
+
+    p1, p2 = backend.processes
+    assert p1.returncode is None
+    assert p2.returncode is not None
+
+    await component.async_close()
+
+
+async def test_overlap_restart_close():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script(ignore_sigint=True))
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'overlap_restart': True,
+                           'sigint_timeout': 0.05},
+                          create_process=backend.create_process)
+    changes = aio.Queue()
+    component.register_change_cb(
+        lambda: changes.put_nowait((component.status, component.pids)))
+
+    assert await changes.get() == (Status.STARTING, [])
+    assert await changes.get() == (Status.RUNNING, [1])
+
+    component.restart()
+    assert await changes.get() == (Status.STARTING, [1])
+    assert await changes.get() == (Status.RUNNING, [1, 2])
+
+    await component.async_close()
+
+    assert all(process.returncode is not None
+               for process in backend.processes)
+    assert component.status == Status.STOPPED
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+async def test_sockets():
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c',
+                 'import socket, time\n'
+                 'sock = socket.socket(fileno=3)\n'
+                 'print(sock.getsockname()[1], flush=True)\n'
+                 'conn, _ = sock.accept()\n'
+                 'conn.sendall(b"x")\n'
+                 'time.sleep(30)'],
+        'sockets': [{'type': 'tcp', 'port': 0}],
+        'start_delay': 0.001,
+        'sigint_timeout': 0.1})
+    output_queue = aio.Queue()
+    component.register_output_cb(output_queue.put_nowait)
+
+    port = int(await output_queue.get())
+
+    component.stop()
+    while (await status_queue.get()) != Status.STOPPED:
+        pass
+
+    # connection is queued while component is stopped
+    conn = socket.create_connection(('127.0.0.1', port))
+    conn.settimeout(5)
+
+    component.start()
+    assert int(await output_queue.get()) == port
+
+    loop = asyncio.get_running_loop()
+    assert await loop.run_in_executor(None, conn.recv, 1) == b'x'
+    conn.close()
+
+    await component.async_close()
+
+    with pytest.raises(ConnectionError):
+        socket.create_connection(('127.0.0.1', port))
+
+
+on_demand_server = ('import socket\n'
+                    'sock = socket.socket(fileno=3)\n'
+                    'while True:\n'
+                    '    conn, _ = sock.accept()\n'
+                    '    conn.sendall(b"x")\n'
+                    '    conn.close()\n')
+
+
+async def connect_on_demand(port):
+    loop = asyncio.get_running_loop()
+    conn = socket.create_connection(('127.0.0.1', port))
+    conn.settimeout(5)
+    try:
+        return await loop.run_in_executor(None, conn.recv, 1)
+
+    finally:
+        conn.close()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+async def test_on_demand():
+    port = util.get_unused_tcp_port()
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', on_demand_server],
+        'sockets': [{'type': 'tcp', 'port': port}],
+        'on_demand': True,
+        'start_delay': 0.001,
+        'sigint_timeout': 0.1})
+
+    await asyncio.sleep(0.1)
+    assert component.status == Status.STOPPED
+    assert status_queue.empty()
+
+    assert await connect_on_demand(port) == b'x'
+    assert await status_queue.get() == Status.STARTING
+    assert await status_queue.get() == Status.RUNNING
+
+    assert await connect_on_demand(port) == b'x'
+    assert component.start_count == 1
+
+    await asyncio.sleep(0.1)
+    assert component.status == Status.RUNNING
+
+    await component.async_close()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+async def test_on_demand_idle_timeout():
+    port = util.get_unused_tcp_port()
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', on_demand_server],
+        'sockets': [{'type': 'tcp', 'port': port}],
+        'on_demand': True,
+        'idle_timeout': 0.2,
+        'start_delay': 0.001,
+        'sigint_timeout': 0.1})
+
+    for i in range(2):
+        assert await connect_on_demand(port) == b'x'
+        assert await status_queue.get() == Status.STARTING
+        assert await status_queue.get() == Status.RUNNING
+
+        assert await status_queue.get() == Status.STOPPING
+        assert await status_queue.get() == Status.STOPPED
+        assert component.start_count == i + 1
+
+    await component.async_close()
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="epoll not supported")
+async def test_on_demand_idle_timeout_pending_connection():
+    port = util.get_unused_tcp_port()
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', 'import time; time.sleep(10)'],
+        'sockets': [{'type': 'tcp', 'port': port}],
+        'on_demand': True,
+        'idle_timeout': 0.2,
+        'start_delay': 0.001,
+        'sigint_timeout': 0.1})
+
+    # connections are not accepted by process
+    conns = [socket.create_connection(('127.0.0.1', port))]
+    assert await status_queue.get() == Status.STARTING
+    assert await status_queue.get() == Status.RUNNING
+
+    # only new connections extend idle timeout
+    for _ in range(4):
+        await asyncio.sleep(0.1)
+        conns.append(socket.create_connection(('127.0.0.1', port)))
+    assert component.status == Status.RUNNING
+
+    assert await status_queue.get() == Status.STOPPING
+    assert await status_queue.get() == Status.STOPPED
+
+    for conn in conns:
+        conn.close()
+
+    await component.async_close()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+def test_on_demand_uvloop():
+    uvloop = pytest.importorskip('uvloop')
+
+    # uvloop sets file descriptors registered with add_reader to
+    # non-blocking mode
+    loop = uvloop.new_event_loop()
+    try:
+        loop.run_until_complete(test_on_demand())
+
+    finally:
+        loop.close()
+
+
+async def test_on_demand_without_sockets():
+    with pytest.raises(ValueError):
+        Component({'name': 'name',
+                   'args': [],
+                   'on_demand': True})
+
+
+async def test_started():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script(duration=0.01))
+    component = Component({'name': 'name',
+                           'args': [],
+                           'auto_start': False,
+                           'start_delay': 0},
+                          create_process=backend.create_process)
+    started_queue = aio.Queue()
+    component.register_started_cb(
+        lambda: started_queue.put_nowait(component.started))
+
+    assert component.started is False
+
+    component.start()
+    assert await started_queue.get() is True
+
+    # process exit doesn't change started flag
+    while component.start_count < 1 or component.status != Status.STOPPED:
+        await asyncio.sleep(0.001)
+    assert component.started is True
+
+    component.stop()
+    assert await started_queue.get() is False
+
+    component.restart()
+    assert await started_queue.get() is True
+
+    component.start()
+    await asyncio.sleep(0.01)
+    assert started_queue.empty()
+
+    await component.async_close()
+
+
+@pytest.mark.parametrize('revive', [True, False])
+@pytest.mark.parametrize('started', [True, False])
+async def test_initial_state_override(revive, started):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'revive': not revive,
+                           'auto_start': not started,
+                           'start_delay': 0},
+                          create_process=backend.create_process,
+                          revive=revive,
+                          started=started)
+
+    assert component.revive == revive
+    assert component.started == started
+
+    await asyncio.sleep(0.01)
+    assert (component.status == Status.RUNNING) == (revive or started)
+
+    await component.async_close()
+
+
 async def test_stdin_output(capsys):
     component, status_queue = create_component_with_status_queue({
         'name': 'name',
@@ -586,3 +1030,186 @@ async def test_stdin_output(capsys):
 
     captured = capsys.readouterr()
     assert captured.out.endswith('abc\n')
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="SIGINT not ignored")
+async def test_lifecycle(caplog):
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c',
+                 'import signal, time\n'
+                 'signal.signal(signal.SIGINT, signal.SIG_IGN)\n'
+                 'print("ready", flush=True)\n'
+                 'time.sleep(30)'],
+        'delay': 0,
+        'revive': False,
+        'auto_start': True,
+        'start_delay': 0.001,
+        'create_timeout': 1,
+        'sigint_timeout': 0.01,
+        'sigkill_timeout': 1})
+    output_queue = aio.Queue()
+    component.register_output_cb(output_queue.put_nowait)
+
+    assert (await status_queue.get() == Status.STARTING)
+    assert (await status_queue.get() == Status.RUNNING)
+    assert (await output_queue.get() == 'ready')
+
+    assert component.latencies['queue'].count == 1
+    assert component.latencies['spawn'].count == 1
+    assert component.latencies['ready'].count == 1
+    assert component.latencies['stop'].count == 0
+    assert component.last_lifecycle == {}
+
+    with caplog.at_level('INFO', 'hat.orchestrator.component'):
+        component.stop()
+        assert (await status_queue.get() == Status.STOPPING)
+        assert (await status_queue.get() == Status.STOPPED)
+
+    assert component.latencies['stop'].count == 1
+    assert component.latencies['sigint'].count == 0
+    assert component.latencies['sigkill'].count == 1
+
+    lifecycle = component.last_lifecycle
+    assert list(lifecycle.keys()) == ['queued', 'spawning', 'spawned',
+                                      'ready', 'stop_requested', 'sigint',
+                                      'sigkill', 'exited']
+    assert lifecycle['queued'] == 0
+    assert list(lifecycle.values()) == sorted(lifecycle.values())
+    assert lifecycle['sigkill'] - lifecycle['sigint'] >= 0.01
+
+    messages = [record.getMessage() for record in caplog.records
+                if 'lifecycle:' in record.getMessage()]
+    assert len(messages) == 1
+    data = json.decode(messages[0].split('lifecycle: ', 1)[1])
+    assert data['component'] == 'name'
+    assert data['returncode'] == component.returncode
+    assert data['exited'] == pytest.approx(lifecycle['exited'], abs=1e-5)
+
+    await component.async_close()
+
+
+async def test_lifecycle_error(monkeypatch):
+    component, status_queue = create_component_with_status_queue({
+        'name': 'name',
+        'args': [sys.executable, '-c', 'print("abc")'],
+        'delay': 0,
+        'revive': False,
+        'auto_start': True,
+        'start_delay': 0.001,
+        'create_timeout': 1,
+        'sigint_timeout': 0.001,
+        'sigkill_timeout': 0.001})
+
+    def finish_lifecycle(process, lifecycle):
+        raise Exception()
+
+    monkeypatch.setattr(component, '_finish_lifecycle', finish_lifecycle)
+
+    assert (await status_queue.get() == Status.STARTING)
+    assert (await status_queue.get() == Status.RUNNING)
+    assert (await status_queue.get() == Status.STOPPING)
+    assert (await status_queue.get() == Status.STOPPED)
+
+    assert component.returncode == 0
+    assert component.pid is None
+    assert component.output_lines == 1
+
+    await component.async_close()
+
+
+async def test_notify():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0},
+                          create_process=backend.create_process)
+    change_queue = aio.Queue()
+    component.register_change_cb(
+        lambda: change_queue.put_nowait((component.ready,
+                                         component.status_text)))
+
+    while component.status != Status.RUNNING:
+        await asyncio.sleep(0.001)
+    change_queue = aio.Queue()
+    assert component.ready is False
+    assert component.status_text is None
+
+    component.notify({'READY': '1', 'STATUS': 'abc'})
+    assert await change_queue.get() == (True, 'abc')
+
+    component.notify({'READY': '1', 'STATUS': 'abc', 'X': 'y'})
+    component.notify({'WATCHDOG': '1'})
+    await asyncio.sleep(0.01)
+    assert change_queue.empty()
+
+    component.notify({'STOPPING': '1'})
+    assert await change_queue.get() == (False, 'abc')
+
+    component.notify({'READY': '1'})
+    assert await change_queue.get() == (True, 'abc')
+
+    # ready flag and status text are reset for new process
+    component.restart()
+    while component.start_count < 2 or component.status != Status.RUNNING:
+        await asyncio.sleep(0.001)
+    assert component.ready is False
+    assert component.status_text is None
+
+    await component.async_close()
+
+
+async def test_watchdog():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0,
+                           'watchdog_timeout': 0.05},
+                          create_process=backend.create_process,
+                          env={'NOTIFY_SOCKET': '/abc'})
+
+    while component.status != Status.RUNNING:
+        await asyncio.sleep(0.001)
+    assert backend.processes[0].env == {'NOTIFY_SOCKET': '/abc',
+                                        'WATCHDOG_USEC': '50000'}
+
+    for _ in range(10):
+        component.notify({'WATCHDOG': '1'})
+        await asyncio.sleep(0.01)
+    assert component.start_count == 1
+
+    while component.start_count < 2:
+        await asyncio.sleep(0.001)
+    assert backend.processes[0].returncode is not None
+    assert component.revive is False
+    assert component.started is True
+
+    while component.status != Status.RUNNING:
+        await asyncio.sleep(0.001)
+
+    component.notify({'WATCHDOG': 'trigger'})
+    while component.start_count < 3:
+        await asyncio.sleep(0.001)
+
+    await component.async_close()
+
+
+async def test_env():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = Component({'name': 'name',
+                           'args': [],
+                           'start_delay': 0},
+                          create_process=backend.create_process)
+
+    while component.status != Status.RUNNING:
+        await asyncio.sleep(0.001)
+    assert backend.processes[0].env == {}
+
+    component.notify({'WATCHDOG': 'trigger'})
+    while component.start_count < 2:
+        await asyncio.sleep(0.001)
+
+    await component.async_close()
@@ -0,0 +1,436 @@
+from pathlib import Path
+import asyncio
+import sys
+
+import pytest
+
+from hat import aio
+from hat import json
+from hat import util
+
+from hat.orchestrator.component import Status
+import hat.orchestrator.component
+import hat.orchestrator.control
+import hat.orchestrator.profiler
+import hat.orchestrator.registry
+import hat.orchestrator.sim
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="unix sockets not supported")
+
+
+class Component(aio.Resource):
+
+    def __init__(self, name, tags=[], group=None):
+        self._name = name
+        self._tags = tags
+        self._group = group
+        self._revive = False
+        self._async_group = aio.Group()
+        self._status = Status.STOPPED
+        self._started_queue = aio.Queue()
+        self._change_cbs = util.CallbackRegistry()
+        self._output_cbs = util.CallbackRegistry()
+
+    @property
+    def async_group(self):
+        return self._async_group
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def group(self):
+        return self._group
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @property
+    def pids(self):
+        return []
+
+    @property
+    def ready(self):
+        return False
+
+    @property
+    def status_text(self):
+        return None
+
+    @property
+    def latencies(self):
+        return {}
+
+    @property
+    def last_lifecycle(self):
+        return {}
+
+    @property
+    def delay(self):
+        return 0
+
+    @property
+    def revive(self):
+        return self._revive
+
+    @property
+    def started_queue(self):
+        return self._started_queue
+
+    def register_change_cb(self, cb):
+        return self._change_cbs.register(cb)
+
+    def register_output_cb(self, cb):
+        return self._output_cbs.register(cb)
+
+    def output(self, line):
+        self._output_cbs.notify(line)
+
+    def set_revive(self, revive):
+        self._revive = revive
+        self._change_cbs.notify()
+
+    def start(self):
+        self._started_queue.put_nowait(True)
+
+    def stop(self):
+        self._started_queue.put_nowait(False)
+
+    def restart(self):
+        self._started_queue.put_nowait(None)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'control'
+
+
+async def call(*args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, lambda: hat.orchestrator.control.call(*args, **kwargs))
+
+
+async def test_listen(path):
+    server = await hat.orchestrator.control.listen(path, {})
+    assert server.is_open
+    assert path.exists()
+
+    await server.async_close()
+    assert server.is_closed
+    assert not path.exists()
+
+
+async def test_not_listening(path):
+    with pytest.raises(ConnectionError):
+        await call(path, 'status')
+
+
+async def test_status(path):
+    components = [Component('a'), Component('b', tags=['x'])]
+    server = await hat.orchestrator.control.listen(
+        path, dict(enumerate(components)))
+
+    result = await call(path, 'status')
+    assert result == [{'id': 0,
+                       'name': 'a',
+                       'group': None,
+                       'tags': [],
+                       'delay': 0,
+                       'revive': False,
+                       'status': 'STOPPED',
+                       'pids': [],
+                       'ready': False,
+                       'status_text': None,
+                       'latencies': {},
+                       'last_lifecycle': {}},
+                      {'id': 1,
+                       'name': 'b',
+                       'group': None,
+                       'tags': ['x'],
+                       'delay': 0,
+                       'revive': False,
+                       'status': 'STOPPED',
+                       'pids': [],
+                       'ready': False,
+                       'status_text': None,
+                       'latencies': {},
+                       'last_lifecycle': {}}]
+
+    result = await call(path, 'status', {'tags': ['x']})
+    assert [i['name'] for i in result] == ['b']
+
+    await server.async_close()
+
+
+async def test_control(path):
+    components = [Component('a1'), Component('a2'), Component('b')]
+    server = await hat.orchestrator.control.listen(
+        path, dict(enumerate(components)))
+
+    await call(path, 'start', {'names': ['a*']})
+    await call(path, 'stop', {'id': 1})
+    await call(path, 'restart', {'ids': [2]})
+    await call(path, 'revive', {'names': ['b'], 'value': True})
+
+    assert [component.started_queue.get_nowait_until_empty()
+            for component in components] == [True, False, None]
+    assert [component.revive
+            for component in components] == [False, False, True]
+
+    with pytest.raises(Exception, match='invalid component id'):
+        await call(path, 'start', {'id': 3})
+
+    with pytest.raises(Exception, match='invalid action'):
+        await call(path, 'invalid', {'id': 0})
+
+    await server.async_close()
+
+
+async def test_tail(path):
+    components = [Component('a'), Component('b')]
+    server = await hat.orchestrator.control.listen(
+        path, dict(enumerate(components)))
+
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    writer.write(b'{"name": "tail", "data": {"names": ["b"]}}\n')
+
+    line = await reader.readline()
+    assert line == b'{"success": true, "data": null}\n'
+
+    components[0].output('abc')
+    components[1].output('xyz')
+
+    line = await reader.readline()
+    assert line == b'{"component": "b", "line": "xyz"}\n'
+
+    writer.close()
+    await writer.wait_closed()
+
+    await server.async_close()
+
+
+async def test_tail_all(path):
+    components = [Component('a'), Component('b')]
+    server = await hat.orchestrator.control.listen(
+        path, dict(enumerate(components)))
+
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    writer.write(b'{"name": "tail"}\n')
+
+    line = await reader.readline()
+    assert line == b'{"success": true, "data": null}\n'
+
+    components[0].output('abc')
+    components[1].output('xyz')
+
+    line = await reader.readline()
+    assert line == b'{"component": "a", "line": "abc"}\n'
+    line = await reader.readline()
+    assert line == b'{"component": "b", "line": "xyz"}\n'
+
+    writer.close()
+    await writer.wait_closed()
+
+    await server.async_close()
+
+
+@pytest.mark.parametrize('msg', [b'abc\n',
+                                 b'{"data": null}\n',
+                                 b'[]\n'])
+async def test_invalid_request(path, msg):
+    server = await hat.orchestrator.control.listen(path,
+                                                   {0: Component('a')})
+
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    writer.write(msg)
+
+    res = json.decode(
+        (await reader.readline()).decode())
+    assert res['success'] is False
+
+    writer.write(b'{"name": "status"}\n')
+    res = json.decode(
+        (await reader.readline()).decode())
+    assert res['success'] is True
+    assert [i['name'] for i in res['data']] == ['a']
+
+    writer.close()
+    await writer.wait_closed()
+
+    await server.async_close()
+
+
+async def test_profiling(path, tmp_path):
+    profiler = hat.orchestrator.profiler.Profiler({
+        'path': str(tmp_path / 'profiling')})
+    server = await hat.orchestrator.control.listen(path, {},
+                                                   profiler=profiler)
+
+    result = await call(path, 'profile', {'duration': 0.01})
+    assert Path(result['stats']).exists()
+    assert Path(result['summary']).exists()
+
+    with pytest.raises(Exception):
+        await call(path, 'tracemalloc', {'action': 'snapshot'})
+
+    await call(path, 'tracemalloc', {'action': 'start'})
+    result = await call(path, 'tracemalloc', {'action': 'snapshot'})
+    assert Path(result['snapshot']).exists()
+    assert result['diff'] is None
+    await call(path, 'tracemalloc', {'action': 'stop'})
+
+    await server.async_close()
+    await profiler.async_close()
+
+
+async def test_profiling_not_available(path):
+    server = await hat.orchestrator.control.listen(path, {})
+
+    with pytest.raises(Exception, match='profiling not available'):
+        await call(path, 'profile', {'duration': 0.01})
+
+    await server.async_close()
+
+
+async def test_reload(path):
+    diff = {'added': ['a'], 'removed': [], 'changed': ['b']}
+    reload_queue = aio.Queue()
+
+    async def reload_cb():
+        reload_queue.put_nowait(None)
+        return diff
+
+    server = await hat.orchestrator.control.listen(path, {},
+                                                   reload_cb=reload_cb)
+
+    result = await call(path, 'reload')
+    assert result == diff
+    await reload_queue.get()
+
+    await server.async_close()
+
+
+async def test_reload_not_available(path):
+    server = await hat.orchestrator.control.listen(path, {})
+
+    with pytest.raises(Exception, match='reload not available'):
+        await call(path, 'reload')
+
+    await server.async_close()
+
+
+async def test_detach(path):
+    detach_queue = aio.Queue()
+
+    async def detach_cb():
+        detach_queue.put_nowait(None)
+
+    server = await hat.orchestrator.control.listen(path, {},
+                                                   detach_cb=detach_cb)
+
+    result = await call(path, 'detach')
+    assert result is None
+    await detach_queue.get()
+
+    await server.async_close()
+
+    server = await hat.orchestrator.control.listen(path, {})
+
+    with pytest.raises(Exception, match='detach not available'):
+        await call(path, 'detach')
+
+    await server.async_close()
+
+
+async def test_add_remove(path):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    registry = hat.orchestrator.registry.Registry(
+        [{'name': 'a', 'args': []}],
+        lambda conf: hat.orchestrator.component.Component(
+            conf, create_process=backend.create_process))
+    server = await hat.orchestrator.control.listen(path, registry.components,
+                                                   registry=registry)
+
+    result = await call(path, 'add', {'name': 'b', 'args': []})
+    assert result == 1
+
+    result = await call(path, 'status')
+    assert [(i['id'], i['name']) for i in result] == [(0, 'a'), (1, 'b')]
+
+    with pytest.raises(Exception, match='duplicate component name'):
+        await call(path, 'add', {'name': 'b', 'args': []})
+
+    result = await call(path, 'remove', {'names': ['a']})
+    assert result is None
+
+    result = await call(path, 'status')
+    assert [(i['id'], i['name']) for i in result] == [(1, 'b')]
+
+    await server.async_close()
+    await registry.async_close()
+
+
+async def test_scale(path):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    registry = hat.orchestrator.registry.Registry(
+        [{'name': 'a', 'args': ['{instance}'], 'instances': 2}],
+        lambda conf: hat.orchestrator.component.Component(
+            conf, create_process=backend.create_process))
+    server = await hat.orchestrator.control.listen(path, registry.components,
+                                                   registry=registry)
+
+    result = await call(path, 'scale', {'group': 'a', 'instances': 3})
+    assert result is None
+
+    result = await call(path, 'status', {'groups': ['a']})
+    assert [(i['id'], i['name'], i['group']) for i in result] == [
+        (0, 'a/0', 'a'), (1, 'a/1', 'a'), (2, 'a/2', 'a')]
+
+    with pytest.raises(Exception, match='invalid group'):
+        await call(path, 'scale', {'group': 'b', 'instances': 1})
+
+    await server.async_close()
+    await registry.async_close()
+
+
+async def test_rolling_restart(path):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    components = [hat.orchestrator.component.Component(
+                      {'name': name, 'args': [], 'start_delay': 0},
+                      create_process=backend.create_process)
+                  for name in ['a', 'b', 'c']]
+    server = await hat.orchestrator.control.listen(
+        path, dict(enumerate(components)))
+
+    while not all(i.status == Status.RUNNING for i in components):
+        await asyncio.sleep(0.001)
+
+    result = await call(path, 'rolling_restart', {'names': ['a', 'b'],
+                                                  'max_unavailable': 2})
+    assert result is None
+    assert [i.start_count for i in components] == [2, 2, 1]
+
+    await server.async_close()
+    for component in components:
+        await component.async_close()
+
+
+async def test_add_not_available(path):
+    server = await hat.orchestrator.control.listen(path, {})
+
+    with pytest.raises(Exception, match='registry not available'):
+        await call(path, 'add', {'name': 'a', 'args': []})
+
+    await server.async_close()
@@ -0,0 +1,219 @@
+import asyncio
+import sys
+
+import pytest
+
+from hat import aio
+
+from hat.orchestrator.component import Status
+import hat.orchestrator.engine
+import hat.orchestrator.sim
+
+import test_component
+from test_component import process_queue  # NOQA
+
+
+# component tests which don't depend on listening sockets, overlapping
+# restart or component's internals are repeated with compact components
+shared_tests = ['test_delayed_start_stop',
+                'test_revive_on_stop',
+                'test_revive_on_component_finish',
+                'test_revive_on_delay',
+                'test_stop_during_delay',
+                'test_initial_status',
+                'test_closed',
+                'test_conf_properties',
+                'test_call_create_subprocess_exec_without_revive',
+                'test_call_create_subprocess_exec_with_revive',
+                'test_process_stopped_on_close',
+                'test_process_stopped_on_stop',
+                'test_new_process_on_start',
+                'test_soft_terminate_process',
+                'test_hard_terminate_process',
+                'test_noop_revive',
+                'test_noop_start',
+                'test_noop_stop',
+                'test_starting_no_interrupt',
+                'test_stopping_no_interrupt',
+                'test_actions_not_queued_for_seq_exec',
+                'test_console_output',
+                'test_restart',
+                'test_restart_then_stop',
+                'test_started',
+                'test_initial_state_override',
+                'test_stdin_output',
+                'test_notify',
+                'test_watchdog',
+                'test_env']
+
+
+@pytest.fixture
+async def engine(monkeypatch):
+    engine = hat.orchestrator.engine.Engine()
+    monkeypatch.setattr(test_component, 'Component', engine.create_component)
+    yield engine
+    await engine.async_close()
+
+
+def create_conf(name='name', code='import time; time.sleep(10)', **kwargs):
+    return {'name': name,
+            'args': [sys.executable, '-c', code],
+            'start_delay': 0,
+            **kwargs}
+
+
+async def wait_status(component, status):
+    while component.status != status:
+        await asyncio.sleep(0.01)
+
+
+for name in shared_tests:
+    globals()[name] = pytest.mark.usefixtures('engine')(
+        getattr(test_component, name))
+
+
+def test_is_supported():
+    assert hat.orchestrator.engine.is_supported(create_conf())
+    assert not hat.orchestrator.engine.is_supported(
+        create_conf(sockets=[{'name': 'a', 'port': 0}]))
+    assert not hat.orchestrator.engine.is_supported(
+        create_conf(on_demand=True))
+    assert not hat.orchestrator.engine.is_supported(
+        create_conf(overlap_restart=True))
+
+
+async def test_create(engine):
+    component = engine.create_component(create_conf(auto_start=False))
+    assert isinstance(component, aio.Resource)
+    assert not hasattr(component, '__dict__')
+    assert engine.component_count == 1
+
+    with pytest.raises(ValueError):
+        engine.create_component(create_conf(on_demand=True))
+    assert engine.component_count == 1
+
+    await component.async_close()
+    assert engine.component_count == 0
+
+    await engine.async_close()
+    with pytest.raises(Exception):
+        engine.create_component(create_conf())
+
+
+async def test_engine_close():
+    engine = hat.orchestrator.engine.Engine()
+    components = [engine.create_component(create_conf(f'c{i}'))
+                  for i in range(10)]
+    for component in components:
+        await wait_status(component, Status.RUNNING)
+    pids = [component.pid for component in components]
+
+    await engine.async_close()
+    assert all(component.is_closed for component in components)
+    assert all(component.status == Status.STOPPED
+               for component in components)
+    assert all(component.returncode is not None for component in components)
+    assert len(set(pids)) == len(components)
+
+
+async def test_async_group(engine):
+    component = engine.create_component(create_conf(auto_start=False))
+    assert component.async_group.is_open
+
+    component.async_group.close()
+    await component.wait_closed()
+    assert component.status == Status.STOPPED
+
+    component = engine.create_component(create_conf(auto_start=False))
+    await component.async_close()
+    assert component.async_group.is_closing
+
+
+async def test_output(engine):
+    component = engine.create_component(create_conf(
+        code='for i in range(100): print(i)'))
+
+    output_queue = aio.Queue()
+    component.register_output_cb(output_queue.put_nowait)
+
+    for i in range(100):
+        assert await output_queue.get() == str(i)
+
+    await wait_status(component, Status.STOPPED)
+    assert component.output_lines == 100
+    assert component.start_count == 1
+    assert component.returncode == 0
+    assert component.latencies['stop'].count == 1
+    assert 'exited' in component.last_lifecycle
+
+
+async def test_create_error(engine):
+    create_count = 0
+
+    async def create_process(*args, **kwargs):
+        nonlocal create_count
+        create_count += 1
+        raise Exception()
+
+    component = engine.create_component(create_conf(revive=True),
+                                        create_process=create_process)
+
+    while create_count < 3:
+        await asyncio.sleep(0.001)
+    assert component.start_count == 0
+
+    await component.async_close()
+    assert component.status == Status.STOPPED
+
+
+async def test_close_while_starting(engine):
+    created = asyncio.Event()
+
+    async def create_process(*args, **kwargs):
+        created.set()
+        await asyncio.Future()
+
+    component = engine.create_component(create_conf(),
+                                        create_process=create_process)
+    await created.wait()
+    assert component.status == Status.STARTING
+
+    await component.async_close()
+    assert component.status == Status.STOPPED
+
+
+async def test_detach(engine):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    component = engine.create_component(create_conf(),
+                                        create_process=backend.create_process)
+    await wait_status(component, Status.RUNNING)
+
+    component.detach()
+    await component.wait_closed()
+    assert component.status == Status.STOPPED
+    assert len(backend.processes) == 1
+    assert backend.processes[0]._detached
+
+
+async def test_many_components(engine):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script(duration=0.01))
+    components = [engine.create_component(
+                      create_conf(f'c{i}', revive=True),
+                      create_process=backend.create_process)
+                  for i in range(1000)]
+
+    while any(component.start_count < 2 for component in components):
+        await asyncio.sleep(0.01)
+
+    for component in components:
+        component.set_revive(False)
+        component.stop()
+
+    while any(component.status != Status.STOPPED
+              for component in components):
+        await asyncio.sleep(0.01)
+
+    await engine.async_close()
+    assert engine.component_count == 0
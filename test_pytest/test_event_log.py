@@ -0,0 +1,121 @@
+import pytest
+
+from hat import util
+
+from hat.orchestrator.component import Status
+import hat.orchestrator.event_log
+
+
+class Component:
+
+    def __init__(self, name):
+        self._name = name
+        self._status = Status.STOPPED
+        self._returncode = None
+        self._change_cbs = util.CallbackRegistry()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def returncode(self):
+        return self._returncode
+
+    def register_change_cb(self, cb):
+        return self._change_cbs.register(cb)
+
+    def set_status(self, status, returncode=None):
+        self._status = status
+        self._returncode = returncode
+        self._change_cbs.notify()
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        hat.orchestrator.event_log.EventLog(0)
+
+
+def test_empty():
+    event_log = hat.orchestrator.event_log.EventLog()
+    assert event_log.last_seq == 0
+    assert event_log.first_seq == 1
+    assert event_log.get() == []
+    assert event_log.get_data() == {'first_seq': 1,
+                                    'last_seq': 0,
+                                    'lost': False,
+                                    'events': []}
+
+
+def test_watch():
+    event_log = hat.orchestrator.event_log.EventLog()
+    component = Component('c')
+
+    with event_log.watch(42, component):
+        component.set_status(Status.STARTING)
+        component.set_status(Status.RUNNING)
+        component.set_status(Status.RUNNING)
+        component.set_status(Status.STOPPING)
+        component.set_status(Status.STOPPED, 123)
+
+    component.set_status(Status.STARTING)
+
+    events = event_log.get()
+    assert [event.seq for event in events] == [1, 2, 3, 4]
+    assert all(event.component_id == 42 for event in events)
+    assert all(event.component == 'c' for event in events)
+    assert [(event.old_status, event.new_status) for event in events] == [
+        (Status.STOPPED, Status.STARTING),
+        (Status.STARTING, Status.RUNNING),
+        (Status.RUNNING, Status.STOPPING),
+        (Status.STOPPING, Status.STOPPED)]
+    assert [event.returncode for event in events] == [None, None, None, 123]
+
+    assert [event.seq for event in event_log.get(2)] == [3, 4]
+    assert event_log.get(4) == []
+    assert event_log.get(5) == []
+
+
+@pytest.mark.parametrize('size', [1, 2, 10])
+def test_ring(size):
+    event_log = hat.orchestrator.event_log.EventLog(size)
+    component = Component('c')
+    event_log.watch(0, component)
+
+    for _ in range(3 * size):
+        component.set_status(Status.RUNNING)
+        component.set_status(Status.STOPPED)
+
+    last_seq = 6 * size
+    assert event_log.last_seq == last_seq
+    assert event_log.first_seq == last_seq - size + 1
+    assert [event.seq for event in event_log.get()] == list(
+        range(last_seq - size + 1, last_seq + 1))
+
+    data = event_log.get_data(last_seq - size)
+    assert data['lost'] is False
+    assert len(data['events']) == size
+
+    data = event_log.get_data(last_seq - size - 1)
+    assert data['lost'] is True
+    assert len(data['events']) == size
+
+
+def test_returncode_only_on_stop():
+    event_log = hat.orchestrator.event_log.EventLog()
+    component = Component('c')
+    event_log.watch(0, component)
+
+    component.set_status(Status.STARTING)
+    component.set_status(Status.RUNNING)
+    component.set_status(Status.STOPPING)
+    component.set_status(Status.STOPPED, 1)
+    component.set_status(Status.STARTING, 1)
+    component.set_status(Status.STOPPED, 1)
+
+    assert [event.returncode for event in event_log.get()] == [
+        None, None, None, 1, None, None]
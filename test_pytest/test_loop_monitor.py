@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from hat import aio
+
+import hat.orchestrator.loop_monitor
+
+
+async def test_create():
+    handle_run = asyncio.Handle._run
+
+    monitor = hat.orchestrator.loop_monitor.LoopMonitor({})
+    assert monitor.is_open
+    assert asyncio.Handle._run is not handle_run
+
+    with pytest.raises(Exception):
+        hat.orchestrator.loop_monitor.LoopMonitor({})
+
+    await monitor.async_close()
+    assert asyncio.Handle._run is handle_run
+
+    monitor = hat.orchestrator.loop_monitor.LoopMonitor({})
+    await monitor.async_close()
+
+
+async def test_lag():
+    monitor = hat.orchestrator.loop_monitor.LoopMonitor({'interval': 0.001})
+    assert monitor.get_lag_percentiles() is None
+
+    await asyncio.sleep(0.01)
+    time.sleep(0.05)
+    await asyncio.sleep(0.01)
+
+    lag = monitor.get_lag_percentiles()
+    assert lag['p50'] <= lag['p90'] <= lag['p99'] <= lag['max']
+    assert lag['max'] >= 0.04
+
+    await monitor.async_close()
+
+
+async def test_slow_callback():
+    monitor = hat.orchestrator.loop_monitor.LoopMonitor({'threshold': 0.02})
+
+    async def slow_coroutine():
+        time.sleep(0.03)
+
+    async def fast_coroutine():
+        await asyncio.sleep(0)
+
+    await asyncio.create_task(fast_coroutine())
+    assert monitor.slow_callback_count == 0
+
+    await asyncio.create_task(slow_coroutine(), name='slow')
+    assert monitor.slow_callback_count == 1
+
+    slow_callback = monitor.slow_callbacks[0]
+    assert slow_callback.duration >= 0.03
+    assert 'slow' in slow_callback.name
+    assert 'slow_coroutine' in slow_callback.name
+
+    data = monitor.get_data()
+    assert data['slow_callback_count'] == 1
+    assert data['slow_callbacks'][0]['name'] == slow_callback.name
+
+    await monitor.async_close()
+
+
+async def test_report():
+    monitor = hat.orchestrator.loop_monitor.LoopMonitor({
+        'interval': 0.001,
+        'report_interval': 0.01})
+    change_queue = aio.Queue()
+    monitor.register_change_cb(lambda: change_queue.put_nowait(None))
+
+    await change_queue.get()
+    assert monitor.get_data()['lag'] is not None
+
+    await monitor.async_close()
@@ -0,0 +1,115 @@
+import asyncio
+import sys
+
+import aiohttp
+import pytest
+
+from hat import util
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.histogram
+import hat.orchestrator.metrics
+
+
+def parse_metrics(text):
+    result = {}
+    for line in text.split('\n'):
+        if not line or line.startswith('#'):
+            continue
+        key, value = line.rsplit(' ', 1)
+        result[key] = float(value)
+    return result
+
+
+async def http_get(port, path):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'http://127.0.0.1:{port}{path}') as res:
+            return res.status, res.headers['Content-Type'], await res.text()
+
+
+def test_histogram():
+    histogram = hat.orchestrator.histogram.Histogram((1, 2, 3))
+    assert histogram.count == 0
+    assert histogram.get_cumulative_counts() == [0, 0, 0]
+
+    for value in [0.5, 1, 1.5, 3, 4]:
+        histogram.observe(value)
+
+    assert histogram.count == 5
+    assert histogram.sum == 10
+    assert histogram.get_cumulative_counts() == [2, 3, 4]
+
+
+async def test_collect():
+    component = Component({'name': 'a"b',
+                           'args': [sys.executable, '-c',
+                                    'print("abc"); print("xyz")'],
+                           'start_delay': 0})
+    status_queue = asyncio.Queue()
+    component.register_change_cb(
+        lambda: status_queue.put_nowait(component.status))
+    while await status_queue.get() != Status.STOPPED:
+        pass
+
+    text = await hat.orchestrator.metrics.collect([component])
+    metrics = parse_metrics(text)
+
+    labels = 'component="a\\"b"'
+    assert metrics[f'hat_orchestrator_component_status'
+                   f'{{{labels},status="STOPPED"}}'] == 1
+    assert metrics[f'hat_orchestrator_component_status'
+                   f'{{{labels},status="RUNNING"}}'] == 0
+    assert metrics[f'hat_orchestrator_component_starts_total'
+                   f'{{{labels}}}'] == 1
+    assert metrics[f'hat_orchestrator_component_restarts_total'
+                   f'{{{labels}}}'] == 0
+    assert metrics[f'hat_orchestrator_component_last_returncode'
+                   f'{{{labels}}}'] == 0
+    assert metrics[f'hat_orchestrator_component_output_lines_total'
+                   f'{{{labels}}}'] == 2
+    assert metrics[f'hat_orchestrator_component_output_bytes_total'
+                   f'{{{labels}}}'] >= 8
+    assert metrics[f'hat_orchestrator_component_spawn_latency_seconds_count'
+                   f'{{{labels}}}'] == 1
+    assert metrics['hat_orchestrator_tasks'] >= 1
+
+    await component.async_close()
+
+
+async def test_listen():
+    port = util.get_unused_tcp_port()
+    component = Component({'name': 'c',
+                           'args': [sys.executable, '-c', ''],
+                           'auto_start': False})
+    server = await hat.orchestrator.metrics.listen('127.0.0.1', port,
+                                                   [component])
+
+    status, content_type, body = await http_get(port, '/metrics')
+    assert status == 200
+    assert content_type == hat.orchestrator.metrics.content_type
+    metrics = parse_metrics(body)
+    assert metrics['hat_orchestrator_component_starts_total'
+                   '{component="c"}'] == 0
+
+    status, _, _ = await http_get(port, '/abc')
+    assert status == 404
+
+    await server.async_close()
+    await component.async_close()
+
+
+@pytest.mark.parametrize('component_count', [1, 1000])
+async def test_collect_many(component_count):
+    components = [Component({'name': str(i),
+                             'args': [sys.executable, '-c', ''],
+                             'auto_start': False})
+                  for i in range(component_count)]
+
+    text = await hat.orchestrator.metrics.collect(components)
+    metrics = parse_metrics(text)
+    assert sum(1 for i in metrics
+               if i.startswith('hat_orchestrator_component_status')) == (
+        component_count * len(Status))
+
+    for component in components:
+        await component.async_close()
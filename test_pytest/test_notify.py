@@ -0,0 +1,144 @@
+import asyncio
+import os
+import socket
+import sys
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.notify
+
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux',
+                                reason="notify socket not supported")
+
+send_code = ("import os, socket; "
+             "s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM); "
+             "s.sendto(b'READY=1\\nSTATUS=abc', os.environ['NOTIFY_SOCKET'])")
+
+
+class FakeComponent:
+
+    def __init__(self, pids):
+        self._pids = pids
+        self._queue = asyncio.Queue()
+
+    @property
+    def pids(self):
+        return self._pids
+
+    @property
+    def queue(self):
+        return self._queue
+
+    def notify(self, fields):
+        self._queue.put_nowait(fields)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'notify')
+
+
+def send(path, *datagrams):
+    if path.startswith('@'):
+        path = '\0' + path[1:]
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+        for datagram in datagrams:
+            s.sendto(datagram, path)
+
+
+def test_parse():
+    assert hat.orchestrator.notify.parse(b'') == {}
+    assert hat.orchestrator.notify.parse(b'READY=1') == {'READY': '1'}
+    fields = hat.orchestrator.notify.parse(
+        b'READY=1\nSTATUS=a = b\n\nabc\n=x\n')
+    assert fields == {'READY': '1', 'STATUS': 'a = b'}
+
+
+async def test_create(path):
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    assert server.is_open
+    assert server.path == path
+    assert os.path.exists(path)
+
+    await server.async_close()
+    assert not os.path.exists(path)
+
+
+async def test_abstract_path(path):
+    path = f'@{path}'
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    component = FakeComponent([os.getpid()])
+    server.set_components([component])
+
+    send(path, b'READY=1')
+    assert await component.queue.get() == {'READY': '1'}
+
+    await server.async_close()
+
+
+async def test_batch(path):
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    component = FakeComponent([os.getpid()])
+    other_component = FakeComponent([os.getpid() + 1])
+    server.set_components([component, other_component])
+
+    # number of queued datagrams is limited by net.unix.max_dgram_qlen
+    send(path, b'READY=1',
+         *(f'WATCHDOG=1\nSTATUS={i}'.encode() for i in range(5)))
+    assert await component.queue.get() == {'READY': '1',
+                                           'WATCHDOG': '1',
+                                           'STATUS': '4'}
+
+    send(path, b'WATCHDOG=trigger', b'WATCHDOG=1')
+    assert await component.queue.get() == {'WATCHDOG': 'trigger'}
+
+    await asyncio.sleep(0.01)
+    assert component.queue.empty()
+    assert other_component.queue.empty()
+
+    await server.async_close()
+
+
+async def test_unknown_process(path):
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    component = FakeComponent([])
+    server.set_components([component])
+
+    send(path, b'READY=1')
+    await asyncio.sleep(0.01)
+    assert component.queue.empty()
+
+    # pids are updated on notification from unknown process
+    component._pids = [os.getpid()]
+    send(path, b'READY=1')
+    assert await component.queue.get() == {'READY': '1'}
+
+    await server.async_close()
+
+
+@pytest.mark.parametrize('code', [
+    f'{send_code}; import time; time.sleep(10)',
+    (f'import subprocess, sys; '
+     f'subprocess.run([sys.executable, "-c", {send_code!r}]); '
+     f'import time; time.sleep(10)')])
+async def test_component(path, code):
+    server = hat.orchestrator.notify.NotifyServer({'path': path})
+    component = Component({'name': 'name',
+                           'args': [sys.executable, '-c', code],
+                           'start_delay': 0},
+                          env={'NOTIFY_SOCKET': path})
+    server.set_components([component])
+
+    changes = asyncio.Queue()
+    component.register_change_cb(lambda: changes.put_nowait(None))
+
+    while not component.ready:
+        await changes.get()
+    assert component.status == Status.RUNNING
+    assert component.status_text == 'abc'
+
+    await component.async_close()
+    await server.async_close()
@@ -1,5 +1,7 @@
 import asyncio
 import collections
+import os
+import socket
 import sys
 
 import pytest
@@ -128,6 +130,26 @@ async def test_long_lines():
             counter += 1
 
     assert counter >= 10
+    assert process.dropped_lines == counter - 10
+
+    await process.async_close()
+
+
+async def test_readline_queue_full():
+    process = await hat.orchestrator.process.create_process(
+        [sys.executable, '-c', 'for i in range(100): print(i)'],
+        read_queue_size=10)
+
+    await asyncio.sleep(0.1)
+
+    lines = []
+    with pytest.raises(ConnectionError):
+        while True:
+            lines.append(await process.readline())
+
+    assert lines == [str(i) for i in range(100)]
+    assert process.output_lines == 100
+    assert process.dropped_lines == 0
 
     await process.async_close()
 
@@ -181,6 +203,67 @@ async def test_sigkill(tmpdir):
     assert process.returncode
 
 
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+@pytest.mark.parametrize("fd_count", [1, 3])
+async def test_pass_fds(fd_count):
+    sockets = [socket.create_server(('127.0.0.1', 0))
+               for _ in range(fd_count)]
+    ports = [sock.getsockname()[1] for sock in sockets]
+
+    process = await hat.orchestrator.process.create_process([
+        sys.executable, '-c',
+        'import os, socket\n'
+        'print(os.environ["LISTEN_FDS"])\n'
+        'print(os.environ["LISTEN_PID"] == str(os.getpid()))\n'
+        'for i in range(int(os.environ["LISTEN_FDS"])):\n'
+        '    sock = socket.socket(fileno=3 + i)\n'
+        '    print(sock.getsockname()[1])\n'
+        '    sock.detach()\n'
+        'print(len(os.listdir("/proc/self/fd")))'],
+        pass_fds=[sock.fileno() for sock in sockets])
+
+    assert await process.readline() == str(fd_count)
+    assert await process.readline() == 'True'
+    for port in ports:
+        assert await process.readline() == str(port)
+    fd_count_in_child = int(await process.readline())
+
+    await process.wait_closed()
+    assert process.returncode == 0
+
+    # stdin, stdout, stderr, passed fds and fd used by listdir
+    if os.path.exists('/proc/self/fd'):
+        assert fd_count_in_child == 3 + fd_count + 1
+
+    for sock in sockets:
+        sock.close()
+
+
+@pytest.mark.parametrize("pass_fd", [False, True])
+async def test_env(pass_fd):
+    if pass_fd and sys.platform == 'win32':
+        pytest.skip("not supported")
+
+    sock = socket.create_server(('127.0.0.1', 0))
+
+    process = await hat.orchestrator.process.create_process([
+        sys.executable, '-c',
+        'import os\n'
+        'print(os.environ["ABC"], os.environ.get("LISTEN_FDS"))\n'
+        'print(os.environ.get("PATH") is not None)'],
+        pass_fds=[sock.fileno()] if pass_fd else [],
+        env={'ABC': 'x y'})
+
+    assert await process.readline() == f'x y {1 if pass_fd else None}'
+    assert await process.readline() == 'True'
+
+    await process.wait_closed()
+    assert process.returncode == 0
+    assert 'ABC' not in os.environ
+
+    sock.close()
+
+
 @pytest.mark.skipif(sys.platform != 'win32', reason="only for win32")
 async def test_win32_job():
     job = hat.orchestrator.process.Win32Job()
@@ -190,3 +273,52 @@ async def test_win32_job():
 
     await job.async_close()
     await asyncio.wait_for(process.wait_closed(), 1)
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="only for linux")
+async def test_detach_and_adopt(tmp_path):
+    fifo_path = tmp_path / 'output.fifo'
+
+    process = await hat.orchestrator.process.create_process([
+        sys.executable, '-c',
+        'import sys, time\n'
+        'print(1, flush=True)\n'
+        'sys.stdin.readline()\n'
+        'print(2, flush=True)\n'
+        'time.sleep(10)'],
+        inherit_stdin=False,
+        detached=True,
+        output_fifo=fifo_path)
+    pid = process.pid
+
+    assert await process.readline() == '1'
+
+    process.write('\n', close=False)
+    process.detach()
+    await process.wait_closed()
+
+    assert process.returncode is None
+    assert process.exit_time is None
+    assert os.path.exists(f'/proc/{pid}')
+
+    process = await hat.orchestrator.process.adopt_process(
+        pid, output_fifo=fifo_path, sigint_timeout=1)
+
+    assert process.pid == pid
+    assert await process.readline() == '2'
+
+    await process.async_close()
+
+    assert process.returncode is None
+    assert process.sigint_time is not None
+    assert process.exit_time is not None
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="only for linux")
+async def test_adopt_exited_process():
+    process = await hat.orchestrator.process.create_process([
+        sys.executable, '-c', 'pass'])
+    await process.wait_closed()
+
+    with pytest.raises(ProcessLookupError):
+        await hat.orchestrator.process.adopt_process(process.pid)
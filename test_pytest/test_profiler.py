@@ -0,0 +1,76 @@
+from pathlib import Path
+import asyncio
+import pstats
+import tracemalloc
+
+import pytest
+
+import hat.orchestrator.profiler
+
+
+@pytest.fixture
+async def profiler(tmp_path):
+    return hat.orchestrator.profiler.Profiler({'path': str(tmp_path / 'x')})
+
+
+async def test_profile(profiler):
+
+    async def busy():
+        while True:
+            sum(range(1000))
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(busy())
+    result = await profiler.profile(0.05)
+    task.cancel()
+
+    stats = pstats.Stats(result['stats'])
+    assert any(name == 'busy' for _, _, name in stats.stats.keys())
+
+    summary = Path(result['summary']).read_text()
+    assert 'busy' in summary
+
+    await profiler.async_close()
+
+
+async def test_profile_in_progress(profiler):
+    task = asyncio.create_task(profiler.profile(0.05))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Exception):
+        await profiler.profile(0.05)
+
+    await task
+    await profiler.async_close()
+
+
+async def test_tracemalloc(profiler):
+    with pytest.raises(Exception):
+        await profiler.take_snapshot()
+
+    with pytest.raises(Exception):
+        profiler.stop_tracemalloc()
+
+    profiler.start_tracemalloc()
+    assert tracemalloc.is_tracing()
+
+    with pytest.raises(Exception):
+        profiler.start_tracemalloc()
+
+    result = await profiler.take_snapshot()
+    assert result['diff'] is None
+    snapshot = tracemalloc.Snapshot.load(result['snapshot'])
+    assert snapshot.traces is not None
+    assert Path(result['summary']).read_text().startswith('total:')
+
+    data = [bytearray(1024) for _ in range(100)]  # NOQA
+
+    result = await profiler.take_snapshot()
+    assert Path(result['diff']).exists()
+
+    profiler.stop_tracemalloc()
+    assert not tracemalloc.is_tracing()
+
+    profiler.start_tracemalloc()
+    await profiler.async_close()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,432 @@
+import asyncio
+import contextlib
+import functools
+import socket
+
+import pytest
+
+from hat import aio
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.registry
+import hat.orchestrator.sim
+
+
+@pytest.fixture
+def backend():
+    return hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+
+
+@pytest.fixture
+def create_component(backend):
+    return functools.partial(Component,
+                             create_process=backend.create_process)
+
+
+def create_conf(name, args=['x'], **kwargs):
+    return {'name': name,
+            'args': args,
+            'start_delay': 0,
+            **kwargs}
+
+
+@contextlib.contextmanager
+def socket_in_use():
+    with socket.create_server(('127.0.0.1', 0)) as sock:
+        yield sock.getsockname()[1]
+
+
+async def wait_running(components):
+    while not all(component.status == Status.RUNNING
+                  for component in components):
+        await asyncio.sleep(0.001)
+
+
+def test_get_diff():
+    diff = hat.orchestrator.registry.get_diff(
+        [create_conf('a'), create_conf('b'), create_conf('c')],
+        [create_conf('d'), create_conf('c', args=['y']), create_conf('a')])
+
+    assert diff.added == ['d']
+    assert diff.removed == ['b']
+    assert diff.changed == ['c']
+
+
+def test_get_diff_duplicate_names():
+    with pytest.raises(Exception, match='duplicate component name'):
+        hat.orchestrator.registry.get_diff([], [create_conf('a'),
+                                                create_conf('a')])
+
+
+async def test_create(create_component):
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a'), create_conf('b')], create_component)
+    assert registry.is_open
+
+    components = list(registry.components.values())
+    assert list(registry.components.keys()) == [0, 1]
+    assert [i.name for i in components] == ['a', 'b']
+
+    await wait_running(components)
+
+    await registry.async_close()
+    assert all(component.is_closed for component in components)
+    assert all(component.status == Status.STOPPED
+               for component in components)
+
+
+async def test_create_registry(create_component):
+
+    async def create_component_async(conf):
+        await asyncio.sleep(0)
+        return create_component(conf)
+
+    registry = await hat.orchestrator.registry.create_registry(
+        [create_conf('a'), create_conf('b', instances=2)],
+        create_component_async)
+
+    components = list(registry.components.values())
+    assert list(registry.components.keys()) == [0, 1, 2]
+    assert [i.name for i in components] == ['a', 'b/0', 'b/1']
+
+    component_id = await registry.add(create_conf('c'))
+    assert component_id == 3
+    assert registry.components[3].name == 'c'
+
+    await registry.scale('b', 3)
+    assert [i.name for i in registry.components.values()] == [
+        'a', 'b/0', 'b/1', 'c', 'b/2']
+
+    await registry.async_close()
+    assert all(component.is_closed
+               for component in registry.components.values())
+
+
+async def test_create_registry_error(create_component):
+    components = []
+
+    def create_component_error(conf):
+        if conf['name'] == 'b':
+            raise Exception('create error')
+        components.append(create_component(conf))
+        return components[-1]
+
+    with pytest.raises(Exception, match='create error'):
+        await hat.orchestrator.registry.create_registry(
+            [create_conf('a'), create_conf('b')], create_component_error)
+
+    assert len(components) == 1
+    assert components[0].is_closed
+
+
+async def test_component_closed(create_component):
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a'), create_conf('b')], create_component)
+    components = list(registry.components.values())
+
+    await components[0].async_close()
+    await registry.wait_closed()
+    assert components[1].is_closed
+
+
+async def test_reload(backend, create_component):
+    change_queue = aio.Queue()
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a'), create_conf('b'), create_conf('c')],
+        create_component)
+    registry.register_change_cb(lambda: change_queue.put_nowait(None))
+
+    components = registry.components
+    a, b, c = components.values()
+    await wait_running(components.values())
+    a_pid = a.pid
+
+    diff = await registry.reload([create_conf('d'),
+                                  create_conf('c', args=['y']),
+                                  create_conf('a')])
+    assert diff._asdict() == {'added': ['d'],
+                              'removed': ['b'],
+                              'changed': ['c']}
+    await change_queue.get()
+
+    assert registry.components is components
+    assert list(components.keys()) == [3, 2, 0]
+    assert [i.name for i in components.values()] == ['d', 'c', 'a']
+    assert components[0] is a
+    assert components[2] is not c
+
+    assert b.is_closed
+    assert c.is_closed
+    assert b.status == Status.STOPPED
+    assert c.status == Status.STOPPED
+    assert a.is_open
+
+    await wait_running(components.values())
+    assert a.pid == a_pid
+    assert a.start_count == 1
+    assert components[2].conf['args'] == ['y']
+
+    new_components = list(components.values())
+    await registry.async_close()
+    assert all(component.is_closed
+               for component in [a, b, c, *new_components])
+
+
+async def test_reload_unchanged(create_component):
+    confs = [create_conf('a'), create_conf('b')]
+    registry = hat.orchestrator.registry.Registry(confs, create_component)
+    components = dict(registry.components)
+
+    diff = await registry.reload(confs)
+    assert diff._asdict() == {'added': [],
+                              'removed': [],
+                              'changed': []}
+    assert registry.components == components
+    assert all(component.is_open for component in components.values())
+
+    await registry.async_close()
+
+
+async def test_reload_create_error(create_component):
+    change_queue = aio.Queue()
+
+    def create_component_with_error(conf):
+        if conf['name'] == 'err':
+            raise Exception('create error')
+        return create_component(conf)
+
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a'), create_conf('b')], create_component_with_error)
+    registry.register_change_cb(lambda: change_queue.put_nowait(None))
+    components = dict(registry.components)
+
+    with pytest.raises(Exception, match='create error'):
+        await registry.reload([create_conf('a', args=['y']),
+                               create_conf('c'),
+                               create_conf('err')])
+
+    assert registry.components == components
+    assert all(component.is_open for component in components.values())
+    assert registry.is_open
+    assert change_queue.empty()
+
+    await registry.async_close()
+
+
+async def test_reload_sockets(create_component):
+    socket_conf = {'type': 'tcp', 'port': 0}
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a', sockets=[socket_conf]), create_conf('b')],
+        create_component)
+    a, b = registry.components.values()
+    port = a._sockets[0].getsockname()[1]
+    socket_conf = {'type': 'tcp', 'port': port}
+
+    diff = await registry.reload([
+        create_conf('a', args=['y'], sockets=[socket_conf]),
+        create_conf('c', sockets=[{'type': 'tcp', 'port': 0}]),
+        create_conf('b')])
+    assert diff._asdict() == {'added': ['c'],
+                              'removed': [],
+                              'changed': ['a']}
+    assert a.is_closed
+    assert list(registry.components.keys()) == [0, 2, 1]
+    assert registry.components[0].conf['args'] == ['y']
+
+    # replacement can not bind socket which is still in use
+    with socket_in_use() as port:
+        with pytest.raises(Exception):
+            await registry.reload([
+                create_conf('a', sockets=[{'type': 'tcp', 'port': port}]),
+                create_conf('b')])
+
+    assert [i.name for i in registry.components.values()] == ['b']
+    assert all(component.is_open
+               for component in registry.components.values())
+    assert registry.is_open
+
+    await registry.async_close()
+
+
+async def test_reload_duplicate_names(create_component):
+    registry = hat.orchestrator.registry.Registry([create_conf('a')],
+                                                  create_component)
+    components = dict(registry.components)
+
+    with pytest.raises(Exception, match='duplicate component name'):
+        await registry.reload([create_conf('b'), create_conf('b')])
+
+    assert registry.components == components
+    assert registry.is_open
+
+    await registry.async_close()
+
+
+async def test_add_remove(create_component):
+    change_queue = aio.Queue()
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a'), create_conf('b')], create_component)
+    registry.register_change_cb(lambda: change_queue.put_nowait(None))
+    a, b = registry.components.values()
+
+    component_id = await registry.add(create_conf('c'))
+    await change_queue.get()
+    assert component_id == 2
+    c = registry.components[2]
+    assert c.name == 'c'
+    assert list(registry.components.keys()) == [0, 1, 2]
+
+    await wait_running(registry.components.values())
+
+    await registry.remove([1])
+    await change_queue.get()
+    assert list(registry.components.keys()) == [0, 2]
+    assert b.is_closed
+    assert b.status == Status.STOPPED
+    assert a.is_open
+    assert c.is_open
+
+    component_id = await registry.add(create_conf('b'))
+    await change_queue.get()
+    assert component_id == 3
+    assert list(registry.components.keys()) == [0, 2, 3]
+
+    with pytest.raises(Exception, match='duplicate component name'):
+        await registry.add(create_conf('a'))
+
+    with pytest.raises(Exception, match='invalid component id'):
+        await registry.remove([1])
+
+    assert change_queue.empty()
+    assert list(registry.components.keys()) == [0, 2, 3]
+
+    await registry.async_close()
+
+
+async def test_add_invalid(create_component):
+
+    def validate(conf):
+        if 'args' not in conf:
+            raise Exception('invalid conf')
+
+    registry = hat.orchestrator.registry.Registry([], create_component,
+                                                  validate)
+
+    with pytest.raises(Exception, match='invalid conf'):
+        await registry.add({'name': 'a'})
+
+    assert registry.components == {}
+
+    await registry.async_close()
+
+
+def test_expand_conf():
+    conf = create_conf('a', args=['x', '--port', '100{instance}'],
+                       stdin='instance {instance}', instances=2)
+
+    result = hat.orchestrator.registry.expand_conf(conf)
+    assert result == [
+        create_conf('a/0', args=['x', '--port', '1000'],
+                    stdin='instance 0', group='a'),
+        create_conf('a/1', args=['x', '--port', '1001'],
+                    stdin='instance 1', group='a')]
+
+    assert hat.orchestrator.registry.expand_conf(create_conf('b')) == [
+        create_conf('b')]
+
+
+def test_get_diff_instances():
+    diff = hat.orchestrator.registry.get_diff(
+        [create_conf('a', instances=3)],
+        [create_conf('a', instances=2), create_conf('a/2')])
+
+    assert diff.added == []
+    assert diff.removed == []
+    assert diff.changed == ['a/2']
+
+
+async def test_create_instances(create_component):
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a', args=['{instance}'], instances=2),
+         create_conf('b')],
+        create_component)
+
+    components = list(registry.components.values())
+    assert [i.name for i in components] == ['a/0', 'a/1', 'b']
+    assert [i.group for i in components] == ['a', 'a', None]
+    assert [i.conf['args'] for i in components] == [['0'], ['1'], ['x']]
+
+    await registry.async_close()
+
+
+async def test_scale(create_component):
+    change_queue = aio.Queue()
+    registry = hat.orchestrator.registry.Registry(
+        [create_conf('a', instances=2), create_conf('b')],
+        create_component)
+    registry.register_change_cb(lambda: change_queue.put_nowait(None))
+    a0, a1, b = registry.components.values()
+    await wait_running(registry.components.values())
+
+    await registry.scale('a', 4)
+    await change_queue.get()
+    assert list(registry.components.keys()) == [0, 1, 2, 3, 4]
+    assert [i.name for i in registry.components.values()] == [
+        'a/0', 'a/1', 'b', 'a/2', 'a/3']
+    assert registry.components[0] is a0
+    assert a0.start_count == 1
+
+    await wait_running(registry.components.values())
+    a3 = registry.components[4]
+
+    await registry.scale('a', 1)
+    await change_queue.get()
+    assert list(registry.components.keys()) == [0, 2]
+    assert a1.is_closed
+    assert a3.is_closed
+    assert a0.is_open
+    assert b.is_open
+
+    await registry.scale('a', 2)
+    await change_queue.get()
+    assert list(registry.components.keys()) == [0, 2, 5]
+    assert registry.components[5].name == 'a/1'
+
+    with pytest.raises(Exception, match='invalid group'):
+        await registry.scale('b', 2)
+
+    with pytest.raises(Exception, match='invalid number of instances'):
+        await registry.scale('a', -1)
+
+    assert change_queue.empty()
+
+    await registry.async_close()
+
+
+async def test_reload_scaled(create_component):
+    confs = [create_conf('a', instances=1)]
+    registry = hat.orchestrator.registry.Registry(confs, create_component)
+
+    await registry.scale('a', 2)
+    a0, a1 = registry.components.values()
+
+    diff = await registry.reload(confs)
+    assert diff._asdict() == {'added': [],
+                              'removed': ['a/1'],
+                              'changed': []}
+    assert list(registry.components.values()) == [a0]
+    assert a1.is_closed
+
+    await registry.async_close()
+
+
+async def test_add_instances(create_component):
+    registry = hat.orchestrator.registry.Registry([], create_component)
+
+    with pytest.raises(Exception, match='replicated component'):
+        await registry.add(create_conf('a', instances=2))
+
+    assert registry.components == {}
+
+    await registry.async_close()
@@ -0,0 +1,231 @@
+import asyncio
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.rollout
+import hat.orchestrator.sim
+
+
+class Backend(hat.orchestrator.sim.Backend):
+
+    def __init__(self):
+        super().__init__(self._get_script)
+        self.scripts = {}
+
+    def _get_script(self, args):
+        script = self.scripts.get(args[0], hat.orchestrator.sim.Script())
+        if isinstance(script, Exception):
+            raise script
+        return script
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+@pytest.fixture
+def create_components(backend):
+
+    async def create_components(names, **kwargs):
+        components = [
+            Component({'name': name,
+                       'args': [name],
+                       'start_delay': 0,
+                       **kwargs},
+                      create_process=backend.create_process)
+            for name in names]
+        await wait_running(components)
+        return components
+
+    return create_components
+
+
+async def wait_running(components):
+    while not all(component.status == Status.RUNNING
+                  for component in components):
+        await asyncio.sleep(0.001)
+
+
+async def close_components(components):
+    for component in components:
+        await component.async_close()
+
+
+@pytest.mark.parametrize('max_unavailable', [1, 2, 5])
+async def test_rolling_restart(create_components, max_unavailable):
+    components = await create_components(['a', 'b', 'c', 'd', 'e'])
+
+    unavailable = set()
+    max_unavailable_count = 0
+
+    def on_change(component):
+        nonlocal max_unavailable_count
+        if component.status == Status.RUNNING:
+            unavailable.discard(component)
+        else:
+            unavailable.add(component)
+        max_unavailable_count = max(max_unavailable_count, len(unavailable))
+
+    for component in components:
+        component.register_change_cb(lambda c=component: on_change(c))
+
+    await hat.orchestrator.rollout.rolling_restart(components,
+                                                   max_unavailable)
+
+    assert max_unavailable_count == max_unavailable
+    assert all(component.status == Status.RUNNING
+               for component in components)
+    assert all(component.start_count == 2 for component in components)
+
+    await close_components(components)
+
+
+async def test_overlap_restart(create_components):
+    components = await create_components(['a', 'b', 'c'],
+                                         overlap_restart=True)
+
+    statuses = []
+    for component in components:
+        component.register_change_cb(
+            lambda c=component: statuses.append(c.status))
+
+    await hat.orchestrator.rollout.rolling_restart(components)
+
+    assert set(statuses) == {Status.STARTING, Status.RUNNING}
+    assert all(component.start_count == 2 for component in components)
+
+    await close_components(components)
+
+
+async def test_overlap_restart_failed(backend, create_components):
+    components = await create_components(['a', 'b'],
+                                         overlap_restart=True,
+                                         overlap_timeout=0.01)
+    backend.scripts['a'] = hat.orchestrator.sim.Script(spawn_duration=1)
+
+    with pytest.raises(Exception, match='not restarted'):
+        await hat.orchestrator.rollout.rolling_restart(components)
+
+    assert [component.status for component in components] == [
+        Status.RUNNING, Status.RUNNING]
+    assert [component.start_count for component in components] == [1, 1]
+
+    await close_components(components)
+
+
+async def test_not_running_skipped(create_components):
+    components = await create_components(['a', 'b'])
+
+    components[0].stop()
+    while components[0].status != Status.STOPPED:
+        await asyncio.sleep(0.001)
+
+    await hat.orchestrator.rollout.rolling_restart(components)
+
+    assert components[0].status == Status.STOPPED
+    assert components[0].start_count == 1
+    assert components[1].start_count == 2
+
+    await close_components(components)
+
+
+async def test_abort_on_start_error(backend, create_components):
+    components = await create_components(['a', 'b', 'c'])
+    backend.scripts['b'] = Exception('start error')
+
+    with pytest.raises(Exception, match='rolling restart aborted'):
+        await hat.orchestrator.rollout.rolling_restart(components)
+
+    assert [component.start_count for component in components] == [2, 1, 1]
+    assert components[2].status == Status.RUNNING
+
+    await close_components(components)
+
+
+async def test_abort_on_min_ready(backend, create_components):
+    components = await create_components(['a', 'b'])
+    backend.scripts['a'] = hat.orchestrator.sim.Script(duration=0.01)
+
+    with pytest.raises(Exception, match='rolling restart aborted'):
+        await hat.orchestrator.rollout.rolling_restart(components,
+                                                       min_ready=1)
+
+    assert components[1].start_count == 1
+
+    await close_components(components)
+
+
+async def test_min_ready_notify(create_components):
+    components = await create_components(['a'])
+
+    async def notify():
+        while components[0].start_count < 2:
+            await asyncio.sleep(0.001)
+        for i in range(5):
+            components[0].notify({'STATUS': str(i)})
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(notify())
+    await hat.orchestrator.rollout.rolling_restart(components, min_ready=0.1)
+    await task
+
+    assert components[0].start_count == 2
+    assert components[0].status_text == '4'
+
+    await close_components(components)
+
+
+async def test_abort_on_ready_timeout(backend, create_components):
+    components = await create_components(['a', 'b'])
+    backend.scripts['a'] = hat.orchestrator.sim.Script(spawn_duration=1)
+
+    with pytest.raises(Exception, match='not ready'):
+        await hat.orchestrator.rollout.rolling_restart(components,
+                                                       ready_timeout=0.01)
+
+    assert components[1].start_count == 1
+
+    await close_components(components)
+
+
+@pytest.mark.parametrize('overlap_restart', [False, True])
+async def test_notify_ready(create_components, overlap_restart):
+    components = await create_components(['a'],
+                                         overlap_restart=overlap_restart,
+                                         notify_ready=True)
+
+    task = asyncio.create_task(
+        hat.orchestrator.rollout.rolling_restart(components))
+
+    while components[0].start_count < 2:
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+    assert not task.done()
+
+    components[0].notify({'READY': '1'})
+    await task
+
+    assert components[0].status == Status.RUNNING
+    assert components[0].ready
+
+    await close_components(components)
+
+
+async def test_abort_on_notify_ready_timeout(create_components):
+    components = await create_components(['a', 'b'], notify_ready=True)
+
+    with pytest.raises(Exception, match='not ready'):
+        await hat.orchestrator.rollout.rolling_restart(components,
+                                                       ready_timeout=0.01)
+
+    assert components[0].start_count == 2
+    assert components[1].start_count == 1
+
+    await close_components(components)
+
+
+async def test_invalid_max_unavailable():
+    with pytest.raises(ValueError):
+        await hat.orchestrator.rollout.rolling_restart([], 0)
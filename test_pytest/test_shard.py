@@ -0,0 +1,285 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.shard
+
+
+def create_conf(name='name', code='import time; time.sleep(10)', **kwargs):
+    return {'name': name,
+            'args': [sys.executable, '-c', code],
+            'start_delay': 0,
+            **kwargs}
+
+
+async def wait_status(component, status):
+    while component.status != status:
+        await asyncio.sleep(0.01)
+
+
+def watch_statuses(component):
+    statuses = asyncio.Queue()
+    component.register_change_cb(
+        lambda: statuses.put_nowait(component.status))
+    return statuses
+
+
+async def test_create_sharding():
+    sharding = hat.orchestrator.shard.Sharding(3)
+    assert sharding.is_open
+    assert len(sharding.shards) == 3
+
+    await sharding.async_close()
+    assert all(shard.is_closed for shard in sharding.shards)
+
+    with pytest.raises(ValueError):
+        hat.orchestrator.shard.Sharding(0)
+
+
+async def test_shard_thread():
+    shard = hat.orchestrator.shard.Shard('abc')
+    assert shard.name == 'abc'
+
+    thread = next(thread for thread in threading.enumerate()
+                  if thread.name == 'abc')
+    assert thread.is_alive()
+
+    await shard.async_close()
+    assert not thread.is_alive()
+
+
+async def test_component_properties():
+    shard = hat.orchestrator.shard.Shard('shard')
+    conf = create_conf(tags=['a', 'b'], auto_start=False)
+    component = await shard.create_component(conf)
+
+    assert isinstance(component._component, Component)
+    assert component.shard is shard
+    assert component.conf == conf
+    assert component.name == 'name'
+    assert component.tags == ['a', 'b']
+    assert component.group is None
+    assert component.status == Status.STOPPED
+    assert component.revive is False
+    assert component.started is False
+    assert component.pid is None
+    assert component.pids == []
+    assert component.start_count == 0
+    assert component.output_lines == 0
+    assert shard.component_count == 1
+
+    await shard.async_close()
+    assert component.is_closed
+    assert shard.component_count == 0
+
+
+async def test_statuses():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(
+        create_conf(code='pass', auto_start=False))
+    statuses = watch_statuses(component)
+
+    component.start()
+    assert await statuses.get() == Status.STARTING
+    assert await statuses.get() == Status.RUNNING
+    assert component.pid is not None
+    assert component.uptime is not None
+    assert component.start_count == 1
+    assert await statuses.get() == Status.STOPPING
+    assert await statuses.get() == Status.STOPPED
+    assert component.returncode == 0
+    assert component.uptime is None
+
+    # latencies are snapshots owned by main event loop
+    latencies = component.latencies
+    assert latencies['spawn'].count == 1
+    assert latencies['stop'].count == 1
+    assert (latencies['spawn'] is not
+            component._component.latencies['spawn'])
+
+    await shard.async_close()
+
+
+async def test_requests():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf(auto_start=False))
+
+    started = asyncio.Queue()
+    component.register_started_cb(
+        lambda: started.put_nowait(component.started))
+
+    component.start()
+    assert await started.get() is True
+    await wait_status(component, Status.RUNNING)
+
+    component.set_revive(True)
+    await wait_status(component, Status.RUNNING)
+    while not component.revive:
+        await asyncio.sleep(0.01)
+
+    pid = component.pid
+    component.restart()
+    while component.pid in (None, pid):
+        await asyncio.sleep(0.01)
+    await wait_status(component, Status.RUNNING)
+
+    component.set_revive(False)
+    component.stop()
+    assert await started.get() is False
+    await wait_status(component, Status.STOPPED)
+
+    await shard.async_close()
+
+
+async def test_requests_state():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf(auto_start=False))
+
+    changes = []
+    component.register_change_cb(
+        lambda: changes.append((component.started, component.revive)))
+
+    component.start()
+    component.set_revive(True)
+    assert component.started is True
+    assert component.revive is True
+
+    # snapshots published before requests are applied don't override
+    # requested state
+    await wait_status(component, Status.RUNNING)
+    assert changes
+    assert set(changes) == {(True, True)}
+
+    changes.clear()
+    component.stop()
+    component.set_revive(False)
+    assert component.started is False
+    assert component.revive is False
+
+    await wait_status(component, Status.STOPPED)
+    assert changes
+    assert set(changes) == {(False, False)}
+
+    await shard.async_close()
+
+
+async def test_output():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf(
+        code='for i in range(100): print(i)'))
+
+    output_queue = asyncio.Queue()
+    component.register_output_cb(output_queue.put_nowait)
+
+    for i in range(100):
+        assert await output_queue.get() == str(i)
+
+    await wait_status(component, Status.STOPPED)
+    assert component.output_lines == 100
+
+    await shard.async_close()
+
+
+async def test_output_counts():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf(
+        code=('import time\n'
+              'for i in range(100): print(i, flush=True)\n'
+              'time.sleep(10)')))
+
+    while component.output_lines < 100:
+        await asyncio.sleep(0.01)
+    assert component.status == Status.RUNNING
+    assert component.output_lines == 100
+    assert component.output_bytes > 0
+
+    await shard.async_close()
+
+
+async def test_notify():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf())
+    await wait_status(component, Status.RUNNING)
+    assert component.ready is False
+    assert component.status_text is None
+
+    component.notify({'READY': '1', 'STATUS': 'abc'})
+    while not component.ready:
+        await asyncio.sleep(0.01)
+    assert component.status_text == 'abc'
+
+    await shard.async_close()
+
+
+async def test_component_closed():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf())
+    await wait_status(component, Status.RUNNING)
+
+    await component.async_close()
+    assert component._component.is_closed
+    assert component.status == Status.STOPPED
+    assert shard.is_open
+    assert shard.component_count == 0
+
+    await shard.async_close()
+
+
+async def test_detach():
+    shard = hat.orchestrator.shard.Shard('shard')
+    component = await shard.create_component(create_conf(auto_start=False))
+
+    component.detach()
+    await component.wait_closed()
+    assert component._component.is_closed
+
+    await shard.async_close()
+
+
+async def test_create_error():
+    shard = hat.orchestrator.shard.Shard('shard')
+
+    with pytest.raises(ValueError):
+        await shard.create_component(create_conf(on_demand=True))
+
+    assert shard.component_count == 0
+
+    await shard.async_close()
+
+    with pytest.raises(Exception):
+        await shard.create_component(create_conf())
+
+
+async def test_least_loaded():
+    sharding = hat.orchestrator.shard.Sharding(3)
+    components = [await sharding.create_component(
+                      create_conf(f'c{i}', auto_start=False))
+                  for i in range(6)]
+
+    assert [shard.component_count for shard in sharding.shards] == [2, 2, 2]
+
+    await components[0].async_close()
+    await components[3].async_close()
+
+    component = await sharding.create_component(
+        create_conf('c', auto_start=False))
+    assert component.shard is components[0].shard
+
+    await sharding.async_close()
+    assert all(component.is_closed for component in components)
+
+
+async def test_concurrent_create():
+    sharding = hat.orchestrator.shard.Sharding(3)
+    components = await asyncio.gather(*(
+        sharding.create_component(create_conf(f'c{i}', auto_start=False))
+        for i in range(6)))
+
+    assert [shard.component_count for shard in sharding.shards] == [2, 2, 2]
+    assert [component.name for component in components] == [
+        f'c{i}' for i in range(6)]
+
+    await sharding.async_close()
@@ -0,0 +1,194 @@
+import asyncio
+import time
+
+import pytest
+
+from hat import aio
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.sim
+
+
+@pytest.fixture
+def run():
+    loop = hat.orchestrator.sim.VirtualClockEventLoop()
+    yield loop.run_until_complete
+
+    tasks = asyncio.all_tasks(loop)
+    if tasks:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.wait(tasks))
+    loop.close()
+
+
+def create_backend(script=hat.orchestrator.sim.Script()):
+    return hat.orchestrator.sim.Backend(lambda args: script)
+
+
+def test_virtual_clock(run):
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.sleep(3600)
+        return loop.time() - start
+
+    start = time.monotonic()
+    duration = run(main())
+    assert duration >= 3600
+    assert time.monotonic() - start < 1
+
+
+def test_virtual_clock_wait_for(run):
+
+    async def main():
+        future = asyncio.get_running_loop().create_future()
+        with pytest.raises(asyncio.TimeoutError):
+            await aio.wait_for(future, 10)
+
+    run(main())
+
+
+def test_output(run):
+    backend = create_backend(hat.orchestrator.sim.Script(
+        output=[(0, 'a'), (1, 'b'), (10, 'c')],
+        duration=100,
+        returncode=42))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        process = await backend.create_process(['x'])
+
+        lines = []
+        with pytest.raises(ConnectionError):
+            while True:
+                lines.append((await process.readline(), loop.time()))
+
+        await process.wait_closing()
+        assert loop.time() >= 100
+        return process, lines
+
+    process, lines = run(main())
+    assert [line for line, _ in lines] == ['a', 'b', 'c']
+    assert [t for _, t in lines] == sorted(t for _, t in lines)
+    assert process.returncode == 42
+    assert process.output_lines == 3
+    assert process.output_bytes == 6
+    assert backend.processes == [process]
+
+
+def test_without_capture_output(run):
+    backend = create_backend(hat.orchestrator.sim.Script(
+        output=[(0, 'a')]))
+
+    async def main():
+        process = await backend.create_process(['x'], capture_output=False)
+
+        with pytest.raises(ConnectionError):
+            await process.readline()
+
+        assert process.is_open
+        await process.async_close()
+        return process
+
+    process = run(main())
+    assert process.returncode == hat.orchestrator.sim.sigint_returncode
+
+
+def test_stdin(run):
+    backend = create_backend()
+
+    async def main():
+        process = await backend.create_process(['x'], inherit_stdin=False)
+        process.write('abc')
+        await process.async_close()
+        return process
+
+    process = run(main())
+    assert process.stdin == 'abc'
+
+
+def test_ignore_sigint(run):
+    backend = create_backend(hat.orchestrator.sim.Script(
+        ignore_sigint=True))
+
+    async def main():
+        process = await backend.create_process(['x'], sigint_timeout=5)
+        await process.async_close()
+        return process
+
+    process = run(main())
+    assert process.returncode == hat.orchestrator.sim.sigkill_returncode
+    assert process.sigint_time is not None
+    assert process.sigkill_time is not None
+
+
+def test_component_revive(run):
+    backend = create_backend(hat.orchestrator.sim.Script(
+        output=[(1, 'started')],
+        duration=60,
+        returncode=1,
+        spawn_duration=0.1))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        component = Component({'name': 'c',
+                               'args': ['x'],
+                               'revive': True,
+                               'start_delay': 0.5},
+                              create_process=backend.create_process)
+        status_queue = aio.Queue()
+        component.register_change_cb(
+            lambda: status_queue.put_nowait(component.status))
+
+        while loop.time() < 3600:
+            await status_queue.get()
+
+        await component.async_close()
+        return component
+
+    component = run(main())
+    assert 55 <= len(backend.processes) <= 60
+    assert component.returncode in (1, hat.orchestrator.sim.sigint_returncode)
+    assert component.output_lines == len(backend.processes)
+
+
+@pytest.mark.parametrize('component_count', [5000])
+def test_many_components(run, component_count):
+    backend = create_backend(hat.orchestrator.sim.Script(
+        ignore_sigint=True))
+
+    async def wait_status(components, status):
+        while not all(component.status == status
+                      for component in components):
+            await asyncio.sleep(1)
+
+    async def main():
+        components = [Component({'name': str(i),
+                                 'args': ['x'],
+                                 'auto_start': False,
+                                 'sigint_timeout': 5},
+                                create_process=backend.create_process)
+                      for i in range(component_count)]
+        await asyncio.sleep(0)
+
+        for component in components:
+            component.start()
+        await wait_status(components, Status.RUNNING)
+
+        for component in components:
+            component.stop()
+        await wait_status(components, Status.STOPPED)
+
+        for component in components:
+            await component.async_close()
+
+        return components
+
+    components = run(main())
+    assert len(backend.processes) == component_count
+    assert all(component.returncode == hat.orchestrator.sim.sigkill_returncode
+               for component in components)
+    assert all(component.latencies['sigkill'].count == 1
+               for component in components)
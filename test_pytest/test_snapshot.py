@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from hat import json
+
+from hat.orchestrator.component import Component
+import hat.orchestrator.sim
+import hat.orchestrator.snapshot
+
+
+State = hat.orchestrator.snapshot.State
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return tmp_path / 'snapshot.json'
+
+
+@pytest.fixture
+def create_component():
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+
+    def create_component(name, snapshot=None, **kwargs):
+        state = snapshot.get_state(name) if snapshot else None
+        if state:
+            kwargs['revive'] = state.revive
+            kwargs['started'] = state.started
+
+        return Component({'name': name,
+                          'args': [],
+                          'start_delay': 0},
+                         create_process=backend.create_process,
+                         **kwargs)
+
+    return create_component
+
+
+def read_snapshot(path):
+    return json.decode_file(path, json.Format.JSON)
+
+
+async def test_empty(snapshot_path):
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path)})
+
+    assert snapshot.get_state('a') is None
+
+    snapshot.set_components([])
+    await snapshot.async_close()
+
+    assert not snapshot_path.exists()
+
+
+async def test_write(snapshot_path, create_component):
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path),
+                                                   'write_delay': 0.01})
+    components = [create_component('a'),
+                  create_component('b', revive=True, started=False)]
+    snapshot.set_components(components)
+
+    await asyncio.sleep(0.05)
+    assert read_snapshot(snapshot_path) == {'a': [False, True],
+                                            'b': [True, False]}
+
+    components[0].stop()
+    components[1].set_revive(False)
+
+    assert snapshot.get_state('a') == State(revive=False, started=False)
+    assert snapshot.get_state('b') == State(revive=False, started=False)
+
+    await asyncio.sleep(0.05)
+    assert read_snapshot(snapshot_path) == {'a': [False, False],
+                                            'b': [False, False]}
+
+    snapshot.set_components(components[1:])
+    await asyncio.sleep(0.05)
+    assert read_snapshot(snapshot_path) == {'b': [False, False]}
+
+    for component in components:
+        await component.async_close()
+    await snapshot.async_close()
+
+
+async def test_debounce(snapshot_path, create_component, monkeypatch):
+    writes = []
+    write_snapshot = hat.orchestrator.snapshot._write_snapshot
+
+    def on_write(path, states):
+        writes.append(dict(states))
+        write_snapshot(path, states)
+
+    monkeypatch.setattr(hat.orchestrator.snapshot, '_write_snapshot',
+                        on_write)
+
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path),
+                                                   'write_delay': 0.05})
+    component = create_component('a')
+    snapshot.set_components([component])
+
+    for i in range(10):
+        component.set_revive(i % 2 == 0)
+        component.stop() if i % 2 else component.start()
+        await asyncio.sleep(0.001)
+
+    await asyncio.sleep(0.1)
+    assert writes == [{'a': State(revive=False, started=False)}]
+
+    # status changes don't affect snapshot
+    component.restart()
+    component.stop()
+    await asyncio.sleep(0.1)
+    assert len(writes) == 1
+
+    await component.async_close()
+    await snapshot.async_close()
+
+
+async def test_write_on_close(snapshot_path, create_component):
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path),
+                                                   'write_delay': 10})
+    component = create_component('a')
+    snapshot.set_components([component])
+
+    component.stop()
+    await snapshot.async_close()
+
+    assert read_snapshot(snapshot_path) == {'a': [False, False]}
+
+    await component.async_close()
+
+
+async def test_restore(snapshot_path, create_component):
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path)})
+    component = create_component('a')
+    snapshot.set_components([component])
+
+    component.set_revive(True)
+    component.stop()
+    await component.async_close()
+    await snapshot.async_close()
+
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path)})
+    assert snapshot.get_state('a') == State(revive=True, started=False)
+    assert snapshot.get_state('b') is None
+
+    component = create_component('a', snapshot)
+    assert component.revive is True
+    assert component.started is False
+
+    await component.async_close()
+    await snapshot.async_close()
+
+
+async def test_invalid_snapshot(snapshot_path):
+    snapshot_path.write_text('invalid')
+
+    snapshot = hat.orchestrator.snapshot.Snapshot({'path': str(snapshot_path)})
+    assert snapshot.get_state('a') is None
+
+    await snapshot.async_close()
@@ -0,0 +1,48 @@
+import socket
+import sys
+
+import pytest
+
+import hat.orchestrator.sockets
+
+
+async def test_tcp():
+    sock = hat.orchestrator.sockets.create_socket({'type': 'tcp',
+                                                   'port': 0})
+    host, port = sock.getsockname()
+    assert host == '127.0.0.1'
+
+    conn = socket.create_connection((host, port))
+    conn.close()
+
+    hat.orchestrator.sockets.close_socket(sock)
+
+    with pytest.raises(ConnectionError):
+        socket.create_connection((host, port))
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="not supported")
+async def test_unix(tmp_path):
+    path = tmp_path / 'sock'
+
+    # stale socket
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    assert path.is_socket()
+
+    sock = hat.orchestrator.sockets.create_socket({'type': 'unix',
+                                                   'path': str(path)})
+    assert path.is_socket()
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(str(path))
+    conn.close()
+
+    hat.orchestrator.sockets.close_socket(sock)
+    assert not path.exists()
+
+    path.write_text('')
+    with pytest.raises(OSError):
+        hat.orchestrator.sockets.create_socket({'type': 'unix',
+                                                'path': str(path)})
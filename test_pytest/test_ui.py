@@ -1,3 +1,4 @@
+import asyncio
 import collections
 import functools
 
@@ -8,13 +9,20 @@ from hat import juggler
 from hat import util
 
 from hat.orchestrator.component import Status
+import hat.orchestrator.component
+import hat.orchestrator.event_log
+import hat.orchestrator.loop_monitor
+import hat.orchestrator.registry
+import hat.orchestrator.sim
 import hat.orchestrator.ui
 
 
 class Component(aio.Resource):
 
-    def __init__(self, name, delay=0, revive=False):
+    def __init__(self, name, delay=0, revive=False, tags=[], group=None):
         self._name = name
+        self._tags = tags
+        self._group = group
         self._delay = delay
         self._revive = revive
 
@@ -35,6 +43,34 @@ class Component(aio.Resource):
     def name(self):
         return self._name
 
+    @property
+    def group(self):
+        return self._group
+
+    @property
+    def tags(self):
+        return self._tags
+
+    @property
+    def pids(self):
+        return []
+
+    @property
+    def ready(self):
+        return False
+
+    @property
+    def status_text(self):
+        return None
+
+    @property
+    def latencies(self):
+        return {}
+
+    @property
+    def last_lifecycle(self):
+        return {}
+
     @property
     def delay(self):
         return self._delay
@@ -43,6 +79,10 @@ class Component(aio.Resource):
     def revive(self):
         return self._revive
 
+    @property
+    def returncode(self):
+        return None
+
     @property
     def started_queue(self):
         return self._started_queue
@@ -64,6 +104,9 @@ class Component(aio.Resource):
     def stop(self):
         self._started_queue.put_nowait(False)
 
+    def restart(self):
+        self._started_queue.put_nowait(None)
+
 
 @pytest.fixture
 def patch_autoflush_delay(monkeypatch):
@@ -81,7 +124,7 @@ async def connect(port):
 
 
 async def test_create(patch_autoflush_delay, port):
-    ui = await hat.orchestrator.ui.create('127.0.0.1', port, [])
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port, {})
     assert ui.is_open
 
     await ui.async_close()
@@ -94,7 +137,8 @@ async def test_connect(patch_autoflush_delay, port, connect, client_count,
                        component_count):
     components = [Component(str(i))
                   for i in range(component_count)]
-    ui = await hat.orchestrator.ui.create('127.0.0.1', port, components)
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
 
     clients = collections.deque()
     for i in range(client_count):
@@ -103,10 +147,18 @@ async def test_connect(patch_autoflush_delay, port, connect, client_count,
 
     state = {'components': [{'id': i,
                              'name': component.name,
+                             'group': None,
+                             'tags': component.tags,
                              'delay': component.delay,
                              'revive': component.revive,
-                             'status': component.status.name}
-                            for i, component in enumerate(components)]}
+                             'status': component.status.name,
+                             'pids': [],
+                             'ready': False,
+                             'status_text': None,
+                             'latencies': {},
+                             'last_lifecycle': {}}
+                            for i, component in enumerate(components)],
+             'groups': []}
 
     for client in clients:
         if client.state.data is None:
@@ -125,7 +177,8 @@ async def test_connect(patch_autoflush_delay, port, connect, client_count,
 async def test_status(patch_autoflush_delay, port, connect):
     state_queue = aio.Queue()
     component = Component('name')
-    ui = await hat.orchestrator.ui.create('127.0.0.1', port, [component])
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          {0: component})
     client = await connect()
     client.state.register_change_cb(state_queue.put_nowait)
     if client.state.data is not None:
@@ -143,10 +196,159 @@ async def test_status(patch_autoflush_delay, port, connect):
     await ui.async_close()
 
 
+async def test_set_components(patch_autoflush_delay, port, connect):
+    state_queue = aio.Queue()
+    old_component = Component('a')
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          {0: old_component})
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+    if client.state.data is not None:
+        state_queue.put_nowait(client.state.data)
+
+    state = await state_queue.get()
+    assert [i['name'] for i in state['components']] == ['a']
+
+    components = {3: Component('b'), 1: Component('c')}
+    ui.set_components(components)
+
+    state = await state_queue.get()
+    assert [i['name'] for i in state['components']] == ['b', 'c']
+    assert [i['id'] for i in state['components']] == [3, 1]
+
+    state_change_count = ui.state_change_count
+    old_component.set_status(Status.RUNNING)
+    await asyncio.sleep(0.01)
+    assert ui.state_change_count == state_change_count
+
+    components[1].set_status(Status.RUNNING)
+    state = await state_queue.get()
+    assert state['components'][0]['status'] == 'STOPPED'
+    assert state['components'][1]['status'] == 'RUNNING'
+
+    await client.async_close()
+    await ui.async_close()
+
+
+async def test_add_remove(patch_autoflush_delay, port, connect):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    registry = hat.orchestrator.registry.Registry(
+        [],
+        lambda conf: hat.orchestrator.component.Component(
+            conf, create_process=backend.create_process))
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          registry.components,
+                                          registry=registry)
+    registry.register_change_cb(
+        lambda: ui.set_components(registry.components))
+
+    state_queue = aio.Queue()
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+
+    result = await client.send('add', {'name': 'a', 'args': []})
+    assert result == 0
+
+    while True:
+        state = await state_queue.get()
+        if [i['name'] for i in state['components']] == ['a']:
+            break
+
+    await client.send('remove', {'id': 0})
+
+    while True:
+        state = await state_queue.get()
+        if not state['components']:
+            break
+
+    with pytest.raises(Exception):
+        await client.send('remove', {'id': 0})
+
+    await client.async_close()
+    await ui.async_close()
+    await registry.async_close()
+
+
+async def test_groups(patch_autoflush_delay, port, connect):
+    components = [Component('a/0', group='a'),
+                  Component('a/1', group='a'),
+                  Component('b')]
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
+
+    state_queue = aio.Queue()
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+    if client.state.data is not None:
+        state_queue.put_nowait(client.state.data)
+
+    state = await state_queue.get()
+    assert [i['group'] for i in state['components']] == ['a', 'a', None]
+    assert state['groups'] == [{'name': 'a',
+                                'instances': 2,
+                                'running': 0,
+                                'status': 'STOPPED'}]
+
+    components[0].set_status(Status.RUNNING)
+    state = await state_queue.get()
+    assert state['groups'] == [{'name': 'a',
+                                'instances': 2,
+                                'running': 1,
+                                'status': None}]
+
+    components[1].set_status(Status.RUNNING)
+    state = await state_queue.get()
+    assert state['groups'] == [{'name': 'a',
+                                'instances': 2,
+                                'running': 2,
+                                'status': 'RUNNING'}]
+
+    await client.send('stop', {'groups': ['a']})
+    assert components[0].started_queue.get_nowait() is False
+    assert components[1].started_queue.get_nowait() is False
+    assert components[2].started_queue.empty()
+
+    await client.async_close()
+    await ui.async_close()
+
+
+async def test_scale(patch_autoflush_delay, port, connect):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    registry = hat.orchestrator.registry.Registry(
+        [{'name': 'a', 'args': [], 'instances': 1}],
+        lambda conf: hat.orchestrator.component.Component(
+            conf, create_process=backend.create_process))
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          registry.components,
+                                          registry=registry)
+    registry.register_change_cb(
+        lambda: ui.set_components(registry.components))
+
+    state_queue = aio.Queue()
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+
+    await client.send('scale', {'group': 'a', 'instances': 3})
+
+    while True:
+        state = await state_queue.get()
+        if [i['name'] for i in state['components']] == ['a/0', 'a/1', 'a/2']:
+            break
+
+    assert state['groups'][0]['instances'] == 3
+
+    await client.async_close()
+    await ui.async_close()
+    await registry.async_close()
+
+
 async def test_revive(patch_autoflush_delay, port, connect):
     state_queue = aio.Queue()
     component = Component('name')
-    ui = await hat.orchestrator.ui.create('127.0.0.1', port, [component])
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          {0: component})
     client = await connect()
     client.state.register_change_cb(state_queue.put_nowait)
     if client.state.data is not None:
@@ -167,7 +369,8 @@ async def test_revive(patch_autoflush_delay, port, connect):
 
 async def test_start_stop(patch_autoflush_delay, port, connect):
     component = Component('name')
-    ui = await hat.orchestrator.ui.create('127.0.0.1', port, [component])
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          {0: component})
     client = await connect()
 
     assert component.started_queue.empty()
@@ -183,3 +386,156 @@ async def test_start_stop(patch_autoflush_delay, port, connect):
 
     await client.async_close()
     await ui.async_close()
+
+
+async def test_bulk_start_stop_restart(patch_autoflush_delay, port, connect):
+    components = [Component('a1', tags=['a']),
+                  Component('a2', tags=['a']),
+                  Component('b1', tags=['b']),
+                  Component('c1')]
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
+    client = await connect()
+
+    await client.send('start', {'ids': [0, 3]})
+    await client.send('stop', {'tags': ['a']})
+    await client.send('restart', {'names': ['b*', 'c*']})
+    await client.send('restart', {'ids': [], 'names': [], 'tags': []})
+
+    assert [component.started_queue.get_nowait_until_empty()
+            for component in components] == [False, False, None, None]
+
+    with pytest.raises(Exception):
+        await client.send('start', {'ids': [0, 4]})
+
+    assert all(component.started_queue.empty() for component in components)
+
+    await client.async_close()
+    await ui.async_close()
+
+
+async def test_bulk_revive(patch_autoflush_delay, port, connect):
+    state_queue = aio.Queue()
+    components = [Component(str(i), tags=['x'] if i % 2 else [])
+                  for i in range(10)]
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+    if client.state.data is not None:
+        state_queue.put_nowait(client.state.data)
+
+    state = await state_queue.get()
+    assert all(i['revive'] is False for i in state['components'])
+
+    await client.send('revive', {'tags': ['x'], 'value': True})
+    state = await state_queue.get()
+    assert [i['revive'] for i in state['components']] == [bool(i % 2)
+                                                          for i in range(10)]
+    assert state_queue.empty()
+
+    await client.async_close()
+    await ui.async_close()
+
+
+async def test_events(patch_autoflush_delay, port, connect):
+    component = Component('name')
+    event_log = hat.orchestrator.event_log.EventLog()
+    event_log.watch(0, component)
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          {0: component},
+                                          event_log=event_log)
+    client = await connect()
+
+    component.set_status(Status.STARTING)
+    component.set_status(Status.RUNNING)
+
+    result = await client.send('events', {'since': 1})
+    assert result['last_seq'] == 2
+    assert result['lost'] is False
+    assert [(i['seq'], i['component_id'], i['old_status'], i['new_status'])
+            for i in result['events']] == [(2, 0, 'STARTING', 'RUNNING')]
+
+    await client.async_close()
+    await ui.async_close()
+
+
+async def test_loop_monitor(patch_autoflush_delay, port, connect):
+    loop_monitor = hat.orchestrator.loop_monitor.LoopMonitor({
+        'interval': 0.001,
+        'report_interval': 0.01})
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port, {},
+                                          loop_monitor=loop_monitor)
+    client = await connect()
+
+    state_queue = aio.Queue()
+    client.state.register_change_cb(state_queue.put_nowait)
+
+    while True:
+        state = await state_queue.get()
+        if state['loop_monitor']['lag'] is not None:
+            break
+
+    assert state['loop_monitor']['slow_callback_count'] == 0
+
+    await client.async_close()
+    await ui.async_close()
+    await loop_monitor.async_close()
+
+
+async def test_rolling_restart(patch_autoflush_delay, port, connect):
+    backend = hat.orchestrator.sim.Backend(
+        lambda args: hat.orchestrator.sim.Script())
+    components = [hat.orchestrator.component.Component(
+                      {'name': name, 'args': [], 'start_delay': 0},
+                      create_process=backend.create_process)
+                  for name in ['a', 'b', 'c']]
+    ui = await hat.orchestrator.ui.create('127.0.0.1', port,
+                                          dict(enumerate(components)))
+
+    while not all(i.status == Status.RUNNING for i in components):
+        await asyncio.sleep(0.001)
+
+    state_queue = aio.Queue()
+    client = await connect()
+    client.state.register_change_cb(state_queue.put_nowait)
+
+    with pytest.raises(Exception):
+        await client.send('rolling_restart', {'id': 3})
+
+    result = await client.send('rolling_restart', {'names': ['a', 'b']})
+    assert result is None
+
+    with pytest.raises(Exception, match='already active'):
+        await client.send('rolling_restart', {'names': ['c']})
+
+    while True:
+        state = await state_queue.get()
+        rollout = state.get('rollout')
+        if rollout and rollout['status'] != 'running':
+            break
+
+    assert rollout == {'status': 'finished',
+                       'processed': 2,
+                       'total': 2,
+                       'error': None}
+    assert [i.start_count for i in components] == [2, 2, 1]
+
+    await client.send('rolling_restart', {'names': ['c'],
+                                          'ready_timeout': 0})
+
+    while True:
+        state = await state_queue.get()
+        rollout = state['rollout']
+        if rollout['status'] != 'running':
+            break
+
+    assert rollout['status'] == 'aborted'
+    assert rollout['processed'] == 0
+    assert rollout['total'] == 1
+    assert 'not ready' in rollout['error']
+
+    await client.async_close()
+    await ui.async_close()
+    for component in components:
+        await component.async_close()
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import signal
+import socket
+import sys
+
+import pytest
+
+from hat.orchestrator.component import Status, Component
+import hat.orchestrator.zygote
+
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux',
+                                reason="only for linux")
+
+
+modules = {
+    'zygote_preimported': 'x = 42\n',
+    'zygote_output': ('import sys\n'
+                      'import zygote_preimported\n'
+                      'print(zygote_preimported.x, *sys.argv[1:])\n'),
+    'zygote_exit': ('import sys\n'
+                    'sys.exit(int(sys.argv[1]))\n'),
+    'zygote_input': 'print(input())\n',
+    'zygote_sleep': ('import time\n'
+                     'try:\n'
+                     '    print("started", flush=True)\n'
+                     '    time.sleep(10)\n'
+                     'except KeyboardInterrupt:\n'
+                     '    pass\n'),
+    'zygote_sockets': ('import os, socket\n'
+                       'print(os.environ["LISTEN_FDS"], flush=True)\n'
+                       's = socket.socket(fileno=3)\n'
+                       'conn, _ = s.accept()\n'
+                       'conn.sendall(b"abc")\n'
+                       'conn.close()\n'),
+    'zygote_env': ('import os\n'
+                   'print(os.environ["ABC"])\n')}
+
+
+@pytest.fixture
+async def zygote(tmp_path, monkeypatch):
+    for name, code in modules.items():
+        (tmp_path / f'{name}.py').write_text(code)
+
+    monkeypatch.setenv('PYTHONPATH', str(tmp_path))
+
+    zygote = await hat.orchestrator.zygote.create_zygote({
+        'name': 'zygote',
+        'modules': ['zygote_preimported']})
+
+    try:
+        yield zygote
+
+    finally:
+        await zygote.async_close()
+
+
+async def read_lines(process):
+    lines = []
+    while True:
+        try:
+            lines.append(await process.readline())
+
+        except ConnectionError:
+            return lines
+
+
+async def test_create_zygote(zygote):
+    assert zygote.is_open
+    assert zygote.name == 'zygote'
+    assert zygote.pid != os.getpid()
+
+    await zygote.async_close()
+    assert zygote.is_closed
+
+
+async def test_invalid_module():
+    with pytest.raises(Exception):
+        await hat.orchestrator.zygote.create_zygote({
+            'name': 'zygote',
+            'modules': ['zygote_not_existing_module']})
+
+
+async def test_output(zygote):
+    process = await zygote.create_process(['zygote_output', 'a', 'b'])
+    assert process.pid not in (os.getpid(), zygote.pid)
+
+    assert await read_lines(process) == ['42 a b']
+
+    await process.wait_closed()
+    assert process.returncode == 0
+
+
+@pytest.mark.parametrize("returncode", [0, 1, 42])
+async def test_returncode(zygote, returncode):
+    process = await zygote.create_process(['zygote_exit', str(returncode)])
+    await process.wait_closed()
+
+    assert process.returncode == returncode
+
+
+async def test_invalid_process_module(zygote):
+    process = await zygote.create_process(['zygote_not_existing_module'])
+    await process.wait_closed()
+
+    assert process.returncode == 1
+
+
+async def test_write(zygote):
+    process = await zygote.create_process(['zygote_input'],
+                                          inherit_stdin=False)
+    process.write('abc\n')
+
+    assert await read_lines(process) == ['abc']
+
+    await process.wait_closed()
+    assert process.returncode == 0
+
+
+async def test_sigint(zygote):
+    process = await zygote.create_process(['zygote_sleep'])
+    assert await process.readline() == 'started'
+
+    await process.async_close()
+
+    assert process.returncode == 0
+    assert process.sigkill_time is None
+
+
+async def test_kill(zygote):
+    process = await zygote.create_process(['zygote_sleep'])
+    assert await process.readline() == 'started'
+
+    os.kill(process.pid, signal.SIGKILL)
+    await process.wait_closed()
+
+    assert process.returncode == -signal.SIGKILL
+
+
+async def test_pass_fds(zygote):
+    with socket.create_server(('127.0.0.1', 0)) as server:
+        process = await zygote.create_process(
+            ['zygote_sockets'], pass_fds=[server.fileno()])
+        assert await process.readline() == '1'
+
+        reader, writer = await asyncio.open_connection(
+            *server.getsockname())
+        assert await reader.read() == b'abc'
+        writer.close()
+
+    await process.wait_closed()
+    assert process.returncode == 0
+
+
+async def test_env(zygote):
+    process = await zygote.create_process(['zygote_env'], env={'ABC': 'x'})
+    assert await process.readline() == 'x'
+
+    await process.wait_closed()
+    assert process.returncode == 0
+    assert 'ABC' not in os.environ
+
+
+async def test_zygote_closed(zygote):
+    process = await zygote.create_process(['zygote_sleep'])
+    assert await process.readline() == 'started'
+
+    zygote.close()
+    await process.async_close()
+    await zygote.wait_closed()
+
+    assert process.returncode == 0
+
+    with pytest.raises(Exception):
+        await zygote.create_process(['zygote_output'])
+
+
+async def test_component(zygote):
+    component = Component({'name': 'name',
+                           'args': ['zygote_output', 'abc'],
+                           'start_delay': 0},
+                          create_process=zygote.create_process)
+    output_queue = asyncio.Queue()
+    component.register_output_cb(output_queue.put_nowait)
+
+    assert await output_queue.get() == '42 abc'
+
+    while component.status != Status.STOPPED:
+        await asyncio.sleep(0.01)
+
+    await component.async_close()
@@ -0,0 +1,743 @@
+import asyncio
+import signal
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from hat import aio
+from hat import json
+from hat import juggler
+from hat import util
+
+import hat.orchestrator.control
+
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason="not supported")
+
+component_counts = [1, 10, 100]
+"""Numbers of components in generated configurations"""
+
+base_timeout = 5
+"""Timing budget (in seconds) independent of number of components"""
+
+component_timeout = 0.05
+"""Additional timing budget (in seconds) per component"""
+
+ui_timeout = 1
+"""Timing budget (in seconds) of UI state convergence"""
+
+no_change_delay = 1
+
+
+def get_timeout(component_count):
+    return base_timeout + component_count * component_timeout
+
+
+def create_component_conf(name, args=['sleep', '100'], **kwargs):
+    return {'name': name,
+            'args': args,
+            'delay': 0,
+            'revive': False,
+            'start_delay': 0,
+            'create_timeout': 2,
+            'sigint_timeout': 5,
+            'sigkill_timeout': 2,
+            **kwargs}
+
+
+def run_orchestrator(conf, conf_path=None):
+    if conf_path:
+        json.encode_file(conf, conf_path)
+        return psutil.Popen([sys.executable, '-m', 'hat.orchestrator',
+                             '--conf', str(conf_path)])
+
+    process = psutil.Popen([sys.executable, '-m', 'hat.orchestrator',
+                            '--conf', '-'],
+                           stdin=subprocess.PIPE)
+    process.stdin.write(json.encode(conf).encode('utf-8'))
+    process.stdin.close()
+    return process
+
+
+def stop_process(process, wait_timeout=5):
+    if not process.is_running():
+        return
+
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(wait_timeout)
+
+    except psutil.TimeoutExpired:
+        process.kill()
+
+
+def wait_until(fn, *args, timeout=5):
+    start = time.monotonic()
+    while True:
+        if fn(*args):
+            return time.monotonic() - start
+
+        if time.monotonic() - start > timeout:
+            raise TimeoutError()
+
+        time.sleep(0.01)
+
+
+def process_is_running(process):
+    try:
+        return process.is_running() and process.status() != 'zombie'
+
+    except psutil.NoSuchProcess:
+        return False
+
+
+def get_running_children(process):
+    return [child for child in process.children()
+            if process_is_running(child)]
+
+
+def count_running_children(process):
+    return len(get_running_children(process))
+
+
+def process_listens_on(process, port):
+    return bool(util.first(process.net_connections(),
+                           lambda i: (i.status == psutil.CONN_LISTEN and
+                                      i.laddr.port == port)))
+
+
+def get_statuses(client):
+    if not client.state.data:
+        return []
+
+    return [component['status']
+            for component in client.state.data['components']]
+
+
+def drain_queue(queue):
+    while not queue.empty():
+        queue.get_nowait()
+
+
+async def wait_statuses(client, change_queue, status):
+    start = time.monotonic()
+    while True:
+        statuses = get_statuses(client)
+        if statuses and all(i == status for i in statuses):
+            return time.monotonic() - start
+
+        await change_queue.get_until_empty()
+
+
+async def wait_status_and_assert_process(process, client, change_queue,
+                                         status):
+    await aio.wait_for(wait_statuses(client, change_queue, status),
+                       ui_timeout + base_timeout)
+    statuses = get_statuses(client)
+    assert (count_running_children(process) ==
+            sum(i == 'RUNNING' for i in statuses))
+
+
+@pytest.fixture
+def conf():
+    return {'type': 'orchestrator',
+            'log': {'version': 1},
+            'components': []}
+
+
+@pytest.fixture
+def run_orchestrator_factory(conf):
+    processes = []
+
+    def run(components, conf_path=None):
+        process = run_orchestrator(dict(conf, components=components),
+                                   conf_path)
+        processes.append(process)
+        return process
+
+    yield run
+
+    for process in processes:
+        stop_process(process)
+
+
+@pytest.fixture
+async def run_orchestrator_ui_client_factory(conf):
+    processes = []
+    clients = []
+
+    async def run(components):
+        port = util.get_unused_tcp_port()
+        process = run_orchestrator(dict(conf,
+                                        components=components,
+                                        ui={'host': '127.0.0.1',
+                                            'port': port}))
+        processes.append(process)
+
+        wait_until(process_listens_on, process, port)
+
+        client = await juggler.connect(f'ws://127.0.0.1:{port}/ws')
+        clients.append(client)
+
+        change_queue = aio.Queue()
+        client.state.register_change_cb(change_queue.put_nowait)
+
+        return process, client, change_queue
+
+    yield run
+
+    for client in clients:
+        await client.async_close()
+
+    for process in processes:
+        stop_process(process)
+
+
+@pytest.mark.parametrize('component_count', component_counts)
+def test_startup_shutdown(run_orchestrator_factory, record_property,
+                          component_count):
+    timeout = get_timeout(component_count)
+    process = run_orchestrator_factory(
+        components=[create_component_conf(f'comp-{i}')
+                    for i in range(component_count)])
+
+    startup_duration = wait_until(
+        lambda: count_running_children(process) == component_count,
+        timeout=timeout)
+    children = process.children()
+
+    start = time.monotonic()
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout)
+    wait_until(lambda: not any(process_is_running(child)
+                               for child in children),
+               timeout=timeout)
+    shutdown_duration = time.monotonic() - start
+
+    record_property('startup_duration', startup_duration)
+    record_property('shutdown_duration', shutdown_duration)
+
+    assert startup_duration < timeout
+    assert shutdown_duration < timeout
+    assert not [child.pid for child in children if process_is_running(child)]
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="not supported")
+@pytest.mark.parametrize('component_count', component_counts)
+def test_kills_children_on_kill(run_orchestrator_factory, record_property,
+                                component_count):
+    timeout = get_timeout(component_count)
+    process = run_orchestrator_factory(
+        components=[create_component_conf(f'comp-{i}')
+                    for i in range(component_count)])
+
+    wait_until(lambda: count_running_children(process) == component_count,
+               timeout=timeout)
+    children = process.children()
+
+    process.kill()
+    cleanup_duration = wait_until(
+        lambda: not any(process_is_running(child) for child in children),
+        timeout=timeout)
+
+    record_property('cleanup_duration', cleanup_duration)
+
+    assert not [child.pid for child in children if process_is_running(child)]
+
+
+def test_reload(run_orchestrator_factory, tmp_path, record_property):
+    conf_path = tmp_path / 'orchestrator.json'
+
+    def get_children_pids(process):
+        return {child.cmdline()[-1]: child.pid
+                for child in get_running_children(process)}
+
+    process = run_orchestrator_factory(
+        components=[create_component_conf(name, args=['sleep', arg])
+                    for name, arg in [('a', '100'),
+                                      ('b', '101'),
+                                      ('c', '102')]],
+        conf_path=conf_path)
+
+    wait_until(lambda: count_running_children(process) == 3)
+    pids = get_children_pids(process)
+
+    conf = json.decode_file(conf_path)
+    conf['components'] = [create_component_conf(name, args=['sleep', arg])
+                          for name, arg in [('a', '100'),
+                                            ('c', '103'),
+                                            ('d', '104')]]
+    json.encode_file(conf, conf_path)
+
+    process.send_signal(signal.SIGHUP)
+    reload_duration = wait_until(
+        lambda: get_children_pids(process).keys() == {'100', '103', '104'})
+
+    record_property('reload_duration', reload_duration)
+
+    assert get_children_pids(process)['100'] == pids['100']
+    assert not psutil.pid_exists(pids['101'])
+    assert not psutil.pid_exists(pids['102'])
+
+
+def test_add_remove(run_orchestrator_factory, conf, tmp_path,
+                    record_property):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    process = run_orchestrator_factory(
+        components=[create_component_conf('a')])
+
+    wait_until(lambda: count_running_children(process) == 1)
+    wait_until(path.exists)
+    children = process.children()
+
+    start = time.monotonic()
+    component_id = hat.orchestrator.control.call(
+        path, 'add', create_component_conf('b'))
+    wait_until(lambda: count_running_children(process) == 2, timeout=1)
+    add_duration = time.monotonic() - start
+
+    assert component_id == 1
+    assert process.children()[0].pid == children[0].pid
+
+    start = time.monotonic()
+    hat.orchestrator.control.call(path, 'remove', {'id': component_id})
+    wait_until(lambda: count_running_children(process) == 1, timeout=1)
+    remove_duration = time.monotonic() - start
+
+    record_property('add_duration', add_duration)
+    record_property('remove_duration', remove_duration)
+
+    assert get_running_children(process)[0].pid == children[0].pid
+    assert [i['id'] for i in hat.orchestrator.control.call(
+        path, 'status')] == [0]
+
+
+def test_scale(run_orchestrator_factory, conf, tmp_path, record_property):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    process = run_orchestrator_factory(
+        components=[create_component_conf('a', args=['sleep', '10{instance}'],
+                                          instances=2)])
+
+    wait_until(lambda: sorted(child.cmdline()
+                              for child in get_running_children(process)) ==
+               [['sleep', '100'], ['sleep', '101']])
+    wait_until(path.exists)
+
+    start = time.monotonic()
+    hat.orchestrator.control.call(path, 'scale', {'group': 'a',
+                                                  'instances': 3})
+    wait_until(lambda: count_running_children(process) == 3, timeout=1)
+    scale_duration = time.monotonic() - start
+
+    record_property('scale_duration', scale_duration)
+
+    hat.orchestrator.control.call(path, 'scale', {'group': 'a',
+                                                  'instances': 1})
+    wait_until(lambda: count_running_children(process) == 1)
+
+    assert [i['name'] for i in hat.orchestrator.control.call(
+        path, 'status', {'groups': ['a']})] == ['a/0']
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="not supported")
+@pytest.mark.parametrize('detach', [True, False])
+def test_adoption(run_orchestrator_factory, conf, tmp_path, record_property,
+                  detach):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    conf['adoption'] = {'state_path': str(tmp_path / 'state.json'),
+                        'fifo_dir': str(tmp_path / 'fifo')}
+    components = [create_component_conf(name) for name in ('a', 'b')]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 2)
+    wait_until(path.exists)
+    children = get_running_children(process)
+
+    if detach:
+        hat.orchestrator.control.call(path, 'detach')
+        process.wait(5)
+
+    else:
+        process.kill()
+
+    assert all(process_is_running(child) for child in children)
+
+    def all_running():
+        try:
+            statuses = hat.orchestrator.control.call(path, 'status')
+
+        except ConnectionError:
+            return False
+
+        return all(i['status'] == 'RUNNING' for i in statuses)
+
+    start = time.monotonic()
+    process = run_orchestrator_factory(components=components)
+    wait_until(all_running)
+    adoption_duration = time.monotonic() - start
+
+    record_property('adoption_duration', adoption_duration)
+
+    assert count_running_children(process) == 0
+    assert all(process_is_running(child) for child in children)
+
+    stop_process(process)
+
+    assert not any(process_is_running(child) for child in children)
+
+
+def test_snapshot(run_orchestrator_factory, conf, tmp_path):
+    path = tmp_path / 'control'
+    snapshot_path = tmp_path / 'snapshot.json'
+    conf['control'] = {'path': str(path)}
+    conf['snapshot'] = {'path': str(snapshot_path),
+                        'write_delay': 0}
+    components = [create_component_conf('a', args=['sleep', '101']),
+                  create_component_conf('b', args=['sleep', '102'])]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 2)
+    wait_until(path.exists)
+
+    hat.orchestrator.control.call(path, 'stop', {'names': ['a']})
+    wait_until(lambda: count_running_children(process) == 1)
+    wait_until(lambda: snapshot_path.exists() and
+               json.decode_file(snapshot_path)['a'] == [False, False])
+
+    stop_process(process)
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 1)
+    time.sleep(no_change_delay)
+
+    assert count_running_children(process) == 1
+    assert [child.cmdline() for child in get_running_children(process)] == [
+        ['sleep', '102']]
+
+
+def test_shards(run_orchestrator_factory, conf, tmp_path):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    conf['shards'] = 2
+    components = [create_component_conf(f'c{i}', args=['sleep', f'10{i}'])
+                  for i in range(4)]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 4)
+    wait_until(path.exists)
+
+    hat.orchestrator.control.call(path, 'stop', {'names': ['c0', 'c1']})
+    wait_until(lambda: count_running_children(process) == 2)
+
+    statuses = hat.orchestrator.control.call(path, 'status', None)
+    assert [i['status'] for i in statuses] == [
+        'STOPPED', 'STOPPED', 'RUNNING', 'RUNNING']
+
+    children = get_running_children(process)
+    stop_process(process)
+
+    wait_until(lambda: not any(process_is_running(i) for i in children))
+
+
+def test_compact_engine(run_orchestrator_factory, conf, tmp_path):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    conf['engine'] = 'compact'
+    components = [create_component_conf(f'c{i}', args=['sleep', f'10{i}'])
+                  for i in range(4)]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 4)
+    wait_until(path.exists)
+
+    hat.orchestrator.control.call(path, 'stop', {'names': ['c0', 'c1']})
+    wait_until(lambda: count_running_children(process) == 2)
+
+    statuses = hat.orchestrator.control.call(path, 'status', None)
+    assert [i['status'] for i in statuses] == [
+        'STOPPED', 'STOPPED', 'RUNNING', 'RUNNING']
+
+    children = get_running_children(process)
+    stop_process(process)
+
+    wait_until(lambda: not any(process_is_running(i) for i in children))
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="not supported")
+@pytest.mark.parametrize('engine', ['default', 'compact'])
+def test_notify(run_orchestrator_factory, conf, tmp_path, engine):
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    conf['notify'] = {'path': str(tmp_path / 'notify')}
+    conf['engine'] = engine
+    code = ('import os, socket, sys, time\n'
+            's = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)\n'
+            'addr = os.environ["NOTIFY_SOCKET"]\n'
+            's.sendto(b"READY=1\\nSTATUS=" + sys.argv[1].encode(), addr)\n'
+            'while sys.argv[1] == "alive":\n'
+            '    s.sendto(b"WATCHDOG=1", addr)\n'
+            '    time.sleep(0.1)\n'
+            'time.sleep(100)\n')
+    components = [create_component_conf(name,
+                                        args=[sys.executable, '-c', code,
+                                              name],
+                                        watchdog_timeout=1)
+                  for name in ['alive', 'hung']]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 2)
+    wait_until(path.exists)
+
+    def get_statuses():
+        return {i['name']: i
+                for i in hat.orchestrator.control.call(path, 'status', None)}
+
+    wait_until(lambda: all(i['ready'] for i in get_statuses().values()))
+    statuses = get_statuses()
+    assert statuses['alive']['status_text'] == 'alive'
+    assert statuses['hung']['status_text'] == 'hung'
+
+    pids = {name: i['pids'] for name, i in statuses.items()}
+    wait_until(lambda: get_statuses()['hung']['pids'] not in
+               ([], pids['hung']))
+    assert get_statuses()['alive']['pids'] == pids['alive']
+
+    children = get_running_children(process)
+    stop_process(process)
+
+    wait_until(lambda: not any(process_is_running(i) for i in children))
+
+
+@pytest.mark.parametrize('event_loop', ['asyncio', 'uvloop'])
+def test_event_loop(run_orchestrator_factory, conf, tmp_path, event_loop):
+    if event_loop == 'uvloop':
+        pytest.importorskip('uvloop')
+
+    path = tmp_path / 'control'
+    conf['control'] = {'path': str(path)}
+    conf['event_loop'] = event_loop
+    components = [create_component_conf(f'c{i}', args=['sleep', f'10{i}'])
+                  for i in range(2)]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 2)
+    wait_until(path.exists)
+
+    hat.orchestrator.control.call(path, 'stop', {'names': ['c0']})
+    wait_until(lambda: count_running_children(process) == 1)
+
+    # component status is updated after its process exits
+    wait_until(lambda: [i['status'] for i in hat.orchestrator.control.call(
+        path, 'status', None)] == ['STOPPED', 'RUNNING'])
+
+    children = get_running_children(process)
+    stop_process(process)
+
+    wait_until(lambda: not any(process_is_running(i) for i in children))
+
+
+@pytest.mark.skipif(sys.platform != 'linux', reason="not supported")
+def test_zygote(run_orchestrator_factory, conf):
+    conf['zygotes'] = [{'name': 'zygote',
+                        'modules': ['http.server']}]
+    components = [
+        create_component_conf(f'c{i}',
+                              args=['http.server', '0', '--bind', '127.0.0.1'],
+                              zygote='zygote')
+        for i in range(2)]
+
+    process = run_orchestrator_factory(components=components)
+    wait_until(lambda: count_running_children(process) == 1)
+    zygote = process.children()[0]
+
+    wait_until(lambda: count_running_children(zygote) == 2)
+    children = get_running_children(zygote)
+
+    stop_process(process)
+
+    wait_until(lambda: not any(process_is_running(i)
+                               for i in [zygote, *children]))
+
+
+def test_revive_killed_child(run_orchestrator_factory):
+    process = run_orchestrator_factory(
+        components=[create_component_conf('revive', revive=True)])
+
+    wait_until(lambda: count_running_children(process) == 1)
+    children = process.children()
+
+    for child in children:
+        child.kill()
+
+    wait_until(lambda: (count_running_children(process) == 1 and
+                        process.children() != children))
+
+
+def test_revive(run_orchestrator_factory):
+    process = run_orchestrator_factory(
+        components=[create_component_conf('revive',
+                                          args=['sleep', '0.5'],
+                                          revive=True,
+                                          start_delay=0.5),
+                    create_component_conf('no revive',
+                                          args=['sleep', '0.5'],
+                                          revive=False,
+                                          start_delay=0.5)])
+
+    wait_until(lambda: count_running_children(process) == 2)
+    time.sleep(1.1)
+    assert count_running_children(process) == 1
+
+
+def test_delay(run_orchestrator_factory):
+    process = run_orchestrator_factory(
+        components=[create_component_conf('delay', delay=2)])
+
+    time.sleep(1.5)
+    assert count_running_children(process) == 0
+
+    wait_until(lambda: count_running_children(process) == 1)
+
+
+@pytest.mark.parametrize('component_count', component_counts)
+async def test_ui_convergence(run_orchestrator_ui_client_factory,
+                              record_property, component_count):
+    timeout = get_timeout(component_count)
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf(f'comp-{i}')
+                    for i in range(component_count)])
+
+    await aio.wait_for(wait_statuses(client, change_queue, 'RUNNING'),
+                       timeout)
+    assert count_running_children(process) == component_count
+
+    durations = []
+    for status, action in [('STOPPED', 'stop'),
+                           ('RUNNING', 'start')]:
+        drain_queue(change_queue)
+        await client.send(action, {'names': ['*']})
+        duration = await aio.wait_for(
+            wait_statuses(client, change_queue, status), timeout)
+        durations.append(duration)
+
+        expected = component_count if status == 'RUNNING' else 0
+        wait_until(lambda: count_running_children(process) == expected,
+                   timeout=timeout)
+
+    record_property('stop_convergence_duration', durations[0])
+    record_property('start_convergence_duration', durations[1])
+
+    assert durations[0] < ui_timeout + component_count * component_timeout
+    assert durations[1] < ui_timeout + component_count * component_timeout
+
+
+async def test_ui_process_consistency(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('comp')])
+
+    for _ in range(3):
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'RUNNING')
+        await client.send('stop', {'ids': [0]})
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'STOPPED')
+        await client.send('start', {'ids': [0]})
+
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'RUNNING')
+    await asyncio.sleep(no_change_delay)
+    assert count_running_children(process) == 1
+    assert change_queue.empty()
+
+
+async def test_revive_after_end(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('revive',
+                                          args=['sleep', '0.5'],
+                                          revive=True,
+                                          start_delay=0.5)])
+
+    for _ in range(3):
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'RUNNING')
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'STOPPED')
+
+
+async def test_revive_after_stop(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('revive',
+                                          revive=True,
+                                          start_delay=0.5)])
+
+    for _ in range(3):
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'RUNNING')
+        await client.send('stop', {'ids': [0]})
+        await wait_status_and_assert_process(process, client, change_queue,
+                                             'STOPPED')
+
+
+async def test_start_on_delay(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('delay', delay=10)])
+
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'DELAYED')
+    await client.send('start', {'ids': [0]})
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'RUNNING')
+
+
+async def test_stop_on_delay(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('delay', delay=10)])
+
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'DELAYED')
+    await client.send('stop', {'ids': [0]})
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'STOPPED')
+
+
+@pytest.mark.parametrize('action', ['start', 'revive'])
+async def test_noop_running(run_orchestrator_ui_client_factory, action):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('comp', revive=True)])
+
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'RUNNING')
+    drain_queue(change_queue)
+
+    for _ in range(3):
+        await client.send(action, {'ids': [0], 'value': True})
+
+    await asyncio.sleep(no_change_delay)
+    assert count_running_children(process) == 1
+    assert change_queue.empty()
+
+
+async def test_noop_stop(run_orchestrator_ui_client_factory):
+    process, client, change_queue = await run_orchestrator_ui_client_factory(
+        components=[create_component_conf('comp')])
+
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'RUNNING')
+    await client.send('stop', {'ids': [0]})
+    await wait_status_and_assert_process(process, client, change_queue,
+                                         'STOPPED')
+    drain_queue(change_queue)
+
+    for _ in range(3):
+        await client.send('stop', {'ids': [0]})
+
+    await asyncio.sleep(no_change_delay)
+    assert count_running_children(process) == 0
+    assert change_queue.empty()